@@ -0,0 +1,95 @@
+# Description: Observes a past block range into the event archive, splitting the work across any number of workers.
+# Usage: python backfill.py --start 3000000 --end 3010000 [--chunk-size 100] [--network finney] [--workers 8]
+# Start the same command on several machines or processes sharing the database: every worker leases its own chunks.
+# With --workers the blocks of a chunk are decoded in that many processes while they are observed in order.
+import argparse
+import logging
+from chain_observer.bot.networks import load_networks
+from chain_observer.bot.parallel_decoding import ParallelBlockDecoder
+from chain_observer.utils.sentry import init_sentry
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def observe(network, observer, job, block_number, block_data=None):
+    """
+    Observes one block of a backfill. A block that fails is recorded in the job's failed blocks, to be retried.
+
+    Returns:
+    bool: True when the block was observed.
+    """
+    try:
+        observer.observe_block(block_number, block_data)
+        return True
+    except Exception as e:
+        logging.exception(f"Failed to backfill block {block_number}.")
+        network.leases.fail_block(job, block_number, str(e))
+        return False
+
+def backfill(network, start, end, chunk_size, workers=None, max_attempts=3):
+    """
+    Leases chunks of [start, end) until none is left and observes their blocks in order.
+    Reports are not posted to Discord; the detections end up in the event archive. The live pending schedules and
+    governance tallies are left alone (see BtChainObserver.backfilling).
+    With `workers`, blocks are decoded by a ParallelBlockDecoder with that many processes instead of one at a time;
+    its processes are started once for all the chunks and stopped at the end.
+    Blocks that fail are recorded with the job and, once no chunk is left, observed again by whichever worker gets them,
+    up to `max_attempts` times in all; blocks still failing then are logged and stay in the `range_failures` table.
+
+    Returns:
+    int: The number of blocks observed by this worker.
+    """
+    job = f'backfill:{start}:{end}'
+    observer = network.get_observer()
+    observer.backfilling = True
+    decoder = ParallelBlockDecoder(observer.substrate, workers) if workers is not None else None
+    observed = 0
+    try:
+        while True:
+            chunk = network.leases.claim_range(job, start, end, chunk_size)
+            if chunk is None:
+                break
+            logging.info(f"Backfilling blocks {chunk[0]} to {chunk[1] - 1} of network {network.name}.")
+            if decoder:
+                blocks = decoder.blocks(range(*chunk))
+            else:
+                blocks = ((block_number, None, None) for block_number in range(*chunk))
+            for block_number, block, events in blocks:
+                # A block the decoder failed on is fetched and decoded again by the observer itself.
+                observed += observe(network, observer, job, block_number, (block, events) if block is not None else None)
+            # The chunk's failed blocks are recorded, so the chunk is done either way.
+            network.leases.complete_range(job, chunk[0])
+        while True:
+            block_number = network.leases.claim_failed_block(job, max_attempts)
+            if block_number is None:
+                break
+            logging.info(f"Retrying failed block {block_number} of network {network.name}.")
+            if observe(network, observer, job, block_number):
+                network.leases.resolve_failed_block(job, block_number)
+                observed += 1
+        return observed
+    finally:
+        if decoder:
+            decoder.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Observe a past block range into the event archive.")
+    parser.add_argument('--start', type=int, required=True, help="First block of the range.")
+    parser.add_argument('--end', type=int, required=True, help="Block after the last block of the range.")
+    parser.add_argument('--chunk-size', type=int, default=100, help="Blocks leased to a worker at a time.")
+    parser.add_argument('--network', help="Name of the network in NETWORKS (the first one by default).")
+    parser.add_argument('--workers', type=int, help="Decode blocks in this many processes (0 for one per CPU core).")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Attempts at a failing block before it is given up.")
+    args = parser.parse_args()
+
+    init_sentry()
+    networks = load_networks()
+    network = next((network for network in networks if network.name == args.network), None) if args.network else networks[0]
+    if network is None:
+        parser.error(f"Unknown network {args.network}.")
+    observed = backfill(network, args.start, args.end, args.chunk_size, args.workers, args.max_attempts)
+    logging.info(f"Backfill finished, {observed} blocks observed by this worker.")
+
+
+if __name__ == "__main__":
+    main()
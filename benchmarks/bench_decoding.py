@@ -0,0 +1,126 @@
+# Throughput scaling of the process-pool block decoding (chain_observer/bot/parallel_decoding.py) from 1 to N workers.
+# Usage: python -m benchmarks.bench_decoding [--raw benchmarks/fixtures/busy.raw.json.gz] [--max-workers N] [--output results.json]
+# Raw corpora are recorded from a node with `python -m benchmarks.record_blocks <scenario> <block_number> ... --raw`.
+# Without --raw a synthetic workload is used: blocks of SCALE-encoded (AccountId, Compact<u128>, u16, Vec<u8>) tuples,
+# decoded with the core type registry. It exercises the pool and scalecodec the same way, but its absolute numbers are not
+# those of real subtensor blocks.
+import argparse
+import gzip
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from chain_observer.bot.parallel_decoding import ParallelBlockDecoder, decode_raw_block, fetch_raw_block
+
+SYNTHETIC_TYPE = 'Vec<(AccountId, Compact<u128>, u16, Vec<u8>)>'
+
+_synthetic_runtime = None
+
+
+class RawReplaySubstrate:
+    """
+    Serves the RPC responses of a raw corpus, so that the decoder fetches from memory instead of a node.
+    """
+    def __init__(self, data):
+        self.metadata = data['metadata']
+        self.by_number = {block['block_number']: block for block in data['blocks']}
+        self.by_hash = {block['block_hash']: block for block in data['blocks']}
+        self.runtime_versions = {}
+        for block in data['blocks']:
+            self.runtime_versions[block['block_hash']] = block['runtime_version']
+            self.runtime_versions[block['block']['block']['header']['parentHash']] = block['runtime_version']
+
+    def rpc_request(self, method, params):
+        if method == 'chain_getBlockHash':
+            return {'result': self.by_number[params[0]]['block_hash']}
+        if method == 'chain_getBlock':
+            return {'result': self.by_hash[params[0]]['block']}
+        if method == 'state_getStorage':
+            return {'result': self.by_hash[params[1]]['events']}
+        if method == 'state_getRuntimeVersion':
+            return {'result': self.runtime_versions[params[0]]}
+        if method == 'state_getMetadata':
+            return {'result': self.metadata[str(self.runtime_versions[params[0]]['specVersion'])]}
+        raise ValueError(f"Unknown method {method}")
+
+
+def synthetic_blocks(count, items):
+    from scalecodec.base import RuntimeConfigurationObject
+    from scalecodec.type_registry import load_type_registry_preset
+    runtime_config = RuntimeConfigurationObject(ss58_format=42)
+    runtime_config.update_type_registry(load_type_registry_preset('core'))
+    blocks = {}
+    for block_number in range(count):
+        value = [('0x' + os.urandom(32).hex(), 10 ** 12 + block_number, 7, '0x' + os.urandom(40).hex()) for _ in range(items)]
+        blocks[block_number] = runtime_config.create_scale_object(SYNTHETIC_TYPE).encode(value).to_hex()
+    return blocks
+
+
+def fetch_synthetic_block(blocks, metadata_files, block_number):
+    return {'block_number': block_number, 'block_hash': f'0x{block_number:064x}', 'parent_hash': None, 'data': blocks[block_number]}
+
+
+def decode_synthetic_block(raw_block):
+    global _synthetic_runtime
+    from scalecodec.base import RuntimeConfigurationObject, ScaleBytes
+    from scalecodec.type_registry import load_type_registry_preset
+    if _synthetic_runtime is None:
+        _synthetic_runtime = RuntimeConfigurationObject(ss58_format=42)
+        _synthetic_runtime.update_type_registry(load_type_registry_preset('core'))
+    decoded = _synthetic_runtime.create_scale_object(SYNTHETIC_TYPE, data=ScaleBytes(raw_block['data']))
+    decoded.decode()
+    return raw_block['block_number'], [], decoded.value
+
+
+def measure(substrate, block_numbers, workers, decode, fetch):
+    with ParallelBlockDecoder(substrate, workers=workers, decode=decode, fetch=fetch) as decoder:
+        start = time.perf_counter()
+        decoded = sum(1 for _, block, _ in decoder.blocks(block_numbers) if block is not None)
+        elapsed = time.perf_counter() - start
+    return {"workers": workers, "blocks": decoded, "seconds": round(elapsed, 4), "blocks_per_sec": round(decoded / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the throughput of process-pool block decoding from 1 to N workers.")
+    parser.add_argument('--raw', help="Raw corpus recorded with record_blocks --raw; a synthetic workload is used otherwise.")
+    parser.add_argument('--blocks', type=int, default=400, help="Synthetic blocks to decode.")
+    parser.add_argument('--items', type=int, default=40, help="Encoded tuples per synthetic block.")
+    parser.add_argument('--repeat', type=int, default=1, help="Decode the raw corpus this many times per measurement.")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    if args.raw:
+        with gzip.open(args.raw, 'rt', encoding='utf-8') as f:
+            substrate = RawReplaySubstrate(json.load(f))
+        block_numbers = sorted(substrate.by_number) * args.repeat
+        decode, fetch, workload = decode_raw_block, fetch_raw_block, args.raw
+    else:
+        substrate = synthetic_blocks(args.blocks, args.items)
+        block_numbers = list(range(args.blocks))
+        decode, fetch, workload = decode_synthetic_block, fetch_synthetic_block, "synthetic"
+
+    curve = [measure(substrate, block_numbers, workers, decode, fetch) for workers in range(1, args.max_workers + 1)]
+    baseline = curve[0]["blocks_per_sec"]
+    for point in curve:
+        point["speedup"] = round(point["blocks_per_sec"] / baseline, 2)
+
+    output = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "workload": workload,
+        "curve": curve,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
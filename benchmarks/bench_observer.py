@@ -0,0 +1,239 @@
+# Throughput and latency benchmark of the observer over the block corpus.
+# Usage: python -m benchmarks.bench_observer [--rounds N] [--output results.json] [--compare previous.json]
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+import db_manage.db_manager as db_module
+from db_manage.event_archive import event_archive
+from chain_observer.bot.pending_schedules import pending_schedules
+from chain_observer.bot.finality import finality_tracker
+from chain_observer.bot.stake_flow import stake_flow
+from chain_observer.bot.governance import governance
+from benchmarks.corpus import SCENARIOS, ReplaySubstrate, load_corpus
+from chain_observer.bot.bt_chain_observer import BtChainObserver
+from chain_observer.bot.generate_reports import generate_report, generate_vote_report, generate_dissolved_netword
+
+SCHEMA_VERSION = 1
+STAGES = ['detection', 'enrichment', 'reports', 'end_to_end']
+SOURCE_DB_PATH = 'database/db.sqlite3'
+
+SCHEDULE_SWAP_COLDKEY_FUNC = 'schedule_swap_coldkey'
+SCHEDULE_DISSOLVE_SUBNET_FUNC = 'schedule_dissolve_network'
+VOTE_FUNC = 'vote'
+CALL_MODULE = 'SubtensorModule'
+SWAPPED_EVENT = 'ColdkeySwapped'
+DISSOLVED_EVENT = 'NetworkRemoved'
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of samples.
+    """
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies):
+    """
+    Builds the machine-readable summary of a stage from its per-block latencies (seconds).
+    """
+    total = sum(latencies)
+    return {
+        "blocks": len(latencies),
+        "blocks_per_sec": round(len(latencies) / total, 2) if total else None,
+        "mean_ms": round(total / len(latencies) * 1000, 4) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 4) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 4) if latencies else None,
+    }
+
+
+def detect(observer, block):
+    """
+    Detection stage: finds the watched extrinsics and events of a block and collects their events.
+    """
+    extrinsics, events = block.extrinsics, block.events
+    indices = observer.find_extrinsic_indices(extrinsics, SCHEDULE_SWAP_COLDKEY_FUNC, SCHEDULE_DISSOLVE_SUBNET_FUNC, VOTE_FUNC, CALL_MODULE)
+    swapped = observer.find_swapped_coldeky_and_dissolved_network(events, SWAPPED_EVENT, DISSOLVED_EVENT)
+    collected = {}
+    for idx in indices:
+        if idx >= 0:
+            collected[idx] = observer.collect_extrinsic_events_and_status(events, idx)
+    return indices, swapped, collected
+
+
+def enrichment_keys(observer, block):
+    """
+    Returns the (coldkeys, hotkeys) looked up in the database while enriching the reports of a block.
+    """
+    (swap_idx, dissolve_idx, vote_idx), (swapped_old_coldkey, _, _), collected = detect(observer, block)
+    coldkeys, hotkeys = [], []
+    if swap_idx >= 0:
+        extrinsic_events, extrinsic_success = collected[swap_idx]
+        if extrinsic_success:
+            details = observer.extract_schedule_coldkey_swap_details(extrinsic_events)
+            coldkeys.append(details[0] if details else None)
+        else:
+            coldkeys.append(observer.extract_failed_schedule_swap_coldkey_details(extrinsic_events))
+    if vote_idx >= 0:
+        hotkeys.append(observer.extract_vote_details(block.extrinsics[vote_idx])[0])
+    if swapped_old_coldkey:
+        coldkeys.append(swapped_old_coldkey)
+    return coldkeys, hotkeys
+
+
+def enrich(manager, coldkeys, hotkeys):
+    """
+    Enrichment stage: the DBManager lookups done for the reports of a block.
+    """
+    for coldkey in coldkeys:
+        manager.get_validator_name(coldkey)
+        manager.get_owner_netuid(coldkey)
+    for hotkey in hotkeys:
+        manager.get_validator_name(None, hotkey)
+
+
+def build_reports(observer, block, detection):
+    """
+    Report stage: generates the Discord embeds for the detections of a block.
+    """
+    (swap_idx, dissolve_idx, vote_idx), (swapped_old_coldkey, swapped_new_coldkey, dissolved_network_uid), collected = detection
+    time_stamp = observer.extract_block_timestamp_from_extrinsics(block.extrinsics)
+    reports = []
+    if swap_idx >= 0:
+        details = {"current_block_number": block.block_number, "identifier": "coldkey", "new_coldkey": None, "execution_block": None}
+        reports.append(generate_report("📅 __ NEW SCHEDULE_SWAP_COLDKEY DETECTED __ 📅", collected[swap_idx][1], details, time_stamp))
+    if dissolve_idx >= 0:
+        details = {"current_block_number": block.block_number, "identifier": "coldkey", "owner_coldkey": None, "execution_block": None}
+        reports.append(generate_report("⏳ __SCHEDULE_NETWORK_DISSOLVE DETECTED__ ⏳", collected[dissolve_idx][1], details, time_stamp))
+    if vote_idx >= 0:
+        hotkey, proposal, approve, index = observer.extract_vote_details(block.extrinsics[vote_idx])
+        details = {"current_block_number": block.block_number, "hotkey": hotkey, "proposal": proposal, "index": index, "approve": approve}
+        reports.append(generate_vote_report("🗳️ __ NEW VOTE DETECTED __ 🗳️", collected[vote_idx][1], details, time_stamp))
+    if swapped_old_coldkey:
+        details = {"current_block_number": block.block_number, "old_coldkey": swapped_old_coldkey, "new_coldkey": swapped_new_coldkey}
+        reports.append(generate_report(" __😍 COLDKEY SWAPPED 😍__ ", True, details, time_stamp))
+    if dissolved_network_uid:
+        details = {"current_block_number": block.block_number, "netuid": dissolved_network_uid}
+        reports.append(generate_dissolved_netword("😯 __ NETWORK DESSOLVED __ 😯", details, time_stamp))
+    return reports
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run_scenario(blocks, rounds, work_dir):
+    """
+    Runs every stage over the blocks of a scenario and returns the per-stage summaries.
+    """
+    observer = BtChainObserver(substrate=ReplaySubstrate(blocks))
+    manager = db_module.db_manager
+    latencies = {stage: [] for stage in STAGES}
+    keys = [enrichment_keys(observer, block) for block in blocks]
+    detections = [detect(observer, block) for block in blocks]
+
+    for _ in range(rounds):
+        # Every round starts from the pristine dataset because end-to-end runs apply coldkey swaps.
+        shutil.copyfile(SOURCE_DB_PATH, db_module.DB_PATH)
+        event_archive.tables_created = False
+        pending_schedules.reload()
+        for block, (coldkeys, hotkeys), detection in zip(blocks, keys, detections):
+            latencies['detection'].append(timed(detect, observer, block))
+            latencies['enrichment'].append(timed(enrich, manager, coldkeys, hotkeys))
+            latencies['reports'].append(timed(build_reports, observer, block, detection))
+        for block in blocks:
+            latencies['end_to_end'].append(timed(observer.bt_block_observer, block.block_number))
+
+    return {stage: summarize(samples) for stage, samples in latencies.items()}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, previous_path, threshold):
+    """
+    Logs the blocks/sec change of every stage against a previous result file.
+    Returns the list of (scenario, stage) pairs that regressed by more than `threshold` (a fraction).
+    """
+    with open(previous_path, 'r') as f:
+        previous = json.load(f)
+    regressions = []
+    for scenario, stages in results['results'].items():
+        for stage, summary in stages.items():
+            before = previous.get('results', {}).get(scenario, {}).get(stage, {}).get('blocks_per_sec')
+            after = summary['blocks_per_sec']
+            if not before or not after:
+                continue
+            change = after / before - 1
+            logging.warning(f"{scenario:>10} {stage:>11}: {before:>12.2f} -> {after:>12.2f} blocks/s ({change:+.1%})")
+            if change < -threshold:
+                regressions.append((scenario, stage))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the observer over recorded blocks.")
+    parser.add_argument('--rounds', type=int, default=5, help="Number of passes over every scenario.")
+    parser.add_argument('--scenarios', nargs='+', default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+    parser.add_argument('--compare', help="Previous JSON results to compare against.")
+    parser.add_argument('--threshold', type=float, default=0.10, help="Allowed blocks/sec regression when comparing.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(message)s', force=True)
+    corpus = load_corpus(args.scenarios)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_module.DB_PATH = os.path.join(work_dir, 'db.sqlite3')
+        event_archive.db_path = db_module.DB_PATH
+        pending_schedules.db_path = db_module.DB_PATH
+        finality_tracker.db_path = db_module.DB_PATH
+        stake_flow.db_path = db_module.DB_PATH
+        governance.db_path = db_module.DB_PATH
+        db_module.db_manager.db_path = db_module.DB_PATH
+        # The observer logs every block; keep the log handlers out of the measurements.
+        logging.disable(logging.CRITICAL)
+        try:
+            results = {scenario: run_scenario(blocks, args.rounds, work_dir) for scenario, blocks in corpus.items()}
+        finally:
+            logging.disable(logging.NOTSET)
+
+    output = {
+        "schema_version": SCHEMA_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": args.rounds,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if args.compare and compare(output, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
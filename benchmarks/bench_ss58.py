@@ -0,0 +1,60 @@
+# Benchmark of SS58 encoding for large key sets (e.g. every hotkey of every metagraph).
+# Usage: python -m benchmarks.bench_ss58 [--keys N] [--output results.json]
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from substrateinterface import Keypair
+from substrateinterface.utils.ss58 import ss58_encode as scale_ss58_encode
+from chain_observer.utils import ss58
+
+
+def timed(func, keys):
+    start = time.perf_counter()
+    func(keys)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 4), "keys_per_sec": round(len(keys) / elapsed, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SS58 encoding of large key sets.")
+    parser.add_argument('--keys', type=int, default=13312, help="Number of keys, 52 subnets x 256 uids by default.")
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    public_keys = [os.urandom(32) for _ in range(args.keys)]
+    hex_keys = ['0x' + public_key.hex() for public_key in public_keys]
+
+    results = {
+        "keypair": timed(lambda keys: [Keypair(public_key=key, ss58_format=42).ss58_address for key in keys], public_keys),
+        "scalecodec_ss58_encode": timed(lambda keys: [scale_ss58_encode(key, 42) for key in keys], public_keys),
+    }
+    ss58.ss58_encode.cache_clear()
+    results["codec_batch_encode_cold"] = timed(ss58.batch_encode, public_keys)
+    results["codec_batch_encode_warm"] = timed(ss58.batch_encode, public_keys)
+    ss58.ss58_encode.cache_clear()
+    results["codec_batch_encode_hex_cold"] = timed(ss58.batch_encode, hex_keys)
+    addresses = ss58.batch_encode(public_keys)
+    ss58.ss58_decode.cache_clear()
+    results["codec_batch_decode_cold"] = timed(ss58.batch_decode, addresses)
+    results["codec_batch_decode_warm"] = timed(ss58.batch_decode, addresses)
+
+    output = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "keys": args.keys,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Block corpus used by the benchmark suite.
+# Each scenario file holds the `.value` payloads of the extrinsics and events of a block, shaped the way
+# substrate-interface returns them, so they can be replayed without a node.
+# The fixtures shipped in benchmarks/fixtures are synthetic: their signatures are fabricated and their block numbers and
+# timestamps are made up. They exercise the detectors, not real chain data; record real blocks with benchmarks.record_blocks.
+import gzip
+import json
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+SCENARIOS = ['quiet', 'swaps', 'dissolves', 'votes', 'busy']
+
+
+class RecordedObject:
+    """
+    Stand-in for GenericExtrinsic / GenericEvent: exposes the recorded payload through `.value`.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+
+class RecordedBlock:
+    def __init__(self, data):
+        self.block_number = data['block_number']
+        self.block_hash = data['block_hash']
+        self.parent_hash = data.get('parent_hash')
+        self.extrinsics = [RecordedObject(extrinsic) for extrinsic in data['extrinsics']]
+        self.events = [RecordedObject(event) for event in data['events']]
+
+
+class ReplaySubstrate:
+    """
+    Minimal SubstrateInterface replacement serving recorded blocks by number and hash.
+    """
+    def __init__(self, blocks):
+        self.by_number = {block.block_number: block for block in blocks}
+        self.by_hash = {block.block_hash: block for block in blocks}
+        self.head = max(self.by_number) if self.by_number else None
+
+    def get_block_hash(self, block_id=None):
+        return self.by_number[block_id].block_hash
+
+    def get_block_number(self, block_hash=None):
+        if block_hash is None:
+            return self.head
+        return self.by_hash[block_hash].block_number
+
+    def get_block(self, block_hash=None, block_number=None):
+        block = self.by_hash[block_hash] if block_hash else self.by_number[block_number]
+        return {
+            'header': {'number': block.block_number, 'hash': block.block_hash, 'parentHash': block.parent_hash},
+            'extrinsics': block.extrinsics,
+        }
+
+    def get_events(self, block_hash=None):
+        return self.by_hash[block_hash].events
+
+
+def load_scenario(name, fixtures_dir=FIXTURES_DIR):
+    """
+    Loads the blocks of a scenario from `<fixtures_dir>/<name>.json.gz`.
+    """
+    path = os.path.join(fixtures_dir, f'{name}.json.gz')
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    return [RecordedBlock(block) for block in data['blocks']]
+
+
+def load_corpus(scenarios=None, fixtures_dir=FIXTURES_DIR):
+    return {name: load_scenario(name, fixtures_dir) for name in (scenarios or SCENARIOS)}
@@ -0,0 +1,102 @@
+# Cold-start import-time benchmark based on `python -X importtime`.
+# Usage: python -m benchmarks.import_time [--runs N] [--output results.json]
+# Exits with status 1 when a module exceeds its budget or pulls in a lazily loaded dependency.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budget (ms) of the startup modules.
+IMPORT_BUDGETS_MS = {
+    'main': 250,
+    'run': 400,
+    'chain_observer.utils.refresh_coordinator': 10,
+    'db_manage.db_manager': 50,
+    'chain_observer.bot.bt_chain_observer': 100,
+}
+
+# Heavy dependencies that must only be loaded when they are actually used.
+LAZY_DEPENDENCIES = ['bittensor', 'substrateinterface', 'websockets', 'sentry_sdk']
+ALLOWED_LAZY_DEPENDENCIES = {
+    'main': ['sentry_sdk'],
+}
+
+
+def parse_importtime(stderr):
+    """
+    Parses `-X importtime` output into {module: cumulative_us}.
+    """
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative_us)
+    return timings
+
+
+def measure(module, runs):
+    """
+    Imports `module` in fresh interpreters and returns (best cumulative ms, set of imported modules).
+    """
+    best_us, imported = None, set()
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+            cwd=REPO_ROOT, capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        timings = parse_importtime(result.stderr)
+        imported = set(timings)
+        cumulative_us = timings.get(module)
+        if cumulative_us is not None and (best_us is None or cumulative_us < best_us):
+            best_us = cumulative_us
+    return (best_us / 1000 if best_us is not None else None), imported
+
+
+def check_module(module, runs):
+    import_ms, imported = measure(module, runs)
+    allowed = ALLOWED_LAZY_DEPENDENCIES.get(module, [])
+    eager = [dep for dep in LAZY_DEPENDENCIES if dep in imported and dep not in allowed]
+    budget_ms = IMPORT_BUDGETS_MS.get(module)
+    return {
+        "import_ms": round(import_ms, 2) if import_ms is not None else None,
+        "budget_ms": budget_ms,
+        "eager_dependencies": eager,
+        "ok": not eager and (budget_ms is None or import_ms is None or import_ms <= budget_ms),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the startup modules.")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per module; the best run is kept.")
+    parser.add_argument('--modules', nargs='+', default=list(IMPORT_BUDGETS_MS))
+    parser.add_argument('--output', help="Write the JSON results to this file instead of stdout.")
+    args = parser.parse_args()
+
+    results = {module: check_module(module, args.runs) for module in args.modules}
+    output = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "runs": args.runs,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+    if not all(result['ok'] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
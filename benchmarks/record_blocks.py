@@ -0,0 +1,86 @@
+# Records blocks from a subtensor node into the benchmark corpus.
+# Usage: python -m benchmarks.record_blocks <scenario> <block_number> [<block_number> ...] [--raw]
+# With --raw the undecoded RPC responses and runtime metadata are recorded instead, for benchmarks.bench_decoding.
+import argparse
+import gzip
+import json
+import logging
+import os
+from dotenv import load_dotenv
+from substrateinterface.base import SubstrateInterface
+from benchmarks.corpus import FIXTURES_DIR
+from chain_observer.bot.parallel_decoding import EVENTS_STORAGE_KEY, ZERO_HASH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def record_block(substrate, block_number):
+    """
+    Fetches a block with its events and returns the serialisable payload stored in the corpus.
+    """
+    block_hash = substrate.get_block_hash(block_id=block_number)
+    block = substrate.get_block(block_hash=block_hash)
+    events = substrate.get_events(block_hash=block_hash)
+    return {
+        'block_number': block_number,
+        'block_hash': block_hash,
+        'parent_hash': block['header'].get('parentHash'),
+        'extrinsics': [extrinsic.value for extrinsic in block['extrinsics']],
+        'events': [event.value for event in events],
+    }
+
+
+def record_raw_block(substrate, block_number, metadata):
+    """
+    Fetches the undecoded RPC responses of a block, adding the metadata of its runtime to `metadata` (by spec version).
+    """
+    block_hash = substrate.rpc_request('chain_getBlockHash', [block_number])['result']
+    block = substrate.rpc_request('chain_getBlock', [block_hash])['result']
+    parent_hash = block['block']['header']['parentHash']
+    runtime_hash = block_hash if parent_hash == ZERO_HASH else parent_hash
+    runtime_version = substrate.rpc_request('state_getRuntimeVersion', [runtime_hash])['result']
+    spec_version = str(runtime_version['specVersion'])
+    if spec_version not in metadata:
+        metadata[spec_version] = substrate.rpc_request('state_getMetadata', [runtime_hash])['result']
+    return {
+        'block_number': block_number,
+        'block_hash': block_hash,
+        'block': block,
+        'events': substrate.rpc_request('state_getStorage', [EVENTS_STORAGE_KEY, block_hash])['result'],
+        'runtime_version': runtime_version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record blocks into the benchmark corpus.")
+    parser.add_argument('scenario', help="Scenario name, e.g. quiet, swaps, dissolves, votes or busy.")
+    parser.add_argument('block_numbers', nargs='+', type=int)
+    parser.add_argument('--endpoint', default=os.getenv('SUBTENSOR_ENDPOINT'))
+    parser.add_argument('--fixtures-dir', default=FIXTURES_DIR)
+    parser.add_argument('--raw', action='store_true', help="Record undecoded blocks into <scenario>.raw.json.gz.")
+    args = parser.parse_args()
+
+    substrate = SubstrateInterface(url=args.endpoint, ss58_format=42, use_remote_preset=True)
+    blocks = []
+    metadata = {}
+    for block_number in args.block_numbers:
+        logging.info(f"Recording block {block_number}")
+        if args.raw:
+            blocks.append(record_raw_block(substrate, block_number, metadata))
+        else:
+            blocks.append(record_block(substrate, block_number))
+
+    os.makedirs(args.fixtures_dir, exist_ok=True)
+    path = os.path.join(args.fixtures_dir, f'{args.scenario}.raw.json.gz' if args.raw else f'{args.scenario}.json.gz')
+    data = {'scenario': args.scenario, 'blocks': blocks}
+    if args.raw:
+        data['metadata'] = metadata
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(data, f, default=str)
+    logging.info(f"Recorded {len(blocks)} blocks into {path}")
+
+
+if __name__ == '__main__':
+    main()
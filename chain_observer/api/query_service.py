@@ -0,0 +1,236 @@
+import bisect
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from chain_observer.bot.pending_schedules import COLDKEY_SWAP
+from db_manage.db_manager import DB_PATH
+from db_manage.event_archive import EventArchive, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_POOL_SIZE = 4
+# Seconds a client is asked to wait before retrying while the database does not exist yet.
+UNAVAILABLE_RETRY_AFTER_SECONDS = 30
+
+
+class DatabaseUnavailable(Exception):
+    """
+    Raised while the observer has not created the database yet; served as 503 Service Unavailable.
+    """
+
+
+class ReadOnlyConnectionPool:
+    """
+    Fixed-size pool of read-only SQLite connections shared by the request threads.
+    The observer switches the database to WAL mode (see BlockUnitOfWork), where readers see the last commit
+    without taking the locks its commits wait for, so consumers do not compete with the observer's writes.
+    """
+    def __init__(self, db_path=DB_PATH, size=DEFAULT_POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.created = 0
+        self.lock = threading.Lock()
+        self.pool = queue.LifoQueue()
+
+    def open_connection(self):
+        """
+        Opens a read-only connection. Raises DatabaseUnavailable while the database file does not exist, since a read-only
+        connection cannot create it; connections are opened on demand, so the pool works as soon as the observer created it.
+        """
+        path = os.path.abspath(self.db_path)
+        if not os.path.exists(path):
+            raise DatabaseUnavailable(f"Database {path} does not exist yet.")
+        try:
+            return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        except sqlite3.OperationalError as e:
+            raise DatabaseUnavailable(f"Database {path} cannot be opened: {e}")
+
+    @contextmanager
+    def connection(self):
+        conn = None
+        with self.lock:
+            if self.pool.empty() and self.created < self.size:
+                conn = self.open_connection()
+                self.created += 1
+        if conn is None:
+            conn = self.pool.get()
+        try:
+            yield conn
+        finally:
+            self.pool.put(conn)
+
+
+class DatasetSnapshot:
+    """
+    In-memory copy of the validators and owners tables, reloaded only when the database changes.
+    Changes are detected with `PRAGMA data_version` on a connection of its own: in WAL mode commits go to the
+    -wal file, so the main file's mtime and size do not follow them.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.lock = threading.Lock()
+        self.conn = None
+        self.data_version = None
+        self.tables = {'validators': ([], []), 'owners': ([], [])}
+        self.versions = {'validators': None, 'owners': None}
+
+    def refresh(self):
+        """
+        Reloads the tables if another connection committed to the database since the last load.
+        """
+        with self.lock:
+            try:
+                if self.conn is None:
+                    self.conn = self.pool.open_connection()
+                data_version = self.conn.execute('PRAGMA data_version').fetchone()[0]
+            except sqlite3.Error as e:
+                logging.error(f"Database error checking the dataset snapshot : {e}")
+                return
+            if data_version == self.data_version:
+                return
+            for table in self.tables:
+                rows = self.load_table(self.conn, table)
+                self.tables[table] = ([row['id'] for row in rows], rows)
+                self.versions[table] = hashlib.sha1(json.dumps(rows, sort_keys=True).encode()).hexdigest()[:16]
+            self.data_version = data_version
+
+    def load_table(self, conn, table):
+        try:
+            cursor = conn.execute(f'SELECT * FROM {table} ORDER BY id')
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading {table} snapshot : {e}")
+            return []
+
+    def page(self, table, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Returns (rows, next_cursor, version) of a table page, keyset-paginated by id.
+        """
+        self.refresh()
+        ids, rows = self.tables[table]
+        start = bisect.bisect_right(ids, after_id) if after_id is not None else 0
+        page = rows[start:start + limit]
+        next_cursor = page[-1]['id'] if len(page) == limit and start + limit < len(rows) else None
+        return page, next_cursor, self.versions[table]
+
+
+class QueryService:
+    """
+    Read-only queries over the observed events and the validator and owner datasets.
+    Every query returns (etag, build_body); the body is only built when the client's copy is stale.
+    """
+    def __init__(self, db_path=DB_PATH, pool_size=DEFAULT_POOL_SIZE):
+        self.pool = ReadOnlyConnectionPool(db_path, pool_size)
+        self.snapshot = DatasetSnapshot(self.pool)
+        self.archive = EventArchive(db_path)
+
+    def etag(self, *parts):
+        digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def has_archive(self, conn):
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'event_archive'").fetchone() is not None
+
+    def last_block_number(self, conn):
+        try:
+            result = conn.execute('SELECT current_block_number FROM block_number_table LIMIT 1').fetchone()
+            return int(result[0]) if result else None
+        except sqlite3.Error:
+            return None
+
+    def events(self, limit=DEFAULT_PAGE_SIZE, **filters):
+        """
+        Recent archived events matching the filters of EventArchive.query_events, newest first.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        with self.pool.connection() as conn:
+            has_archive = self.has_archive(conn)
+            last_event_id = self.archive.last_event_id(conn) if has_archive else 0
+            last_retraction_id = self.archive.last_retraction_id(conn) if has_archive else 0
+
+        def build_body():
+            if not last_event_id:
+                return {"events": [], "next_cursor": None}
+            with self.pool.connection() as conn:
+                events, next_cursor = self.archive.query_events(limit=limit, conn=conn, **filters)
+            return {"events": events, "next_cursor": next_cursor}
+
+        return self.etag('events', last_event_id, last_retraction_id, limit, filters), build_body
+
+    def pending_swaps(self):
+        """
+        Scheduled coldkey swaps not executed yet, from the observer's pending schedule registry.
+        """
+        with self.pool.connection() as conn:
+            current_block_number = self.last_block_number(conn)
+            try:
+                rows = conn.execute('''
+                SELECT key, new_coldkey, scheduled_block, execution_block FROM pending_schedules
+                WHERE status = 'pending' AND kind = ? ORDER BY execution_block
+                ''', (COLDKEY_SWAP,)).fetchall()
+            except sqlite3.OperationalError:
+                rows = []
+        swaps = [{"coldkey": key, "new_coldkey": new_coldkey, "block_number": scheduled_block, "execution_block": execution_block}
+                 for key, new_coldkey, scheduled_block, execution_block in rows]
+        body = {"current_block_number": current_block_number, "pending_swaps": swaps}
+        return self.etag('pending_swaps', current_block_number, swaps), lambda: body
+
+    def table(self, table, after_id=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        A keyset-paginated page of the validators or owners snapshot.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        rows, next_cursor, version = self.snapshot.page(table, after_id, limit)
+        return self.etag(table, version, after_id, limit), lambda: {table: rows, "next_cursor": next_cursor}
+
+
+def create_app(db_path=DB_PATH, pool_size=DEFAULT_POOL_SIZE):
+    """
+    Builds the FastAPI application serving the QueryService as JSON with ETag / If-None-Match support.
+    """
+    from fastapi import FastAPI, Request, Response
+    from fastapi.responses import JSONResponse
+
+    service = QueryService(db_path, pool_size)
+    app = FastAPI(title="Bittensor Chain Observer query API")
+
+    @app.exception_handler(DatabaseUnavailable)
+    def database_unavailable(request: Request, error: DatabaseUnavailable):
+        return JSONResponse({"detail": "The observer has not created its database yet."}, status_code=503,
+                            headers={"Retry-After": str(UNAVAILABLE_RETRY_AFTER_SECONDS)})
+
+    def respond(request, etag, build_body):
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in [tag.strip() for tag in request.headers.get('if-none-match', '').split(',')]:
+            return Response(status_code=304, headers=headers)
+        return JSONResponse(build_body(), headers=headers)
+
+    @app.get('/events')
+    def events(request: Request, event_type: str = None, coldkey: str = None, hotkey: str = None, netuid: int = None,
+               proposal: str = None, from_block: int = None, to_block: int = None, before_id: int = None,
+               limit: int = DEFAULT_PAGE_SIZE):
+        filters = {key: value for key, value in dict(
+            event_type=event_type, coldkey=coldkey, hotkey=hotkey, netuid=netuid, proposal=proposal,
+            from_block=from_block, to_block=to_block, before_id=before_id).items() if value is not None}
+        return respond(request, *service.events(limit=limit, **filters))
+
+    @app.get('/swaps/pending')
+    def pending_swaps(request: Request):
+        return respond(request, *service.pending_swaps())
+
+    @app.get('/validators')
+    def validators(request: Request, after_id: int = None, limit: int = DEFAULT_PAGE_SIZE):
+        return respond(request, *service.table('validators', after_id, limit))
+
+    @app.get('/owners')
+    def owners(request: Request, after_id: int = None, limit: int = DEFAULT_PAGE_SIZE):
+        return respond(request, *service.table('owners', after_id, limit))
+
+    app.state.query_service = service
+    return app
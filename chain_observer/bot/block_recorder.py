@@ -0,0 +1,255 @@
+import glob
+import json
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import time
+import zlib
+from dotenv import load_dotenv
+from chain_observer.bot.parallel_decoding import MetadataFiles, fetch_raw_block, decode_raw_block
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Directory the observed blocks are recorded into, for offline replay with replay.py; empty to disable.
+RECORD_DIR = os.getenv('RECORD_DIR', '')
+# Blocks per segment file; every segment starts with a copy of the database, so it can be replayed on its own.
+RECORD_SEGMENT_BLOCKS = int(os.getenv('RECORD_SEGMENT_BLOCKS', '7200'))
+
+# A frame is its block number (u64) and payload length (u32), then the zlib-compressed JSON payload.
+FRAME_HEADER = struct.Struct('<QI')
+SEGMENT_SUFFIX = '.seg'
+BASE_SUFFIX = '.base.sqlite3'
+METADATA_SUFFIX = '-metadata'
+# Kinds of the reports returned by BtChainObserver.observe_block, in order.
+REPORT_KINDS = ['schedule_swap_coldkey', 'schedule_dissolve_network', 'vote', 'NetworkRemoved', 'ColdkeySwapped']
+
+
+def normalize(value):
+    """
+    Returns `value` as it reads back from a frame: JSON types only, values JSON cannot hold as strings.
+    """
+    return json.loads(json.dumps(value, default=str))
+
+
+def block_reports(results, extra_reports, tally_reports):
+    """
+    Returns the reports of one observe_block call as [kind, report] pairs: its own reports, the extra reports by channel,
+    then the tally reports by proposal hash.
+    """
+    reports = [[kind, report] for kind, report in zip(REPORT_KINDS, results) if report]
+    reports.extend([channel, report] for report, channel in extra_reports)
+    reports.extend([f'tally:{proposal_hash}', report] for proposal_hash, report in sorted(tally_reports.items()))
+    return normalize(reports)
+
+
+class RecordedObject:
+    """
+    Stand-in for GenericExtrinsic / GenericEvent and query results: exposes the recorded payload through `.value`.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+
+def metadata_directory(directory, network):
+    """
+    Returns the directory holding the runtime metadata of the recorded blocks of a network, one file per spec version.
+    """
+    return os.path.join(directory, f'{network}{METADATA_SUFFIX}')
+
+
+class BlockRecorder:
+    """
+    Appends the blocks observed by a network to segment files: per block, its raw SCALE extrinsics and events storage
+    with the spec version of the runtime they are decoded with, the storage queries made while processing it, and the
+    reports it produced. Each segment is named after the network and its first block, and comes with a copy of the
+    database taken before that block. The runtime metadata is written once per spec version next to the segments,
+    so a replay decodes the blocks again with the current decoder.
+    Without a chain client (or if the raw payloads cannot be fetched), the decoded payloads are recorded instead.
+    """
+
+    def __init__(self, directory, network, db_path, segment_blocks=None, substrate=None, fetch=fetch_raw_block):
+        self.directory = directory
+        self.network = network
+        self.db_path = db_path
+        self.segment_blocks = segment_blocks or RECORD_SEGMENT_BLOCKS
+        self.substrate = substrate
+        self.fetch = fetch
+        self.metadata_files = MetadataFiles(substrate)
+        self.metadata_files.directory = metadata_directory(directory, network)
+        self.file = None
+        self.blocks = 0
+        self.queries = {}
+
+    def path(self, first_block):
+        return os.path.join(self.directory, f'{self.network}-{first_block:010d}{SEGMENT_SUFFIX}')
+
+    def start_block(self, block_number):
+        """
+        Called before a block is processed: opens a new segment, with its copy of the database, when the current one is full.
+        """
+        self.queries = {}
+        if self.file is not None and self.blocks < self.segment_blocks:
+            return
+        self.close()
+        os.makedirs(self.metadata_files.directory, exist_ok=True)
+        path = self.path(block_number)
+        source = sqlite3.connect(self.db_path)
+        target = sqlite3.connect(path[:-len(SEGMENT_SUFFIX)] + BASE_SUFFIX)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        self.file = open(path, 'ab')
+        self.blocks = 0
+        logging.info(f"Recording blocks into {path}")
+
+    def record_query(self, module, storage_function, params, value):
+        self.queries[query_key(module, storage_function, params)] = value
+
+    def raw_payloads(self, block_number):
+        """
+        Returns the raw extrinsics and events storage of a block with its spec version, or None if they cannot be fetched.
+        """
+        if self.substrate is None:
+            return None
+        try:
+            raw_block = self.fetch(self.substrate, self.metadata_files, block_number)
+        except Exception as e:
+            logging.warning(f"Failed to fetch the raw payloads of block {block_number}, recording the decoded ones: {e}")
+            return None
+        return {key: raw_block[key] for key in ('extrinsics', 'events', 'spec_version')}
+
+    def record(self, block_number, block_hash, parent_hash, extrinsics, events, reports):
+        """
+        Appends the frame of a processed block to the current segment.
+        """
+        payload = {
+            'block_number': block_number,
+            'block_hash': block_hash,
+            'parent_hash': parent_hash,
+            'queries': self.queries,
+            'reports': reports,
+        }
+        raw = self.raw_payloads(block_number)
+        if raw is not None:
+            payload['raw'] = raw
+        else:
+            payload['extrinsics'] = [extrinsic.value for extrinsic in extrinsics]
+            payload['events'] = [event.value for event in events]
+        data = zlib.compress(json.dumps(payload, default=str).encode('utf-8'))
+        self.file.write(FRAME_HEADER.pack(block_number, len(data)) + data)
+        self.file.flush()
+        self.blocks += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def query_key(module, storage_function, params):
+    return json.dumps([module, storage_function, params], default=str)
+
+
+def read_segment(path):
+    """
+    Yields the frames of a segment file as dicts, reading it through a memory map. A frame cut short by a crash ends it.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            offset = 0
+            while offset + FRAME_HEADER.size <= len(data):
+                block_number, length = FRAME_HEADER.unpack_from(data, offset)
+                start = offset + FRAME_HEADER.size
+                if start + length > len(data):
+                    logging.warning(f"{path} ends with a partial frame of block {block_number}, ignored.")
+                    return
+                yield json.loads(zlib.decompress(data[start:start + length]))
+                offset = start + length
+
+
+def list_segments(directory, network=None):
+    """
+    Returns the segment files of a directory (of one network when given), oldest first.
+    """
+    pattern = f'{network}-*{SEGMENT_SUFFIX}' if network else f'*{SEGMENT_SUFFIX}'
+    return sorted(glob.glob(os.path.join(directory, pattern)))
+
+
+class ReplayChain:
+    """
+    Chain client replacement for replays: serves the storage queries recorded with the block being replayed.
+    """
+
+    def __init__(self):
+        self.frame = {'queries': {}}
+
+    def query(self, module, storage_function, params=None):
+        return RecordedObject(self.frame['queries'].get(query_key(module, storage_function, params)))
+
+
+def frame_payloads(frame, metadata_dir, decode=decode_raw_block):
+    """
+    Returns the extrinsic and event values of a frame, decoding its raw payloads with the metadata of its spec version.
+    """
+    if 'raw' not in frame:
+        return frame['extrinsics'], frame['events']
+    raw = frame['raw']
+    raw_block = dict(raw, block_number=frame['block_number'],
+                     metadata_path=os.path.join(metadata_dir, f"metadata_{raw['spec_version']}.hex"))
+    _, extrinsics, events = decode(raw_block)
+    return extrinsics, events
+
+
+def replay_segment(path, db_path=None, on_mismatch=None, decode=decode_raw_block):
+    """
+    Feeds the blocks of a segment to a BtChainObserver at full speed, starting from a scratch copy of the segment's
+    database (or of `db_path`), and compares the reports of every block with the recorded ones.
+    Raw frames are decoded again with `decode`, so a decoder fix or a newly watched call shows up in the replay.
+    `on_mismatch(block_number, recorded, replayed)` is called for every block whose reports differ.
+
+    Returns:
+    dict: blocks, reports, mismatches (block numbers) and seconds.
+    """
+    from chain_observer.bot.bt_chain_observer import BtChainObserver
+    from chain_observer.bot.networks import Network
+    base = db_path or path[:-len(SEGMENT_SUFFIX)] + BASE_SUFFIX
+    network = os.path.basename(path).rsplit('-', 1)[0]
+    metadata_dir = metadata_directory(os.path.dirname(path), network)
+    stats = {'blocks': 0, 'reports': 0, 'mismatches': [], 'seconds': 0.0}
+    with tempfile.TemporaryDirectory() as work_dir:
+        scratch = os.path.join(work_dir, 'db.sqlite3')
+        shutil.copyfile(base, scratch)
+        chain = ReplayChain()
+        observer = BtChainObserver(substrate=chain, network=Network('replay', [], scratch, {}))
+        observer.block_recorder = None
+        start = time.perf_counter()
+        for frame in read_segment(path):
+            chain.frame = frame
+            extrinsics, events = frame_payloads(frame, metadata_dir, decode)
+            header = {'number': frame['block_number'], 'hash': frame['block_hash'], 'parentHash': frame['parent_hash']}
+            block = {'header': header, 'extrinsics': [RecordedObject(value) for value in extrinsics]}
+            events = [RecordedObject(value) for value in events]
+            observer.tally_updates = {}
+            results = observer.observe_block(frame['block_number'], block_data=(block, events))
+            reports = block_reports(results, observer.extra_reports, observer.tally_updates)
+            stats['blocks'] += 1
+            stats['reports'] += len(reports)
+            if reports != frame['reports']:
+                stats['mismatches'].append(frame['block_number'])
+                if on_mismatch:
+                    on_mismatch(frame['block_number'], frame['reports'], reports)
+        stats['seconds'] = time.perf_counter() - start
+    return stats
@@ -1,12 +1,22 @@
 import pytz
 from datetime import datetime
-from substrateinterface.base import SubstrateInterface
-import bittensor as bt
 from dotenv import load_dotenv
 import os
 import logging
 from db_manage.db_manager import db_manager
-from chain_observer.bot.generate_reports import generate_report, generate_vote_report, generate_dissolved_netword
+from db_manage.event_archive import event_archive
+from db_manage.unit_of_work import BlockUnitOfWork
+from chain_observer.bot.generate_reports import generate_report, generate_vote_report, generate_dissolved_netword, generate_pending_schedule_report, generate_finality_report, generate_watchlist_report, generate_rule_report, generate_stake_flow_report, generate_governance_report
+from chain_observer.bot.pending_schedules import pending_schedules, COLDKEY_SWAP, DISSOLVE_NETWORK
+from chain_observer.bot.finality import finality_tracker, FINALITY_MODE
+from chain_observer.bot.lazy_decoding import LazyBlockLoader, LAZY_DECODING
+from chain_observer.bot.watchlist import watchlist, WATCHLIST
+from chain_observer.bot.rules import rule_set, ARCHIVE_ONLY, extrinsic_outcomes
+from chain_observer.bot.stake_flow import stake_flow, STAKE_FLOW, RAO_PER_TAO
+from chain_observer.bot.governance import governance, GOVERNANCE_TALLY, OPEN
+from chain_observer.bot.block_recorder import BlockRecorder, RECORD_DIR, block_reports
+from chain_observer.utils.profiling import profile_if_slow, BLOCK_LATENCY_BUDGET_MS
+from chain_observer.utils.chain_client import ChainClient, get_endpoints
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -16,37 +26,90 @@ class BtChainObserver:
     """
     Observe bittensor blockchain extrisics and events for schedule_swap_coldkey, schedule_dissolve_network, vote, coldkey_swapped and network_dissolved.
     """
-    def __init__(self):
-        
-        self.substrate = self.setup_substrate_interface()
+    def __init__(self, substrate=None, network=None):
+        """
+        `network` (chain_observer.bot.networks.Network) supplies the endpoints and the per-network database managers;
+        without it the observer uses SUBTENSOR_ENDPOINT(S) and the module-level managers.
+        """
+        self.network = network
+        self.db_manager = network.db_manager if network else db_manager
+        self.event_archive = network.event_archive if network else event_archive
+        self.pending_schedules = network.pending_schedules if network else pending_schedules
+        self.finality_tracker = network.finality_tracker if network else finality_tracker
+        self.stake_flow = network.stake_flow if network else stake_flow
+        self.governance = network.governance if network else governance
+        self.watchlist = watchlist
+        self.rule_set = rule_set
+        self.substrate = substrate or self.setup_substrate_interface()
+        self.detected_events = []
+        self.extra_reports = []
+        # Latest tally report of each proposal changed since the last head block, by proposal hash; edited in place by run_bot.
+        self.tally_updates = {}
+        self.current_block_number = None
+        self.current_block_hash = None
+        self.current_parent_hash = None
+        self.lazy_loader = None
+        # Writes of the head block being processed, committed together once it is done (see bt_block_observer).
+        self.unit_of_work = None
+        # Set by backfill.py: past blocks only go to the archive and the dataset, and leave the live pending schedules
+        # and governance tallies alone.
+        self.backfilling = False
+        # With RECORD_DIR, every processed block is recorded for offline replay (see replay.py).
+        self.block_recorder = BlockRecorder(RECORD_DIR, network.name if network else 'default', self.db_manager.db_path,
+                                            substrate=self.substrate) if RECORD_DIR else None
 
     def setup_substrate_interface(self):
         """
-        Initializes and returns a SubstrateInterface object configured to connect to a specified WebSocket URL.
-        This interface will be used to interact with the blockchain.
+        Initializes and returns the chain client used to interact with the blockchain.
+        It spreads requests over the endpoints of SUBTENSOR_ENDPOINTS (or the single SUBTENSOR_ENDPOINT),
+        with hedged requests and automatic failover.
         """
         try:
-            SUBTENSOR_ENDPOINT = os.getenv('SUBTENSOR_ENDPOINT')
-            if not SUBTENSOR_ENDPOINT:
+            endpoints = self.network.endpoints if self.network else get_endpoints()
+            if not endpoints:
                 logging.error("SUBTENSOR_ENDPOINT is not set in environment variables.")
                 return None
-            return SubstrateInterface(
-                url=SUBTENSOR_ENDPOINT,
-                ss58_format=42,
-                use_remote_preset=True,
-            )
+            return ChainClient(endpoints)
+        except Exception as e:
+            logging.exception("Failed to initialize the chain client. Please check the WebSocket URLs and network connection.")
+            return None
+
+    def get_current_block_number(self):
+        """
+        Returns the number of the current chain head using the existing substrate connection.
+        """
+        return self.substrate.get_block_number(None)
+
+    def load_lazy_block(self, block_hash, events):
+        """
+        Returns the block without decoded extrinsics when neither its events nor its raw extrinsics show anything watched,
+        otherwise None so that the block is fully decoded.
+        """
+        try:
+            if self.lazy_loader is None:
+                self.lazy_loader = LazyBlockLoader(self.substrate)
+            # Calls declared in the rule file must be decoded too.
+            self.lazy_loader.watch(self.rule_set.refresh().calls)
+            return self.lazy_loader.load(block_hash, events)
         except Exception as e:
-            logging.exception("Failed to initialize SubstrateInterface. Please check the WebSocket URL and network connection.")
+            logging.warning(f"Lazy decoding failed for block {block_hash}, decoding it fully: {e}")
             return None
 
     def get_block_data(self, block_number):
         """
         Retrieves block data and associated events from the blockchain for a given block number.
+        Events are fetched first; with LAZY_DECODING the extrinsics are only decoded when a watched call or event may be in the block.
+        Recorded blocks are always fully decoded, so that replays see every extrinsic.
         """
         try:
             block_hash = self.substrate.get_block_hash(block_id=block_number)
-            block = self.substrate.get_block(block_hash=block_hash)
             events = self.substrate.get_events(block_hash=block_hash)
+            block = self.load_lazy_block(block_hash, events) if LAZY_DECODING and not self.block_recorder else None
+            if block is None:
+                block = self.substrate.get_block(block_hash=block_hash)
+            header = block.get('header') or {}
+            self.current_block_hash = header.get('hash', block_hash)
+            self.current_parent_hash = header.get('parentHash')
             return block, events
         except Exception as e:
             logging.exception(f"Failed to retrieve block data for block number {block_number}. Please verify the block number and network status.")
@@ -222,6 +285,23 @@ class BtChainObserver:
         except Exception as e:
             logging.exception("Error extracting failed schedule coldkey swap details.")
 
+    def write(self, writer, *args):
+        """
+        Runs a database write of the block being processed: queued in the block's unit of work when there is one,
+        otherwise committed right away.
+        """
+        if self.unit_of_work is not None:
+            self.unit_of_work.add(writer, *args)
+        else:
+            writer(*args)
+
+    def archive_event(self, event_type, **fields):
+        """
+        Collects a detected event of the current block for the event archive.
+        The fields hold the raw values (coldkeys, netuid, ...) before they are decorated for the report.
+        """
+        self.detected_events.append(dict(fields, event_type=event_type, block_hash=self.current_block_hash))
+
     def process_schedule_swap_coldkey(self, extrinsics, events, schedule_swap_coldkey_idx, current_block_number):
         """
         Processes scheduled coldkey swap extrinsics and generates a report.
@@ -240,7 +320,11 @@ class BtChainObserver:
         old_coldkey, new_coldkey, execution_block = self.extract_schedule_coldkey_swap_details(extrinsic_events) if extrinsic_success else (None, None, None)
         if extrinsic_success == False:
             old_coldkey = self.extract_failed_schedule_swap_coldkey_details(extrinsic_events)
-        validator_name, validator_hotkey, check_validator = db_manager.get_validator_name(old_coldkey)
+        self.archive_event('schedule_swap_coldkey', extrinsic_idx=schedule_swap_coldkey_idx, success=extrinsic_success,
+                           coldkey=old_coldkey, new_coldkey=new_coldkey, execution_block=execution_block)
+        if extrinsic_success and not self.backfilling:
+            self.pending_schedules.add(COLDKEY_SWAP, old_coldkey, new_coldkey, current_block_number, execution_block, write=self.write)
+        validator_name, validator_hotkey, check_validator = self.db_manager.get_validator_name(old_coldkey, block_number=current_block_number)
         link = f"https://taostats.io/validators/{validator_hotkey}"
         original_coldkey = old_coldkey
         if check_validator:
@@ -248,7 +332,7 @@ class BtChainObserver:
                 old_coldkey = old_coldkey + f"\n(Validator : [{validator_name}]({link}))"
             else: 
                 old_coldkey = old_coldkey + f"\n(Validator : [no name]({link}))"
-        netuid = db_manager.get_owner_netuid(original_coldkey)
+        netuid = self.db_manager.get_owner_netuid(original_coldkey, current_block_number)
         if netuid:
             link = f"https://taostats.io/subnets/{netuid}/metagraph"
             old_coldkey = f"{old_coldkey}\n([subnet{netuid} owner]({link}))"
@@ -278,6 +362,10 @@ class BtChainObserver:
         time_stamp = self.extract_block_timestamp_from_extrinsics(extrinsics)
         extrinsic_events, extrinsic_success = self.collect_extrinsic_events_and_status(events, schedule_dissolve_network_idx)
         netuid, owner_coldkey, execution_block = self.extract_schedule_network_dissolve_details(extrinsic_events) if extrinsic_success else (None, None, None)
+        self.archive_event('schedule_dissolve_network', extrinsic_idx=schedule_dissolve_network_idx, success=extrinsic_success,
+                           coldkey=owner_coldkey, netuid=netuid, execution_block=execution_block)
+        if extrinsic_success and not self.backfilling:
+            self.pending_schedules.add(DISSOLVE_NETWORK, netuid, owner_coldkey, current_block_number, execution_block, write=self.write)
         link = f"https://taostats.io/subnets/{netuid}/metagraph"
         netuid = f"[{netuid}]({link})"
 
@@ -293,6 +381,7 @@ class BtChainObserver:
     def process_vote(self, extrinsics, events, vote_idx, current_block_number):
         """
         Processes vote extrinsics and generates a report.
+        With GOVERNANCE_TALLY the vote is only archived: it shows in its proposal's tally (see `process_governance`).
 
         Parameters:
         - extrinsics (list): List of extrinsics.
@@ -306,7 +395,11 @@ class BtChainObserver:
         time_stamp = self.extract_block_timestamp_from_extrinsics(extrinsics)
         extrinsic_events, extrinsic_success = self.collect_extrinsic_events_and_status(events, vote_idx)
         hotkey, proposal, approve, index = self.extract_vote_details(extrinsics[vote_idx])
-        validator_name, validator_coldkey, check_validator = db_manager.get_validator_name(None, hotkey)
+        validator_name, validator_coldkey, check_validator = self.db_manager.get_validator_name(None, hotkey, current_block_number)
+        self.archive_event('vote', extrinsic_idx=vote_idx, success=extrinsic_success, hotkey=hotkey,
+                           coldkey=validator_coldkey, proposal=proposal, index=index, approve=approve)
+        if GOVERNANCE_TALLY:
+            return None
         link = f"https://taostats.io/validators/{hotkey}"
         if check_validator:
             if validator_name:
@@ -337,18 +430,20 @@ class BtChainObserver:
         - str: The generated report.
         """
         time_stamp = self.extract_block_timestamp_from_extrinsics(extrinsics)
-        validator_name, validator_hotkey, check_validator = db_manager.get_validator_name(swapped_old_coldkey)
+        validator_name, validator_hotkey, check_validator = self.db_manager.get_validator_name(swapped_old_coldkey, block_number=current_block_number)
+        self.archive_event('ColdkeySwapped', success=True, coldkey=swapped_old_coldkey, new_coldkey=swapped_new_coldkey,
+                           hotkey=validator_hotkey)
         link = f"https://taostats.io/validators/{validator_hotkey}"
         original_coldkey = swapped_old_coldkey
         if check_validator:  
-            db_manager.update_validator_coldkey(swapped_old_coldkey, swapped_new_coldkey)
+            self.write(self.db_manager.update_validator_coldkey, swapped_old_coldkey, swapped_new_coldkey, current_block_number)
             if validator_name:
                 swapped_old_coldkey = swapped_old_coldkey + f"\n(Validator : [{validator_name}]({link}))"
             else: 
                 swapped_old_coldkey = swapped_old_coldkey + f"\n(Validator : [no name]({link}))" 
-        netuid = db_manager.get_owner_netuid(original_coldkey)
+        netuid = self.db_manager.get_owner_netuid(original_coldkey, current_block_number)
         if netuid:
-            db_manager.update_owner_coldkey(netuid, swapped_new_coldkey)
+            self.write(self.db_manager.update_owner_coldkey, netuid, swapped_new_coldkey, current_block_number)
             link = f"https://taostats.io/subnets/{netuid}/metagraph"
             swapped_old_coldkey = f"{swapped_old_coldkey}\n([subnet{netuid} owner]({link}))"       
         details = {
@@ -356,6 +451,9 @@ class BtChainObserver:
             "old_coldkey": swapped_old_coldkey,
             "new_coldkey": swapped_new_coldkey,
         }
+        schedule = None if self.backfilling else self.pending_schedules.resolve(COLDKEY_SWAP, original_coldkey, current_block_number, write=self.write)
+        if schedule:
+            details["scheduled_block"] = schedule.scheduled_block
         swapped_coldkey_report = generate_report(" __😍 COLDKEY SWAPPED 😍__ ", True, details, time_stamp)   
         return swapped_coldkey_report     
     
@@ -372,24 +470,342 @@ class BtChainObserver:
         - tuple: The generated report and a flag indicating if the owner table should be updated.
         """
         time_stamp = self.extract_block_timestamp_from_extrinsics(extrinsics)
+        self.archive_event('NetworkRemoved', success=True, netuid=dissolved_network_uid)
         details = {
             "current_block_number": current_block_number,
             "netuid": dissolved_network_uid,
         }
+        schedule = None if self.backfilling else self.pending_schedules.resolve(DISSOLVE_NETWORK, dissolved_network_uid, current_block_number, write=self.write)
+        if schedule:
+            details["scheduled_block"] = schedule.scheduled_block
         dissloved_subnet_resport = generate_dissolved_netword("😯 __ NETWORK DESSOLVED __ 😯", details, time_stamp)
         should_update_owner_table = True     
         return dissloved_subnet_resport, should_update_owner_table   
     
-    def bt_block_observer(self):
+    def process_pending_schedules(self, current_block_number):
         """
-        Observes the current block for scheduled coldkey swaps and network dissolves, generating reports for each.
+        Generates "executes in N blocks" reminders and overdue warnings for the scheduled swaps and dissolves due at this block.
+
+        Returns:
+        - list: (report, channel) tuples, channel being 'coldkey_swap' or 'dissolve_network'.
         """
+        if self.backfilling:
+            return []
+        reports = []
+        for notice, schedule, blocks_left in self.pending_schedules.advance(current_block_number, write=self.write):
+            if schedule.kind == COLDKEY_SWAP:
+                subject = {"old_coldkey": schedule.key, "new_coldkey": schedule.new_coldkey}
+                name = "COLDKEY SWAP"
+            else:
+                link = f"https://taostats.io/subnets/{schedule.key}/metagraph"
+                subject = {"netuid": f"[{schedule.key}]({link})", "owner_coldkey": schedule.new_coldkey}
+                name = "NETWORK DISSOLVE"
+            details = {"current_block_number": current_block_number, **subject,
+                       "scheduled_block": schedule.scheduled_block, "execution_block": schedule.execution_block}
+            if notice == 'reminder':
+                title = f"⏰ __ SCHEDULED {name} EXECUTES IN {blocks_left} BLOCKS __ ⏰"
+                color = 3447003
+            else:
+                title = f"⚠️ __ SCHEDULED {name} OVERDUE __ ⚠️"
+                details["blocks_overdue"] = -blocks_left
+                color = 16711680
+            reports.append((generate_pending_schedule_report(title, details, color), schedule.kind))
+        return reports
+
+    def process_watchlist(self, events, current_block_number):
+        """
+        Archives every address attribute of the block's events that is on the watchlist, and returns one report for the block.
+        """
+        if not self.watchlist.refresh():
+            return []
+        matches = self.watchlist.match_events(events)
+        if not matches:
+            return []
+        for match in matches:
+            self.archive_event('watchlist_match', **match)
+        return [(generate_watchlist_report(current_block_number, matches), WATCHLIST)]
+
+    def process_stake_flow(self, events, current_block_number):
+        """
+        Feeds the block's StakeAdded / StakeRemoved events to the rolling stake flow aggregates and reports the alerts they raise.
+        """
+        reports = []
+        for alert in self.stake_flow.process_block(current_block_number, events, self.current_block_hash, write=self.write):
+            hotkey = alert['key'] if alert['scope'] == 'hotkey' else None
+            netuid = alert['key'] if alert['scope'] == 'netuid' else None
+            self.archive_event('stake_flow_alert', hotkey=hotkey, netuid=netuid, kind=alert['kind'], window=alert['window'], flow=alert['flow'])
+            direction = "INFLOW" if alert['flow'] > 0 else "OUTFLOW"
+            details = {"current_block_number": current_block_number}
+            if hotkey:
+                details["hotkey"] = hotkey
+                validator_name = self.db_manager.get_validator_name(None, hotkey, current_block_number)[0]
+                if validator_name:
+                    details["validator"] = validator_name
+            else:
+                details["netuid"] = netuid
+            details[f"net stake flow ({alert['window']})"] = f"{alert['flow'] / RAO_PER_TAO:,.2f} TAO"
+            if alert['kind'] == 'threshold':
+                details["threshold"] = f"{alert['threshold'] / RAO_PER_TAO:,.2f} TAO"
+                title = f"💰 __ LARGE STAKE {direction} ({alert['window'].upper()}) __ 💰"
+            else:
+                details["hourly average of the day"] = f"{alert['baseline'] / RAO_PER_TAO:,.2f} TAO"
+                title = f"📈 __ STAKE {direction} ACCELERATING __ 📈"
+            reports.append((generate_stake_flow_report(title, details, 3066993 if alert['flow'] > 0 else 15105570), STAKE_FLOW))
+        return reports
+
+    def lookup_proposal(self, proposal_hash):
+        """
+        Reads the votes of an open proposal from the collective's Voting storage, for proposals made before the observer started.
+        """
+        result = self.substrate.query(self.governance.pallet, 'Voting', [proposal_hash])
+        value = getattr(result, 'value', result)
+        if self.block_recorder:
+            self.block_recorder.record_query(self.governance.pallet, 'Voting', [proposal_hash], value)
+        return value
+
+    def process_governance(self, extrinsics, events, current_block_number):
+        """
+        Updates the tally of every proposal voted on or closed in the block, from its successful `vote` extrinsics and the
+        collective's events, and keeps the proposal's tally report in `tally_updates`.
+        """
+        if not GOVERNANCE_TALLY or self.backfilling:
+            return
+        pallet = self.governance.pallet
+        if not any((getattr(event, 'value', None) or {}).get('module_id') == pallet for event in events):
+            return
+        outcomes = extrinsic_outcomes(events)
+        votes = []
+        for idx, extrinsic in enumerate(extrinsics):
+            call = (getattr(extrinsic, 'value', None) or {}).get('call') or {}
+            if call.get('call_module') == 'SubtensorModule' and call.get('call_function') == 'vote' and outcomes.get(idx):
+                votes.append(self.extract_vote_details(extrinsic))
+        for tally in self.governance.process_block(current_block_number, votes, events, self.lookup_proposal, write=self.write):
+            if tally.status != OPEN:
+                self.archive_event('proposal_closed', proposal=tally.proposal_hash, index=tally.proposal_index,
+                                   status=tally.status, ayes=tally.ayes, nays=tally.nays)
+            self.tally_updates[tally.proposal_hash] = self.generate_tally_report(tally, current_block_number)
+
+    def generate_tally_report(self, tally, current_block_number):
+        """
+        Generates the tally report of a proposal, naming the validator of every voting hotkey.
+        """
+        index = tally.proposal_index if tally.proposal_index is not None else '?'
+        details = {
+            "proposal": tally.proposal_hash,
+            "index": index,
+            "status": tally.status.upper(),
+            "ayes": f"{tally.ayes} / {tally.threshold}" if tally.threshold is not None else tally.ayes,
+            "nays": tally.nays,
+        }
+        if tally.status == OPEN and tally.needed is not None:
+            details["ayes still needed"] = tally.needed
+        details["last update block"] = current_block_number
+        voters = []
+        for hotkey, approve in tally.voters.items():
+            validator_name = self.db_manager.get_validator_name(None, hotkey, current_block_number)[0]
+            voters.append(f"{'✅' if approve else '❌'} {validator_name or 'no name'} ({hotkey})")
+        if tally.status == OPEN:
+            color = 3447003
+        else:
+            color = 65280 if tally.status in ('approved', 'executed') else 16711680
+        return generate_governance_report(f"🗳️ __ PROPOSAL {index} TALLY __ 🗳️", details, voters, color)
+
+    def process_rules(self, extrinsics, events, current_block_number):
+        """
+        Evaluates the rules of the rule file on the block, archives their matches with the rule's enrichment,
+        and returns one report per matched rule for its sink.
+        """
+        matches_by_rule = {}
+        for rule, match in self.rule_set.refresh().match_block(extrinsics, events):
+            match['enrichment'] = rule.enrich(match['attributes'], self.db_manager, current_block_number)
+            self.archive_event(f'rule:{rule.name}', extrinsic_idx=match['extrinsic_idx'], source=match['source'],
+                               attributes=match['attributes'], enrichment=match['enrichment'])
+            matches_by_rule.setdefault(rule, []).append(match)
+        return [(generate_rule_report(rule.title, rule.color, current_block_number, matches), rule.sink)
+                for rule, matches in matches_by_rule.items() if rule.sink != ARCHIVE_ONLY]
+
+    def canonical_block_hash(self, block_number):
+        """
+        Returns the hash of `block_number` on the node's current best chain.
+        """
+        return self.substrate.get_block_hash(block_id=block_number)
+
+    def block_channel(self, detections):
+        """
+        Discord channel of the finality report of a block: dissolve detections go to the dissolve channel.
+        """
+        if detections and all(event_type in ('schedule_dissolve_network', 'NetworkRemoved') for event_type in detections):
+            return DISSOLVE_NETWORK
+        return COLDKEY_SWAP
+
+    def process_reorg(self, current_block_number):
+        """
+        Checks the parent hash of the block just observed against the block window (a string comparison).
+        On a reorg, sends a correction for every orphaned block that had alerts, reverts what the orphaned blocks wrote
+        and observes the canonical blocks again.
+
+        Returns:
+        - list: (report, channel) tuples of the corrections and of the re-observed canonical blocks.
+        """
+        orphaned = self.finality_tracker.check_parent(current_block_number, self.current_parent_hash, self.canonical_block_hash)
+        if not orphaned:
+            return []
+        reports = []
+        for block in orphaned:
+            if block.detections:
+                detections = block.detections.split(',')
+                details = {"block_number": block.block_number, "orphaned_block_hash": block.block_hash,
+                           "retracted_alerts": ', '.join(detections), "detected_at_block": current_block_number}
+                reports.append((generate_finality_report("❌ __ BLOCK REORGANISED OUT, ALERTS RETRACTED __ ❌", details, 16711680),
+                                self.block_channel(detections)))
+        self.revert_blocks(orphaned)
+        reports.extend(self.reobserve_blocks([block.block_number for block in orphaned]))
+        return reports
+
+    def revert_blocks(self, orphaned):
+        """
+        Undoes what the orphaned blocks wrote, newest first, before their canonical versions are observed: the coldkey
+        swaps they applied to the dataset, their archived events (retracted), the schedules they added or resolved,
+        and their stake flow. The writes go to the transaction of the block being processed.
+        """
+        for block in reversed(orphaned):
+            for event in reversed(self.event_archive.block_events(block.block_number, block.block_hash)):
+                if event['event_type'] == 'ColdkeySwapped' and event.get('new_coldkey'):
+                    self.write(self.db_manager.revert_coldkey_swap, event['coldkey'], event['new_coldkey'], block.block_number)
+            self.write(self.event_archive.retract_block, block.block_number, block.block_hash)
+            self.pending_schedules.revert_block(block.block_number, write=self.write)
+            self.stake_flow.revert_block(block.block_number, block.block_hash, write=self.write)
+        logging.warning(f"Reverted the writes of orphaned blocks {[block.block_number for block in orphaned]}.")
+
+    def reobserve_blocks(self, block_numbers):
+        """
+        Observes the canonical versions of reorganised blocks and returns all their reports as (report, channel) tuples.
+        The state of the block being processed is kept aside meanwhile.
+        """
+        saved = self.detected_events, self.extra_reports, self.current_block_number, self.current_block_hash, self.current_parent_hash
+        reports = []
+        try:
+            for block_number in block_numbers:
+                results = self.observe_block(block_number)
+                channels = [COLDKEY_SWAP, DISSOLVE_NETWORK, COLDKEY_SWAP, DISSOLVE_NETWORK, COLDKEY_SWAP]
+                reports.extend((report, channel) for report, channel in zip(results[:5], channels) if report)
+                reports.extend(self.extra_reports)
+                self.finality_tracker.record(block_number, self.current_block_hash, self.current_parent_hash,
+                                             [event['event_type'] for event in self.detected_events], write=self.write)
+        except Exception as e:
+            logging.exception(f"Failed to observe the canonical blocks {block_numbers} after a reorg.")
+        self.detected_events, self.extra_reports, self.current_block_number, self.current_block_hash, self.current_parent_hash = saved
+        return reports
+
+    def process_finality(self):
+        """
+        Confirms the alerted blocks that are now finalized. Only asks the node for its finalized head while some alerted block is unconfirmed.
+
+        Returns:
+        - list: (report, channel) tuples of the confirmations and corrections.
+        """
+        if not any(block.detections and not block.finalized for block in self.finality_tracker.window.values()):
+            return []
+        try:
+            finalized_hash = self.substrate.get_chain_finalised_head()
+            finalized_number = self.substrate.get_block_number(finalized_hash)
+        except Exception as e:
+            logging.exception("Failed to retrieve the finalized head.")
+            return []
+        confirmed, orphaned = self.finality_tracker.finalize(finalized_number, finalized_hash, self.canonical_block_hash, write=self.write)
+        reports = []
+        for block in confirmed:
+            if block.detections:
+                detections = block.detections.split(',')
+                details = {"block_number": block.block_number, "block_hash": block.block_hash,
+                           "confirmed_alerts": ', '.join(detections), "finalized_head": finalized_number}
+                reports.append((generate_finality_report("✅ __ BLOCK FINALIZED, ALERTS CONFIRMED __ ✅", details, 65280),
+                                self.block_channel(detections)))
+        for block in orphaned:
+            if block.detections:
+                detections = block.detections.split(',')
+                details = {"block_number": block.block_number, "orphaned_block_hash": block.block_hash,
+                           "retracted_alerts": ', '.join(detections), "finalized_head": finalized_number}
+                reports.append((generate_finality_report("❌ __ BLOCK NOT FINALIZED, ALERTS RETRACTED __ ❌", details, 16711680),
+                                self.block_channel(detections)))
+        if orphaned:
+            self.revert_blocks(orphaned)
+            reports.extend(self.reobserve_blocks([block.block_number for block in orphaned]))
+        return reports
+
+    def record_block(self, block, events, results, tallies_before):
+        """
+        Records the block just processed, with the reports it produced, into the current segment of the block recorder.
+        A recording failure is logged and does not stop the observer.
+        """
+        try:
+            tally_reports = {proposal_hash: report for proposal_hash, report in self.tally_updates.items()
+                             if tallies_before.get(proposal_hash) is not report}
+            self.block_recorder.record(self.current_block_number, self.current_block_hash, self.current_parent_hash,
+                                       block['extrinsics'], events, block_reports(results, self.extra_reports, tally_reports))
+        except Exception as e:
+            logging.exception(f"Failed to record block {self.current_block_number}: {e}")
+
+    def bt_block_observer(self, current_block_number=None, on_processed=None):
+        """
+        Observes the current block (or the given block number) for scheduled coldkey swaps and network dissolves, generating reports for each.
+        With FINALITY_MODE, alerts are still sent on the best block, and confirmations or corrections follow in `extra_reports`.
+        Blocks slower than the profiling budget are profiled when PROFILING_ENABLED is set.
+        Everything the block writes is committed together once it is processed; `on_processed(results)` is called just
+        before, so that the writes it queues with `write` (e.g. the block's reports, see run.queue_reports) are part of it.
+        If processing fails, or the network's leader lease was lost meanwhile, none of them is written and the components
+        reload their state from the last commit.
+        """
+        with profile_if_slow('block', BLOCK_LATENCY_BUDGET_MS) as profile:
+            if current_block_number is None:
+                current_block_number = self.get_current_block_number()
+            profile.label = current_block_number
+            self.tally_updates = {}
+            self.unit_of_work = BlockUnitOfWork(self.db_manager.db_path, current_block_number)
+            for component in (self.pending_schedules, self.stake_flow, self.governance, self.finality_tracker):
+                self.unit_of_work.on_rollback(component.reload)
+            try:
+                if self.network is not None and self.network.leader_token is not None:
+                    # Fencing: the block commits only if this instance still holds the leader lease it started under.
+                    self.unit_of_work.add(self.network.check_leader)
+                self.unit_of_work.add(self.db_manager.verify_update_block_number, current_block_number)
+                results = self.observe_block(current_block_number)
+                if FINALITY_MODE:
+                    self.extra_reports.extend(self.process_reorg(current_block_number))
+                    self.finality_tracker.record(current_block_number, self.current_block_hash, self.current_parent_hash,
+                                                 [event['event_type'] for event in self.detected_events], write=self.write)
+                    self.extra_reports.extend(self.process_finality())
+                if on_processed is not None:
+                    on_processed(results)
+                self.unit_of_work.commit()
+            except Exception:
+                self.unit_of_work.rollback()
+                raise
+            finally:
+                self.unit_of_work = None
+            return results
+
+    def observe_block(self, current_block_number, block_data=None):
+        """
+        Processes a single block and returns its reports.
+        `block_data` is the (block, events) pair when the block was already decoded, e.g. by ParallelBlockDecoder during a backfill.
+        """
+        self.detected_events = []
+        self.extra_reports = []
+        self.current_block_number = current_block_number
         
-        current_block_number = bt.subtensor().get_current_block()
-        
-        db_manager.verify_update_block_number(current_block_number)
-        
-        block, events = self.get_block_data(current_block_number)
+        if block_data is None:
+            block, events = self.get_block_data(current_block_number)
+        else:
+            block, events = block_data
+            self.current_block_hash = block['header'].get('hash')
+            self.current_parent_hash = block['header'].get('parentHash')
+        if self.block_recorder:
+            try:
+                self.block_recorder.start_block(current_block_number)
+            except Exception as e:
+                logging.exception(f"Failed to open a recording segment at block {current_block_number}: {e}")
+        tallies_before = dict(self.tally_updates)
         schedule_swap_coldkey_report, schedule_dissolve_subnet_report, vote_report, dissloved_subnet_resport, swapped_coldkey_report = None, None, None, None, None
         should_update_owner_table = False
         
@@ -425,4 +841,26 @@ class BtChainObserver:
         if dissolved_network_uid:
             dissloved_subnet_resport, should_update_owner_table = self.process_dissolved_network(block['extrinsics'], current_block_number, dissolved_network_uid)
 
+        # Reminders and overdue warnings for scheduled swaps and dissolves, after this block's executions are resolved
+        self.extra_reports.extend(self.process_pending_schedules(current_block_number))
+
+        # Any event mentioning a watched coldkey or hotkey
+        self.extra_reports.extend(self.process_watchlist(events, current_block_number))
+
+        # Large or accelerating stake flows per hotkey and subnet
+        self.extra_reports.extend(self.process_stake_flow(events, current_block_number))
+
+        # Live tallies of the proposals voted on in this block
+        self.process_governance(block['extrinsics'], events, current_block_number)
+
+        # Alerts declared in the rule file
+        self.extra_reports.extend(self.process_rules(block['extrinsics'], events, current_block_number))
+
+        # Archive everything detected in this block in one transaction
+        self.write(self.event_archive.record_block_events, current_block_number, self.detected_events)
+
+        if self.block_recorder:
+            self.record_block(block, events, (schedule_swap_coldkey_report, schedule_dissolve_subnet_report, vote_report,
+                                              dissloved_subnet_resport, swapped_coldkey_report), tallies_before)
+
         return schedule_swap_coldkey_report, schedule_dissolve_subnet_report, vote_report, dissloved_subnet_resport, swapped_coldkey_report, should_update_owner_table
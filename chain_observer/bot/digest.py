@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+from db_manage.unit_of_work import write_now
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Hold back the non-critical reports and send hourly and daily digests of everything detected instead.
+DIGEST_MODE = os.getenv('DIGEST_MODE', 'false').lower() in ('1', 'true', 'yes')
+# Digest periods to send, among hourly and daily.
+DIGEST_PERIODS = [name.strip() for name in os.getenv('DIGEST_PERIODS', 'hourly,daily').split(',') if name.strip()]
+# Report kinds still posted as they happen in digest mode: detected event types, or the channel of the other reports
+# (coldkey_swap and dissolve_network carry the reminders, overdue warnings and finality corrections).
+DIGEST_IMMEDIATE = [kind.strip() for kind in os.getenv(
+    'DIGEST_IMMEDIATE', 'schedule_swap_coldkey,schedule_dissolve_network,ColdkeySwapped,NetworkRemoved,coldkey_swap,dissolve_network'
+).split(',') if kind.strip()]
+# Coldkeys and subnets listed in a digest.
+DIGEST_TOP = int(os.getenv('DIGEST_TOP', '5'))
+# Discord channel of the digests (DIGEST_DISCORD_WEBHOOK_URL).
+DIGEST = 'digest'
+
+PERIOD_SECONDS = {'hourly': 3600, 'daily': 86400}
+
+
+class DigestPeriod:
+    """
+    Running summary of one period: detected events by type, the coldkeys and subnets involved, and the reports held back.
+    """
+
+    def __init__(self, name, start, first_block=None, last_block=None, counts=None, coldkeys=None, netuids=None, held=None):
+        self.name = name
+        self.start = start
+        self.first_block = first_block
+        self.last_block = last_block
+        self.counts = Counter(counts or {})
+        self.coldkeys = Counter(coldkeys or {})
+        self.netuids = Counter(netuids or {})
+        self.held = Counter(held or {})
+
+    @property
+    def end(self):
+        return self.start + PERIOD_SECONDS[self.name]
+
+    def empty(self):
+        return not self.counts and not self.held
+
+    def add(self, block_number, events, held):
+        if self.first_block is None:
+            self.first_block = block_number
+        self.last_block = block_number
+        for event in events:
+            self.counts[event['event_type']] += 1
+            if event.get('coldkey'):
+                self.coldkeys[event['coldkey']] += 1
+            if event.get('netuid') is not None:
+                self.netuids[str(event['netuid'])] += 1
+        self.held.update(held)
+
+    def to_json(self):
+        return json.dumps({'start': self.start, 'first_block': self.first_block, 'last_block': self.last_block, 'counts': self.counts,
+                           'coldkeys': self.coldkeys, 'netuids': self.netuids, 'held': self.held})
+
+    @classmethod
+    def from_json(cls, name, data):
+        data = json.loads(data)
+        return cls(name, data['start'], data['first_block'], data['last_block'], data['counts'], data['coldkeys'], data['netuids'], data['held'])
+
+
+class DigestBuilder:
+    """
+    Hourly and daily digests built as the blocks are observed: each block adds its detected events to the running
+    summary of every period, so closing a period never reads the archive again. Periods follow UTC hours and days,
+    and the running summaries are saved after every block that changes them, so a restart keeps them.
+    """
+
+    def __init__(self, db_path=DB_PATH, periods=None, immediate=None, top=None):
+        self.db_path = db_path
+        self.periods = [name for name in (periods or DIGEST_PERIODS) if name in PERIOD_SECONDS]
+        self.immediate = set(DIGEST_IMMEDIATE if immediate is None else immediate)
+        self.top = top or DIGEST_TOP
+        self.current = {}
+        self.loaded = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS digest_periods (
+            name TEXT PRIMARY KEY,
+            state TEXT NOT NULL
+        )
+        ''')
+        return conn
+
+    def load(self):
+        """
+        Loads the running summaries once.
+        """
+        if self.loaded:
+            return
+        try:
+            conn = self.connect()
+            rows = conn.execute('SELECT name, state FROM digest_periods').fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading digests : {e}")
+            rows = []
+        self.current = {name: DigestPeriod.from_json(name, state) for name, state in rows if name in self.periods}
+        self.loaded = True
+
+    def reload(self):
+        """
+        Drops the running summaries so that the next block reloads them from the database.
+        """
+        self.current = {}
+        self.loaded = False
+
+    def is_immediate(self, kind):
+        return kind in self.immediate
+
+    def add_block(self, block_number, events, held, now=None, write=None):
+        """
+        Adds a block's detected events and the kinds of the reports held back (e.g. {'watchlist': 1}) to the running periods.
+        `write` (see BtChainObserver.write) queues the saved periods into the block's unit of work; by default they are committed right away.
+
+        Returns:
+        list: The periods that ended before this block and have something to report.
+        """
+        self.load()
+        now = time.time() if now is None else now
+        finished = []
+        changed = []
+        for name in self.periods:
+            start = int(now) // PERIOD_SECONDS[name] * PERIOD_SECONDS[name]
+            period = self.current.get(name)
+            if period is None or period.start != start:
+                if period is not None and not period.empty():
+                    finished.append(period)
+                period = self.current[name] = DigestPeriod(name, start)
+                changed.append(period)
+            period.add(block_number, events, held)
+            # Blocks without anything to count only move the block range, which is not worth a write.
+            if (events or held) and period not in changed:
+                changed.append(period)
+        if changed:
+            (write or write_now)(self.save, changed)
+        return finished
+
+    def save(self, periods, conn=None):
+        if not periods:
+            return
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            conn.executemany('INSERT OR REPLACE INTO digest_periods (name, state) VALUES (?, ?)',
+                             [(period.name, period.to_json()) for period in periods])
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error saving digests : {e}")
+
+    def details(self, period, pending):
+        """
+        Returns the report fields of a finished period. `pending` are the schedules still waiting for execution.
+        """
+        start = datetime.fromtimestamp(period.start, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+        end = datetime.fromtimestamp(period.end, tz=timezone.utc).strftime('%Y-%m-%d %H:%M')
+        details = {"period": f"{start} - {end} UTC"}
+        if period.first_block is not None:
+            details["blocks"] = f"{period.first_block} - {period.last_block}"
+        details["events"] = '\n'.join(f"{event_type}: {count}" for event_type, count in period.counts.most_common()) or "none"
+        if period.coldkeys:
+            details["top coldkeys"] = '\n'.join(f"{coldkey}: {count}" for coldkey, count in period.coldkeys.most_common(self.top))
+        if period.netuids:
+            details["top subnets"] = '\n'.join(f"{netuid}: {count}" for netuid, count in period.netuids.most_common(self.top))
+        if period.held:
+            details["reports held back"] = '\n'.join(f"{kind}: {count}" for kind, count in period.held.most_common())
+        pending = sorted(pending, key=lambda schedule: schedule.execution_block)
+        details["pending schedules"] = '\n'.join(
+            [f"{len(pending)} pending"] +
+            [f"{schedule.kind} {schedule.key} at block {schedule.execution_block}" for schedule in pending[:self.top]])
+        return details
+
+
+digest = DigestBuilder()
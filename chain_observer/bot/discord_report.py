@@ -1,15 +1,58 @@
 # bot.py
 # This script sends embed messages to a Discord channel using a webhook.
 # It defines a function to format the embed data and make a POST request.
+import logging
+import threading
+from urllib.parse import urlsplit, urlunsplit
 import requests
 import json
 
+# One HTTP session (and connection pool) shared by every observed network.
+session = None
+session_lock = threading.Lock()
+
+def get_session():
+    global session
+    with session_lock:
+        if session is None:
+            session = requests.Session()
+            session.mount('https://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return session
+
 def post_to_discord(embed, webhook_url):
     if embed == None:
         return
     data = {
         "embeds": [embed]
     }
-    response = requests.post(webhook_url, data=json.dumps(data), headers={"Content-Type": "application/json"})
+    response = get_session().post(webhook_url, data=json.dumps(data), headers={"Content-Type": "application/json"})
     return response.status_code, response.text
 
+def message_url(webhook_url, message_id):
+    """Returns the URL of a message sent by a webhook, keeping the webhook's query (e.g. thread_id)."""
+    parts = urlsplit(webhook_url)
+    return urlunsplit(parts._replace(path=f"{parts.path.rstrip('/')}/messages/{message_id}"))
+
+def post_or_edit_discord(embed, webhook_url, message_id=None):
+    """
+    Replaces the embed of the webhook message `message_id`, or posts a new message when there is none or it was deleted.
+    Returns the id of the message showing the embed, or None when Discord did not accept it.
+    """
+    if embed == None or not webhook_url:
+        return message_id
+    data = json.dumps({"embeds": [embed]})
+    headers = {"Content-Type": "application/json"}
+    if message_id:
+        response = get_session().patch(message_url(webhook_url, message_id), data=data, headers=headers)
+        if response.status_code < 300:
+            return message_id
+        if response.status_code != 404:
+            logging.error(f"Failed to edit Discord message {message_id}: {response.status_code} {response.text}")
+            return None
+        logging.info(f"Message {message_id} is gone, posting a new one.")
+    # wait=true makes Discord return the created message and its id.
+    response = get_session().post(webhook_url, params={"wait": "true"}, data=data, headers=headers)
+    if response.status_code >= 300:
+        logging.error(f"Failed to post to Discord: {response.status_code} {response.text}")
+        return None
+    return response.json().get("id")
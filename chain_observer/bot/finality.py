@@ -0,0 +1,161 @@
+import logging
+import os
+import sqlite3
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+from db_manage.unit_of_work import write_now
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Alert on best blocks, then confirm or correct them once they finalize.
+FINALITY_MODE = os.getenv('FINALITY_MODE', 'false').lower() in ('1', 'true', 'yes')
+# Number of recent blocks whose hashes are kept to detect reorganisations.
+FINALITY_WINDOW_BLOCKS = int(os.getenv('FINALITY_WINDOW_BLOCKS', '64'))
+
+
+class WindowBlock:
+    def __init__(self, block_number, block_hash, parent_hash, detections=None, finalized=False):
+        self.block_number = block_number
+        self.block_hash = block_hash
+        self.parent_hash = parent_hash
+        self.detections = detections or ''
+        self.finalized = bool(finalized)
+
+
+class FinalityTracker:
+    """
+    Keeps the hashes of the last FINALITY_WINDOW_BLOCKS observed best blocks.
+    Every new block is checked against its parent's stored hash, which is a single string comparison.
+    Canonical hashes are only fetched from the node once that check fails, or when the parent height was not observed.
+    """
+
+    def __init__(self, db_path=DB_PATH, window_blocks=None):
+        self.db_path = db_path
+        self.window_blocks = FINALITY_WINDOW_BLOCKS if window_blocks is None else window_blocks
+        self.window = None
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS block_window (
+            block_number INTEGER PRIMARY KEY,
+            block_hash TEXT NOT NULL,
+            parent_hash TEXT,
+            detections TEXT,
+            finalized INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        return conn
+
+    def load(self):
+        if self.window is not None:
+            return
+        self.window = {}
+        try:
+            conn = self.connect()
+            for row in conn.execute('SELECT block_number, block_hash, parent_hash, detections, finalized FROM block_window'):
+                self.window[row[0]] = WindowBlock(*row)
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading block window : {e}")
+
+    def reload(self):
+        """
+        Drops the in-memory window so that the next block reloads it from the database.
+        """
+        self.window = None
+
+    def save(self, blocks, removed_numbers=(), conn=None):
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            if removed_numbers:
+                conn.executemany('DELETE FROM block_window WHERE block_number = ?', [(number,) for number in removed_numbers])
+            conn.executemany('''
+            INSERT OR REPLACE INTO block_window (block_number, block_hash, parent_hash, detections, finalized)
+            VALUES (?, ?, ?, ?, ?)
+            ''', [(block.block_number, block.block_hash, block.parent_hash, block.detections, int(block.finalized)) for block in blocks])
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error saving block window : {e}")
+
+    def find_orphaned(self, block_number, canonical_hash):
+        """
+        Walks back from `block_number` and returns the window blocks whose stored hash is no longer canonical,
+        oldest first. `canonical_hash(n)` returns the hash of block n on the current best chain.
+        """
+        orphaned = []
+        number = block_number
+        while number in self.window and not self.window[number].finalized:
+            stored = self.window[number]
+            if stored.block_hash == canonical_hash(number):
+                break
+            orphaned.append(stored)
+            number -= 1
+        return list(reversed(orphaned))
+
+    def check_parent(self, block_number, parent_hash, canonical_hash):
+        """
+        Checks a new best block against the stored hash of its parent. When the parent height was not observed
+        (blocks skipped between two ticks), the newest observed block below it is checked against the node instead.
+
+        Returns:
+        list: The orphaned window blocks (oldest first), empty when the chain is continuous.
+        """
+        self.load()
+        parent = self.window.get(block_number - 1)
+        if parent is None:
+            earlier = [number for number in self.window if number < block_number - 1]
+            if not earlier:
+                return []
+            latest = self.window[max(earlier)]
+            if latest.finalized or latest.block_hash == canonical_hash(latest.block_number):
+                return []
+            logging.warning(f"Reorg detected at block {block_number}: block {latest.block_number} {latest.block_hash} is no longer canonical")
+            return self.find_orphaned(latest.block_number, canonical_hash)
+        if parent.block_hash == parent_hash:
+            return []
+        logging.warning(f"Reorg detected at block {block_number}: parent {parent_hash} != stored {parent.block_hash}")
+        return self.find_orphaned(block_number - 1, canonical_hash)
+
+    def record(self, block_number, block_hash, parent_hash, detections, write=None):
+        """
+        Stores an observed block and drops the blocks that left the window.
+        `detections` is the list of event types reported for the block.
+        `write` (see BtChainObserver.write) queues the write into the block's unit of work; by default it is committed right away.
+        """
+        self.load()
+        block = WindowBlock(block_number, block_hash, parent_hash, ','.join(detections))
+        self.window[block_number] = block
+        expired = [number for number in self.window if number <= block_number - self.window_blocks]
+        for number in expired:
+            del self.window[number]
+        (write or write_now)(self.save, [block], expired)
+
+    def finalize(self, finalized_number, finalized_hash, canonical_hash, write=None):
+        """
+        Moves the finalized head forward. Returns (confirmed, orphaned): the window blocks that are now
+        final and the ones that turned out not to be on the finalized chain.
+        """
+        self.load()
+        stored = self.window.get(finalized_number)
+        orphaned = []
+        if stored is not None and not stored.finalized and stored.block_hash != finalized_hash:
+            logging.warning(f"Finalized block {finalized_number} is {finalized_hash}, observed {stored.block_hash}")
+            orphaned = self.find_orphaned(finalized_number, canonical_hash)
+        orphaned_numbers = {block.block_number for block in orphaned}
+        confirmed = [block for number, block in sorted(self.window.items())
+                     if number <= finalized_number and not block.finalized and number not in orphaned_numbers]
+        for block in confirmed:
+            block.finalized = True
+        if confirmed:
+            (write or write_now)(self.save, confirmed)
+        return confirmed, orphaned
+
+
+finality_tracker = FinalityTracker()
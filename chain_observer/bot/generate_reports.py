@@ -2,6 +2,11 @@ import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+MAX_WATCHLIST_FIELDS = 20
+MAX_RULE_FIELDS = 20
+# Discord rejects a message with a field value longer than 1024 characters.
+MAX_FIELD_LENGTH = 1000
+
 def generate_report(title, success, details, time_stamp):
     """
     Generates a report based on the extrinsic success and details provided.
@@ -147,4 +152,265 @@ def generate_dissolved_netword(title, details, time_stamp):
                 "value": "An error occurred while generating the report.",
                 "inline": False
             }]
-        }
\ No newline at end of file
+        }
+def generate_pending_schedule_report(title, details, color):
+    """
+    Generates a reminder or overdue report for a scheduled coldkey swap or network dissolve.
+    """
+    try:
+        fields = []
+        for key, value in details.items():
+            fields.append({
+                "name": f"\n\n🔑 **{key.upper()}** \n\n\n",
+                "value": f"{value}\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": color,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_pending_schedule_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def generate_finality_report(title, details, color):
+    """
+    Generates the confirmation or correction report of a block that was alerted on before it was finalized.
+    """
+    try:
+        fields = []
+        for key, value in details.items():
+            fields.append({
+                "name": f"\n\n🔑 **{key.upper()}** \n\n\n",
+                "value": f"{value}\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": color,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_finality_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def generate_stake_flow_report(title, details, color):
+    """
+    Generates the threshold or rate-of-change report of the stake flow of a hotkey or subnet.
+    """
+    try:
+        fields = []
+        for key, value in details.items():
+            fields.append({
+                "name": f"\n\n🔑 **{key.upper()}** \n\n\n",
+                "value": f"{value}\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": color,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_stake_flow_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def generate_watchlist_report(current_block_number, matches):
+    """
+    Generates the report of the events of a block that mention watched coldkeys or hotkeys.
+    """
+    try:
+        fields = [{
+            "name": "🧱 **CURRENT BLOCK** 🧱",
+            "value": f"{current_block_number}\n\n",
+            "inline": False
+        }]
+        # Discord accepts at most 25 fields per embed.
+        for match in matches[:MAX_WATCHLIST_FIELDS]:
+            fields.append({
+                "name": f"\n\n👀 **{match['label']}** \n\n\n",
+                "value": f"{match['event']} ({match['attribute']})\n{match['address']}\n\n",
+                "inline": False
+            })
+        if len(matches) > MAX_WATCHLIST_FIELDS:
+            fields.append({
+                "name": "\n\n➕ **MORE** \n\n\n",
+                "value": f"{len(matches) - MAX_WATCHLIST_FIELDS} more matches in this block.\n\n",
+                "inline": False
+            })
+        return {
+            "title": "👀 __ WATCHED ADDRESS ACTIVITY __ 👀",
+            "description": "",
+            "color": 3447003,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_watchlist_report : {e}")
+        return {
+            "title": "👀 __ WATCHED ADDRESS ACTIVITY __ 👀",
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def format_attributes(attributes):
+    if isinstance(attributes, dict):
+        return '\n'.join(f"{key}: {value}" for key, value in attributes.items())
+    if isinstance(attributes, (list, tuple)):
+        return '\n'.join(str(value) for value in attributes)
+    return str(attributes)
+
+def generate_rule_report(title, color, current_block_number, matches):
+    """
+    Generates the report of the matches of a rule from the rule file in a block.
+    """
+    try:
+        fields = [{
+            "name": "🧱 **CURRENT BLOCK** 🧱",
+            "value": f"{current_block_number}\n\n",
+            "inline": False
+        }]
+        # Discord accepts at most 25 fields per embed.
+        for match in matches[:MAX_RULE_FIELDS]:
+            lines = [format_attributes(match['attributes'])]
+            lines += [f"{key}: {value}" for key, value in match.get('enrichment', {}).items()]
+            fields.append({
+                "name": f"\n\n🔑 **{match['source'].upper()}** \n\n\n",
+                "value": '\n'.join(line for line in lines if line)[:1000] + "\n\n",
+                "inline": False
+            })
+        if len(matches) > MAX_RULE_FIELDS:
+            fields.append({
+                "name": "\n\n➕ **MORE** \n\n\n",
+                "value": f"{len(matches) - MAX_RULE_FIELDS} more matches in this block.\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": color,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_rule_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def generate_governance_report(title, details, voters, color):
+    """
+    Generates the live tally of a proposal: its details, then one line per voter.
+    """
+    try:
+        fields = []
+        for key, value in details.items():
+            fields.append({
+                "name": f"\n\n🔑 **{key.upper()}** \n\n\n",
+                "value": f"{value}\n\n",
+                "inline": False
+            })
+        lines = []
+        length = 0
+        for position, line in enumerate(voters):
+            if length + len(line) + 1 > MAX_FIELD_LENGTH:
+                lines.append(f"... and {len(voters) - position} more")
+                break
+            lines.append(line)
+            length += len(line) + 1
+        if lines:
+            fields.append({
+                "name": "\n\n🗳️ **VOTERS** \n\n\n",
+                "value": '\n'.join(lines) + "\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": color,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_governance_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
+
+def generate_digest_report(title, details):
+    """
+    Generates the digest of a period: the events detected, the coldkeys and subnets involved and the pending schedules.
+    """
+    try:
+        fields = []
+        for key, value in details.items():
+            fields.append({
+                "name": f"\n\n📋 **{key.upper()}** \n\n\n",
+                "value": f"{str(value)[:MAX_FIELD_LENGTH]}\n\n",
+                "inline": False
+            })
+        return {
+            "title": title,
+            "description": "",
+            "color": 10070709,
+            "fields": fields,
+        }
+    except Exception as e:
+        logging.exception(f"Exception in generate_digest_report : {e}")
+        return {
+            "title": title,
+            "description": "An error occurred while generating the report.",
+            "color": 16711680,
+            "fields": [{
+                "name": "Error",
+                "value": "An error occurred while generating the report.",
+                "inline": False
+            }]
+        }
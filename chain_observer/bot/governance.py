@@ -0,0 +1,261 @@
+import json
+import logging
+import os
+import sqlite3
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+from db_manage.unit_of_work import write_now
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Keep one tally message per proposal, edited in place on every vote, instead of posting each vote.
+GOVERNANCE_TALLY = os.getenv('GOVERNANCE_TALLY', 'true').lower() in ('1', 'true', 'yes')
+# Collective pallet holding the proposals the senate votes on.
+GOVERNANCE_PALLET = os.getenv('GOVERNANCE_PALLET', 'Triumvirate')
+# Discord channel of the tally messages (GOVERNANCE_DISCORD_WEBHOOK_URL).
+GOVERNANCE = 'governance'
+
+OPEN = 'open'
+# Status of a proposal after each final event of the collective.
+FINAL_EVENTS = {'Approved': 'approved', 'Disapproved': 'disapproved', 'Executed': 'executed', 'Closed': 'closed'}
+# Positional attributes of the collective events on runtimes that do not name them.
+EVENT_ATTRIBUTES = {
+    'Proposed': ('account', 'proposal_index', 'proposal_hash', 'threshold'),
+    'Voted': ('account', 'proposal_hash', 'voted', 'yes', 'no'),
+    'Approved': ('proposal_hash',),
+    'Disapproved': ('proposal_hash',),
+    'Executed': ('proposal_hash', 'result'),
+    'Closed': ('proposal_hash', 'yes', 'no'),
+}
+
+
+def event_attributes(event_id, attributes):
+    """
+    Returns the attributes of a collective event by name.
+    """
+    if isinstance(attributes, dict):
+        return attributes
+    if isinstance(attributes, (list, tuple)):
+        return dict(zip(EVENT_ATTRIBUTES[event_id], attributes))
+    return {}
+
+
+class ProposalTally:
+    """
+    Live tally of one proposal: its votes by hotkey, the aye and nay counts and the threshold it needs.
+    """
+
+    def __init__(self, proposal_hash, proposal_index=None, threshold=None, ayes=0, nays=0, voters=None, status=OPEN,
+                 first_block=None, last_block=None, message_id=None):
+        self.proposal_hash = proposal_hash
+        self.proposal_index = proposal_index
+        self.threshold = threshold
+        self.ayes = ayes
+        self.nays = nays
+        self.voters = voters or {}
+        self.status = status
+        self.first_block = first_block
+        self.last_block = last_block
+        self.message_id = message_id
+
+    @property
+    def needed(self):
+        """
+        Ayes still missing to reach the threshold, or None while the threshold is unknown.
+        """
+        if self.threshold is None:
+            return None
+        return max(self.threshold - self.ayes, 0)
+
+    def count_voters(self):
+        self.ayes = sum(1 for approve in self.voters.values() if approve)
+        self.nays = len(self.voters) - self.ayes
+
+    def row(self):
+        return (self.proposal_hash, self.proposal_index, self.threshold, self.ayes, self.nays, json.dumps(self.voters),
+                self.status, self.first_block, self.last_block, self.message_id)
+
+
+class GovernanceTally:
+    """
+    Tallies of the proposals of the collective, updated from the `vote` extrinsics and the collective's events of each block.
+    Only the proposals touched by a block are saved, so a block costs O(votes); the tallies and the id of each proposal's
+    Discord message are persisted so that a restart keeps editing the same messages.
+    """
+
+    def __init__(self, db_path=DB_PATH, pallet=None):
+        self.db_path = db_path
+        self.pallet = pallet or GOVERNANCE_PALLET
+        self.tallies = {}
+        self.loaded = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS governance_proposals (
+            proposal_hash TEXT PRIMARY KEY,
+            proposal_index INTEGER,
+            threshold INTEGER,
+            ayes INTEGER NOT NULL,
+            nays INTEGER NOT NULL,
+            voters TEXT NOT NULL,
+            status TEXT NOT NULL,
+            first_block INTEGER,
+            last_block INTEGER,
+            message_id TEXT
+        )
+        ''')
+        return conn
+
+    def load(self):
+        """
+        Loads the persisted tallies once.
+        """
+        if self.loaded:
+            return
+        try:
+            conn = self.connect()
+            rows = conn.execute('''
+            SELECT proposal_hash, proposal_index, threshold, ayes, nays, voters, status, first_block, last_block, message_id
+            FROM governance_proposals
+            ''').fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading governance tallies : {e}")
+            rows = []
+        for row in rows:
+            self.tallies[row[0]] = ProposalTally(row[0], row[1], row[2], row[3], row[4], json.loads(row[5]), *row[6:])
+        self.loaded = True
+
+    def reload(self):
+        """
+        Drops the in-memory tallies so that the next call reloads them from the database.
+        """
+        self.tallies = {}
+        self.loaded = False
+
+    def get(self, proposal_hash):
+        self.load()
+        return self.tallies.get(proposal_hash)
+
+    def tally(self, proposal_hash, block_number, lookup=None):
+        """
+        Returns the tally of a proposal, creating it on its first vote or event. A proposal first seen through a vote was
+        proposed before the observer started: `lookup(proposal_hash)` may then supply its state from chain storage.
+        """
+        tally = self.get(proposal_hash)
+        if tally is None:
+            tally = self.tallies[proposal_hash] = ProposalTally(proposal_hash, first_block=block_number)
+            if lookup is not None:
+                self.seed(tally, lookup)
+        return tally
+
+    def seed(self, tally, lookup):
+        """
+        Fills a new tally from the collective's Voting storage: {index, threshold, ayes: [accounts], nays: [accounts], ...}.
+        """
+        try:
+            voting = lookup(tally.proposal_hash)
+        except Exception as e:
+            logging.warning(f"Failed to read the votes of proposal {tally.proposal_hash}: {e}")
+            return
+        if not voting:
+            return
+        tally.proposal_index = voting.get('index', tally.proposal_index)
+        tally.threshold = voting.get('threshold', tally.threshold)
+        tally.voters.update({account: True for account in voting.get('ayes') or []})
+        tally.voters.update({account: False for account in voting.get('nays') or []})
+        tally.count_voters()
+
+    def process_block(self, block_number, votes, events, lookup=None, write=None):
+        """
+        Applies the successful votes of a block, as (hotkey, proposal hash, approve, index) tuples, and the collective's events.
+        The counts of a Voted event are the chain's own and take precedence over the counts of the known voters.
+        Replaying a block sets the same values again, so it changes nothing.
+        `write` (see BtChainObserver.write) queues the saved tallies into the block's unit of work; by default they are committed right away.
+
+        Returns:
+        list: The tallies changed by the block.
+        """
+        changed = {}
+        counted = set()
+        for event in events:
+            value = getattr(event, 'value', None) or {}
+            event_id = value.get('event_id')
+            if value.get('module_id') != self.pallet or event_id not in EVENT_ATTRIBUTES:
+                continue
+            attributes = event_attributes(event_id, value.get('attributes'))
+            proposal_hash = attributes.get('proposal_hash')
+            if not proposal_hash:
+                continue
+            tally = self.tally(proposal_hash, block_number, lookup if event_id != 'Proposed' else None)
+            if event_id == 'Proposed':
+                tally.proposal_index = attributes.get('proposal_index', tally.proposal_index)
+                tally.threshold = attributes.get('threshold', tally.threshold)
+            elif event_id == 'Voted':
+                tally.voters[attributes.get('account')] = bool(attributes.get('voted'))
+                tally.ayes, tally.nays = attributes.get('yes', tally.ayes), attributes.get('no', tally.nays)
+                counted.add(proposal_hash)
+            else:
+                if 'yes' in attributes:
+                    tally.ayes, tally.nays = attributes['yes'], attributes.get('no', tally.nays)
+                    counted.add(proposal_hash)
+                tally.status = FINAL_EVENTS[event_id]
+            changed[proposal_hash] = tally
+        for hotkey, proposal_hash, approve, index in votes:
+            if not proposal_hash or hotkey is None:
+                continue
+            tally = self.tally(proposal_hash, block_number, lookup)
+            if index is not None:
+                tally.proposal_index = index
+            tally.voters[hotkey] = bool(approve)
+            if proposal_hash not in counted:
+                tally.count_voters()
+            changed[proposal_hash] = tally
+        for tally in changed.values():
+            tally.last_block = block_number
+        if changed:
+            (write or write_now)(self.save, list(changed.values()))
+        return list(changed.values())
+
+    def save(self, tallies, conn=None):
+        """
+        Saves tallies. Their rows are built when the write runs, so a queued write saves their latest state.
+        """
+        tallies = list(tallies)
+        if not tallies:
+            return
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            conn.executemany('''
+            INSERT OR REPLACE INTO governance_proposals
+            (proposal_hash, proposal_index, threshold, ayes, nays, voters, status, first_block, last_block, message_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [tally.row() for tally in tallies])
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error saving governance tallies : {e}")
+
+    def set_message_id(self, proposal_hash, message_id):
+        """
+        Records the Discord message showing a proposal's tally, which later votes edit.
+        """
+        tally = self.get(proposal_hash)
+        if tally is None or tally.message_id == message_id:
+            return
+        tally.message_id = message_id
+        try:
+            conn = self.connect()
+            with conn:
+                conn.execute('UPDATE governance_proposals SET message_id = ? WHERE proposal_hash = ?', (message_id, proposal_hash))
+        except sqlite3.Error as e:
+            logging.error(f"Database error saving the tally message of proposal {proposal_hash} : {e}")
+
+
+governance = GovernanceTally()
@@ -0,0 +1,135 @@
+import logging
+import os
+from dotenv import load_dotenv
+from chain_observer.bot.parallel_decoding import ZERO_HASH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Decode the extrinsics of a block only when its events or raw extrinsic bytes show a watched call or event.
+LAZY_DECODING = os.getenv('LAZY_DECODING', 'true').lower() in ('1', 'true', 'yes')
+
+WATCHED_MODULE = 'SubtensorModule'
+WATCHED_CALLS = ['schedule_swap_coldkey', 'schedule_dissolve_network', 'vote']
+# Events reported by themselves; their report needs the block timestamp, hence the decoded extrinsics.
+WATCHED_EVENTS = ['ColdkeySwapped', 'NetworkRemoved']
+
+SIGNED_BIT = 0x80
+# Byte range, after the version byte of a signed extrinsic, where its call index can start:
+# address (32 or 33 bytes), signature (65 or 66 bytes), then the signed extensions (era, nonce, tip, metadata hash mode).
+SIGNED_CALL_MIN_OFFSET = 32 + 65
+SIGNED_CALL_MAX_OFFSET = 33 + 66 + 2 + 9 + 17 + 1
+# Length prefix, version byte and the largest call offset.
+PREFIX_BYTES = 5 + 1 + SIGNED_CALL_MAX_OFFSET + 2
+
+
+def read_compact(data, offset):
+    """
+    Reads a SCALE compact integer at `offset`. Returns (value, offset after it).
+    """
+    mode = data[offset] & 0b11
+    if mode == 0:
+        return data[offset] >> 2, offset + 1
+    if mode == 1:
+        return int.from_bytes(data[offset:offset + 2], 'little') >> 2, offset + 2
+    if mode == 2:
+        return int.from_bytes(data[offset:offset + 4], 'little') >> 2, offset + 4
+    length = (data[offset] >> 2) + 4
+    return int.from_bytes(data[offset + 1:offset + 1 + length], 'little'), offset + 1 + length
+
+
+def may_contain_call(raw_extrinsic, call_indices):
+    """
+    Checks the raw bytes of an extrinsic for the 2-byte call indices (pallet index, call index) of the watched calls.
+    Unsigned extrinsics are checked exactly. Signed extrinsics are checked over the few positions their call can start at,
+    so a match is a candidate that still has to be confirmed by decoding.
+
+    Parameters:
+    raw_extrinsic (str | bytes): The extrinsic as returned by chain_getBlock, with its length prefix.
+    call_indices (set): The watched call indices as 2-byte `bytes`.
+    """
+    if isinstance(raw_extrinsic, str):
+        # Only the prefix holding the call index is turned into bytes.
+        start = 2 if raw_extrinsic.startswith('0x') else 0
+        data = bytes.fromhex(raw_extrinsic[start:start + 2 * PREFIX_BYTES])
+    else:
+        data = raw_extrinsic[:PREFIX_BYTES]
+    _, version_offset = read_compact(data, 0)
+    body = version_offset + 1
+    if not data[version_offset] & SIGNED_BIT:
+        return data[body:body + 2] in call_indices
+    window = data[body + SIGNED_CALL_MIN_OFFSET:body + SIGNED_CALL_MAX_OFFSET + 2]
+    return any(call_index in window for call_index in call_indices)
+
+
+def watched_call_indices(substrate, block_hash, extra_calls=None):
+    """
+    Reads the call indices of the watched SubtensorModule calls, and of `extra_calls` ({module: call names}),
+    from the runtime metadata a block is decoded with (the runtime of its parent block).
+    """
+    calls = {WATCHED_MODULE: set(WATCHED_CALLS)}
+    for module, names in (extra_calls or {}).items():
+        calls[module] = calls.get(module, set()) | set(names)
+    indices = set()
+    for module, names in calls.items():
+        pallet = substrate.get_metadata_module(module, block_hash=block_hash)
+        if pallet is None:
+            continue
+        pallet_index = pallet.value['index']
+        indices.update(bytes([pallet_index, call.value['index']]) for call in pallet.calls or [] if call.name in names)
+    return indices
+
+
+def event_ids(events):
+    return {event.value.get('event_id') for event in events if getattr(event, 'value', None)}
+
+
+class LazyBlockLoader:
+    """
+    Loads blocks event-first: the events are decoded, the extrinsics are only fetched as raw bytes and checked against
+    the watched call indices, and the full block is decoded only when a candidate is found.
+    The call indices are kept per spec version of the runtime each block is decoded with, i.e. its parent's runtime:
+    the block of a runtime upgrade still uses the old indices and the blocks after it the new ones.
+    """
+
+    def __init__(self, substrate):
+        self.substrate = substrate
+        self.call_indices = {}
+        self.extra_calls = {}
+
+    def watch(self, extra_calls):
+        """
+        Also decodes blocks with the given calls ({module: call names}), e.g. those of the rule file.
+        """
+        if extra_calls != self.extra_calls:
+            self.extra_calls = extra_calls
+            self.call_indices = {}
+
+    def block_call_indices(self, block_hash, parent_hash):
+        """
+        Returns the watched call indices of the runtime `block_hash` is decoded with, read once per spec version.
+        """
+        runtime_hash = block_hash if parent_hash == ZERO_HASH else parent_hash
+        spec_version = self.substrate.rpc_request('state_getRuntimeVersion', [runtime_hash])['result']['specVersion']
+        if spec_version not in self.call_indices:
+            self.call_indices[spec_version] = watched_call_indices(self.substrate, block_hash, self.extra_calls)
+        return self.call_indices[spec_version]
+
+    def load(self, block_hash, events):
+        """
+        Returns the block of `block_hash` with no extrinsics when nothing watched can be in it,
+        or None when it has a candidate and must be fully decoded.
+        """
+        if event_ids(events).intersection(WATCHED_EVENTS):
+            return None
+        response = self.substrate.rpc_request('chain_getBlock', [block_hash])
+        raw_block = response['result']['block']
+        header = raw_block['header']
+        call_indices = self.block_call_indices(block_hash, header['parentHash'])
+        if any(may_contain_call(raw_extrinsic, call_indices) for raw_extrinsic in raw_block['extrinsics']):
+            return None
+        return {
+            'header': {'hash': block_hash, 'parentHash': header['parentHash'], 'number': int(header['number'], 16)},
+            'extrinsics': [],
+        }
@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+from dotenv import load_dotenv
+import db_manage.db_manager as db_module
+from db_manage.event_archive import EventArchive, event_archive
+from db_manage.leases import LeaseManager
+from chain_observer.bot.pending_schedules import PendingScheduleRegistry, pending_schedules, COLDKEY_SWAP, DISSOLVE_NETWORK
+from chain_observer.bot.finality import FinalityTracker, finality_tracker
+from chain_observer.bot.watchlist import WATCHLIST
+from chain_observer.bot.stake_flow import StakeFlowMonitor, stake_flow, STAKE_FLOW
+from chain_observer.bot.governance import GovernanceTally, governance, GOVERNANCE
+from chain_observer.bot.digest import DigestBuilder, digest, DIGEST
+from chain_observer.bot.report_outbox import ReportOutbox, report_outbox
+from chain_observer.utils.chain_client import get_endpoints
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_NETWORK = 'default'
+LEADER_LEASE = 'leader'
+# Report channels with a webhook of their own; a channel without one posts to the coldkey swap webhook.
+WEBHOOK_CHANNELS = [COLDKEY_SWAP, DISSOLVE_NETWORK, WATCHLIST, STAKE_FLOW, GOVERNANCE, DIGEST]
+
+
+class Network:
+    """
+    One observed network: its endpoints, its SQLite file (checkpoint, dataset tables, archive) and its Discord webhooks.
+    The HTTP session, the runtime metadata cache and the scheduler are shared by all networks of the process.
+    """
+
+    def __init__(self, name, endpoints, db_path, webhooks, db_manager=None, event_archive=None, pending_schedules=None, finality_tracker=None,
+                 stake_flow=None, governance=None, digest=None, report_outbox=None, webhook_prefix=''):
+        self.name = name
+        self.endpoints = endpoints
+        self.db_path = db_path
+        self.webhooks = webhooks
+        self.webhook_prefix = webhook_prefix
+        self.db_manager = db_manager or db_module.DBManager(db_path, endpoints[0] if endpoints else None)
+        self.event_archive = event_archive or EventArchive(db_path)
+        self.pending_schedules = pending_schedules or PendingScheduleRegistry(db_path)
+        self.finality_tracker = finality_tracker or FinalityTracker(db_path)
+        self.stake_flow = stake_flow or StakeFlowMonitor(db_path)
+        self.governance = governance or GovernanceTally(db_path)
+        self.digest = digest or DigestBuilder(db_path)
+        self.report_outbox = report_outbox or ReportOutbox(db_path)
+        self.leases = LeaseManager(db_path)
+        # Fencing token of the leader lease held by this instance, None while standby.
+        self.leader_token = None
+        self.observer = None
+        # Held while a block of this network is processed, so that a slow block is not observed twice.
+        self.lock = threading.Lock()
+
+    def get_observer(self):
+        """
+        Creates the network's BtChainObserver (and its chain connections) on first use.
+        """
+        if self.observer is None:
+            from chain_observer.bot.bt_chain_observer import BtChainObserver
+            self.observer = BtChainObserver(network=self)
+        return self.observer
+
+    def is_leader(self):
+        """
+        Takes or renews this instance's leader lease of the network. Only the leader processes the head and refreshes the datasets.
+        """
+        self.leader_token = self.leases.acquire(LEADER_LEASE)
+        return self.leader_token is not None
+
+    def check_leader(self, conn=None):
+        """
+        Raises LeaseLostError unless this instance still holds the leader lease it processes under; with `conn`, inside
+        that write transaction (see LeaseManager.check).
+        """
+        self.leases.check(LEADER_LEASE, self.leader_token, conn=conn)
+
+    def keep_leader(self):
+        """
+        Renews the leader lease in the background while a block of this network is processed.
+        """
+        return self.leases.keep(LEADER_LEASE, self.leader_token)
+
+    def webhook(self, channel):
+        """
+        Returns the Discord webhook of a report channel. Channels named by sinks of the rule file are read from
+        <prefix><CHANNEL>_DISCORD_WEBHOOK_URL on first use; a channel without a webhook posts to the coldkey swap one.
+        """
+        if channel not in self.webhooks:
+            self.webhooks[channel] = os.getenv(f'{self.webhook_prefix}{channel.upper()}_DISCORD_WEBHOOK_URL')
+        return self.webhooks.get(channel) or self.webhooks.get(COLDKEY_SWAP)
+
+
+def get_webhooks(prefix=''):
+    """
+    Reads the Discord webhook of every report channel from <prefix><CHANNEL>_DISCORD_WEBHOOK_URL.
+    """
+    return {channel: os.getenv(f'{prefix}{channel.upper()}_DISCORD_WEBHOOK_URL') for channel in WEBHOOK_CHANNELS}
+
+
+def default_network():
+    """
+    The network configured by the original single-network variables, backed by the module-level managers.
+    """
+    return Network(
+        DEFAULT_NETWORK,
+        get_endpoints(),
+        db_module.DB_PATH,
+        get_webhooks(),
+        db_module.db_manager, event_archive, pending_schedules, finality_tracker, stake_flow, governance, digest, report_outbox,
+    )
+
+
+def load_networks():
+    """
+    Builds the networks listed in NETWORKS (e.g. "finney,test"); each one is configured by variables prefixed with its name:
+    <NAME>_SUBTENSOR_ENDPOINTS, <NAME>_DB_PATH and <NAME>_<CHANNEL>_DISCORD_WEBHOOK_URL (e.g. <NAME>_COLDKEY_SWAP_DISCORD_WEBHOOK_URL).
+    The first network defaults to database/db.sqlite3, the others to database/<name>.sqlite3.
+    Without NETWORKS, the single default network is returned.
+    """
+    names = [name.strip() for name in os.getenv('NETWORKS', '').split(',') if name.strip()]
+    if not names:
+        return [default_network()]
+    networks = []
+    for position, name in enumerate(names):
+        prefix = name.upper()
+        endpoints = [endpoint.strip() for endpoint in os.getenv(f'{prefix}_SUBTENSOR_ENDPOINTS', '').split(',') if endpoint.strip()]
+        if not endpoints:
+            logging.error(f"{prefix}_SUBTENSOR_ENDPOINTS is not set, network {name} is not observed.")
+            continue
+        db_path = os.getenv(f'{prefix}_DB_PATH') or (db_module.DB_PATH if position == 0 else f'database/{name}.sqlite3')
+        networks.append(Network(name, endpoints, db_path, get_webhooks(f'{prefix}_'), webhook_prefix=f'{prefix}_'))
+    return networks
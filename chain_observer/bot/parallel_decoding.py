@@ -0,0 +1,240 @@
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Worker processes decoding blocks during catch-up and backfill; 0 uses one per CPU core.
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', '0'))
+# Blocks fetched ahead of the one being observed, bounding the memory held by decoded results.
+DECODE_PREFETCH_BLOCKS = int(os.getenv('DECODE_PREFETCH_BLOCKS', '64'))
+
+# twox128('System') + twox128('Events'), the storage key of the events of a block.
+EVENTS_STORAGE_KEY = '0x26aa394eea5630e07c48ae0c9558cef780d41e5e16056765bc8461851072c9d7'
+ZERO_HASH = '0x' + '00' * 32
+
+# Runtimes decoded by this worker process, by (spec version, metadata path).
+_runtimes = {}
+
+
+class DecodedObject:
+    """
+    Stand-in for GenericExtrinsic / GenericEvent built from the value decoded in a worker: exposes it through `.value`.
+    """
+    def __init__(self, value):
+        self.value = value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+
+def load_runtime(spec_version, metadata_path):
+    """
+    Builds the runtime configuration of a spec version from the metadata file written by the parent process,
+    the same way substrate-interface sets up a runtime, and keeps it for the next blocks of that version.
+
+    Returns:
+    tuple: (runtime_config, metadata, type string of System.Events)
+    """
+    key = (spec_version, metadata_path)
+    if key not in _runtimes:
+        from scalecodec.base import RuntimeConfigurationObject, ScaleBytes
+        from scalecodec.type_registry import load_type_registry_preset
+        runtime_config = RuntimeConfigurationObject(ss58_format=42)
+        runtime_config.update_type_registry(load_type_registry_preset('core'))
+        with open(metadata_path) as f:
+            metadata = runtime_config.create_scale_object('MetadataVersioned', data=ScaleBytes(f.read()))
+        metadata.decode()
+        runtime_config.add_portable_registry(metadata)
+        runtime_config.set_active_spec_version_id(spec_version)
+        try:
+            runtime_config.create_scale_object('sp_weights::weight_v2::Weight')
+            runtime_config.update_type_registry_types({'Weight': 'sp_weights::weight_v2::Weight'})
+        except NotImplementedError:
+            runtime_config.update_type_registry_types({'Weight': 'WeightV1'})
+        events_type = metadata.get_metadata_pallet('System').get_storage_function('Events').get_value_type_string()
+        _runtimes[key] = runtime_config, metadata, events_type
+    return _runtimes[key]
+
+
+def decode_raw_block(raw_block):
+    """
+    Decodes the extrinsics and events of a block fetched by `fetch_raw_block`. Runs in a worker process.
+
+    Returns:
+    tuple: (block number, list of extrinsic values, list of event values)
+    """
+    from scalecodec.base import ScaleBytes
+    runtime_config, metadata, events_type = load_runtime(raw_block['spec_version'], raw_block['metadata_path'])
+    extrinsic_cls = runtime_config.get_decoder_class('Extrinsic')
+    extrinsics = []
+    for raw_extrinsic in raw_block['extrinsics']:
+        extrinsic = extrinsic_cls(data=ScaleBytes(raw_extrinsic), metadata=metadata, runtime_config=runtime_config)
+        extrinsic.decode()
+        extrinsics.append(extrinsic.value)
+    events = []
+    if raw_block['events']:
+        storage = runtime_config.create_scale_object(events_type, data=ScaleBytes(raw_block['events']), metadata=metadata)
+        storage.decode()
+        events = [event.value for event in storage.elements]
+    return raw_block['block_number'], extrinsics, events
+
+
+class MetadataFiles:
+    """
+    Raw runtime metadata of every spec version met so far, written once to a temporary directory
+    so that each worker process reads and decodes it only once.
+    """
+    def __init__(self, substrate):
+        self.substrate = substrate
+        self.directory = None
+        self.paths = {}
+
+    def path(self, spec_version, block_hash):
+        if spec_version not in self.paths:
+            if self.directory is None:
+                self.directory = tempfile.mkdtemp(prefix='chain-observer-metadata-')
+            path = os.path.join(self.directory, f'metadata_{spec_version}.hex')
+            # The directory may be kept across runs (see BlockRecorder); a spec version's metadata never changes.
+            if not os.path.exists(path):
+                response = self.substrate.rpc_request('state_getMetadata', [block_hash])
+                with open(path, 'w') as f:
+                    f.write(response['result'])
+            self.paths[spec_version] = path
+        return self.paths[spec_version]
+
+    def close(self):
+        """
+        Removes the temporary directory and its metadata files.
+        """
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory = None
+        self.paths = {}
+
+
+def fetch_raw_block(substrate, metadata_files, block_number):
+    """
+    Fetches the raw extrinsics and events of a block and the runtime they are decoded with (the one of its parent block).
+    """
+    block_hash = substrate.rpc_request('chain_getBlockHash', [block_number])['result']
+    block = substrate.rpc_request('chain_getBlock', [block_hash])['result']['block']
+    parent_hash = block['header']['parentHash']
+    events = substrate.rpc_request('state_getStorage', [EVENTS_STORAGE_KEY, block_hash])['result']
+    runtime_hash = block_hash if parent_hash == ZERO_HASH else parent_hash
+    spec_version = substrate.rpc_request('state_getRuntimeVersion', [runtime_hash])['result']['specVersion']
+    return {
+        'block_number': block_number,
+        'block_hash': block_hash,
+        'parent_hash': parent_hash,
+        'extrinsics': block['extrinsics'],
+        'events': events,
+        'spec_version': spec_version,
+        'metadata_path': metadata_files.path(spec_version, runtime_hash),
+    }
+
+
+class ParallelBlockDecoder:
+    """
+    Decode stage for catch-up and backfill: an I/O thread fetches raw blocks and hands them to a pool of worker processes,
+    and the decoded blocks are given back in block order, ready for `BtChainObserver.observe_block`.
+    At most `prefetch_blocks` blocks are in flight, so a slow observer holds back the fetching.
+    The worker processes and the metadata files are kept across calls to `blocks`, until `close` is called.
+    """
+    def __init__(self, substrate, workers=None, prefetch_blocks=None, decode=decode_raw_block, fetch=fetch_raw_block):
+        self.substrate = substrate
+        self.workers = workers or DECODE_WORKERS or os.cpu_count() or 1
+        self.prefetch_blocks = prefetch_blocks or DECODE_PREFETCH_BLOCKS
+        self.decode = decode
+        self.fetch = fetch
+        self.metadata_files = MetadataFiles(substrate)
+        self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def pool(self):
+        """
+        Returns the pool of worker processes, started on first use (or again after a worker died).
+        """
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor
+
+    def close(self):
+        """
+        Stops the worker processes and removes the metadata files.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.metadata_files.close()
+
+    def fetch_blocks(self, block_numbers, executor, in_flight, stop):
+        """
+        Runs on the I/O thread: fetches each block and submits its decoding, queuing the futures in block order.
+        """
+        for block_number in block_numbers:
+            if stop.is_set():
+                break
+            try:
+                raw_block = self.fetch(self.substrate, self.metadata_files, block_number)
+                in_flight.put((block_number, raw_block, executor.submit(self.decode, raw_block)))
+            except Exception as e:
+                logging.error(f"Failed to fetch block {block_number} for decoding: {e}")
+                in_flight.put((block_number, None, e))
+        in_flight.put(None)
+
+    def blocks(self, block_numbers):
+        """
+        Yields (block_number, block, events) in the order of `block_numbers`, with `block` shaped like `get_block` returns it.
+        A block that could not be fetched or decoded is yielded as (block_number, None, None).
+        """
+        in_flight = queue.Queue(maxsize=self.prefetch_blocks)
+        stop = threading.Event()
+        executor = self.pool()
+        fetcher = threading.Thread(target=self.fetch_blocks, args=(block_numbers, executor, in_flight, stop),
+                                   name='block-fetcher', daemon=True)
+        fetcher.start()
+        try:
+            while True:
+                item = in_flight.get()
+                if item is None:
+                    break
+                block_number, raw_block, future = item
+                try:
+                    if raw_block is None:
+                        raise future
+                    _, extrinsics, events = future.result()
+                except Exception as e:
+                    logging.error(f"Failed to decode block {block_number}: {e}")
+                    if isinstance(e, BrokenProcessPool) and self.executor is executor:
+                        self.executor = None
+                    yield block_number, None, None
+                    continue
+                block = {
+                    'header': {'number': block_number, 'hash': raw_block['block_hash'], 'parentHash': raw_block['parent_hash']},
+                    'extrinsics': [DecodedObject(extrinsic) for extrinsic in extrinsics],
+                }
+                yield block_number, block, [DecodedObject(event) for event in events]
+        finally:
+            stop.set()
+            # Unblock the fetcher if it waits on a full queue and let it finish, cancelling the decodings nobody will read.
+            while fetcher.is_alive() or not in_flight.empty():
+                try:
+                    item = in_flight.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is not None and item[1] is not None:
+                    item[2].cancel()
@@ -0,0 +1,287 @@
+import heapq
+import itertools
+import logging
+import os
+import sqlite3
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+from db_manage.unit_of_work import write_now
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+COLDKEY_SWAP = 'coldkey_swap'
+DISSOLVE_NETWORK = 'dissolve_network'
+
+# Remind when a schedule gets within these many blocks of execution (~1 day, ~1 hour, ~5 minutes).
+PENDING_REMINDER_BLOCKS = sorted((int(blocks) for blocks in os.getenv('PENDING_REMINDER_BLOCKS', '7200,300,25').split(',') if blocks.strip()), reverse=True)
+# Blocks after the execution block before a schedule without its ColdkeySwapped / NetworkRemoved is flagged.
+OVERDUE_GRACE_BLOCKS = int(os.getenv('OVERDUE_GRACE_BLOCKS', '5'))
+
+
+class PendingSchedule:
+    def __init__(self, id, kind, key, new_coldkey, scheduled_block, execution_block, reminder_index=0, status='pending', resolved_block=None):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.new_coldkey = new_coldkey
+        self.scheduled_block = scheduled_block
+        self.execution_block = execution_block
+        self.reminder_index = reminder_index
+        self.status = status
+        self.resolved_block = resolved_block
+
+    def next_timer(self, reminder_blocks, grace_blocks):
+        """
+        Block at which this schedule next needs attention: its next reminder, then its overdue check.
+        """
+        if self.reminder_index < len(reminder_blocks):
+            return self.execution_block - reminder_blocks[self.reminder_index]
+        return self.execution_block + grace_blocks
+
+
+class PendingScheduleRegistry:
+    """
+    Registry of scheduled coldkey swaps and network dissolves, persisted in SQLite and kept in a
+    min-heap of timers (next reminder or overdue check) so every block only touches the schedules that are due.
+    """
+
+    def __init__(self, db_path=DB_PATH, reminder_blocks=None, grace_blocks=None):
+        self.db_path = db_path
+        self.reminder_blocks = sorted(reminder_blocks, reverse=True) if reminder_blocks is not None else PENDING_REMINDER_BLOCKS
+        self.grace_blocks = OVERDUE_GRACE_BLOCKS if grace_blocks is None else grace_blocks
+        self.loaded = False
+        self.pending = {}
+        self.timers = []
+        self.counter = itertools.count()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS pending_schedules (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            new_coldkey TEXT,
+            scheduled_block INTEGER NOT NULL,
+            execution_block INTEGER NOT NULL,
+            reminder_index INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            resolved_block INTEGER
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_pending_schedules_status_execution ON pending_schedules (status, execution_block)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_pending_schedules_kind_key ON pending_schedules (kind, key, status)')
+        return conn
+
+    def load(self):
+        """
+        Loads the pending schedules from the database once and builds the timer heap.
+        """
+        if self.loaded:
+            return
+        try:
+            conn = self.connect()
+            rows = conn.execute('''
+            SELECT id, kind, key, new_coldkey, scheduled_block, execution_block, reminder_index, status, resolved_block
+            FROM pending_schedules WHERE status = 'pending'
+            ''').fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading pending schedules : {e}")
+            rows = []
+        for row in rows:
+            schedule = PendingSchedule(*row)
+            self.pending[(schedule.kind, schedule.key)] = schedule
+            self.timers.append((schedule.next_timer(self.reminder_blocks, self.grace_blocks), next(self.counter), schedule))
+        heapq.heapify(self.timers)
+        self.loaded = True
+
+    def reload(self):
+        """
+        Drops the in-memory state so that the next call reloads the schedules from the database.
+        """
+        self.loaded = False
+        self.pending = {}
+        self.timers = []
+
+    def push_timer(self, schedule):
+        heapq.heappush(self.timers, (schedule.next_timer(self.reminder_blocks, self.grace_blocks), next(self.counter), schedule))
+
+    def skip_passed_reminders(self, schedule, current_block_number):
+        while schedule.reminder_index < len(self.reminder_blocks) and schedule.execution_block - self.reminder_blocks[schedule.reminder_index] <= current_block_number:
+            schedule.reminder_index += 1
+
+    def add(self, kind, key, new_coldkey, scheduled_block, execution_block, write=None):
+        """
+        Registers a schedule seen in block `scheduled_block`. A new schedule for the same key replaces the old one;
+        a schedule older than the pending one (e.g. seen again while backfilling) is ignored and None is returned.
+        `write` (see BtChainObserver.write) queues the database writes into the block's unit of work; by default they
+        are committed right away.
+        """
+        self.load()
+        if key is None or execution_block is None:
+            return None
+        key = str(key)
+        previous = self.pending.get((kind, key))
+        if previous is not None and previous.scheduled_block > int(scheduled_block):
+            return None
+        self.pending.pop((kind, key), None)
+        schedule = PendingSchedule(None, kind, key, new_coldkey, int(scheduled_block), int(execution_block))
+        self.skip_passed_reminders(schedule, int(scheduled_block))
+        if previous is not None:
+            previous.status, previous.resolved_block = 'replaced', schedule.scheduled_block
+        (write or write_now)(self.insert, schedule, previous)
+        self.pending[(kind, key)] = schedule
+        self.push_timer(schedule)
+        return schedule
+
+    def insert(self, schedule, previous=None, conn=None):
+        """
+        Saves a new schedule, and the status of the schedule it replaces. The schedule's id is set once it is inserted.
+
+        Parameters:
+        schedule (PendingSchedule): The new schedule.
+        previous (PendingSchedule): The schedule it replaces, if any.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            if previous is not None:
+                conn.execute('UPDATE pending_schedules SET status = ?, resolved_block = ? WHERE id = ?',
+                             (previous.status, previous.resolved_block, previous.id))
+            cursor = conn.execute('''
+            INSERT INTO pending_schedules (kind, key, new_coldkey, scheduled_block, execution_block, reminder_index)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', (schedule.kind, schedule.key, schedule.new_coldkey, schedule.scheduled_block, schedule.execution_block, schedule.reminder_index))
+            schedule.id = cursor.lastrowid
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error adding pending schedule : {e}")
+
+    def resolve(self, kind, key, block_number, write=None):
+        """
+        Marks the pending schedule of `key` as executed and returns it (None if it was not scheduled).
+        """
+        self.load()
+        schedule = self.pending.pop((kind, str(key)), None)
+        if schedule is None:
+            return None
+        schedule.status, schedule.resolved_block = 'executed', block_number
+        (write or write_now)(self.save_status, schedule)
+        return schedule
+
+    def save_status(self, schedule, conn=None):
+        """
+        Saves the status and reminder index of a schedule. Its id is read when the write runs, so the write may be queued
+        behind the insert of the schedule.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            conn.execute('UPDATE pending_schedules SET status = ?, resolved_block = ?, reminder_index = ? WHERE id = ?',
+                         (schedule.status, schedule.resolved_block, schedule.reminder_index, schedule.id))
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error updating pending schedule : {e}")
+
+    def revert_block(self, block_number, write=None):
+        """
+        Undoes what a block reorganised out did to the registry: the schedules it added are dropped, and the schedules it
+        executed or replaced are pending again. Schedules it flagged as overdue stay overdue, so the canonical block does not
+        report them a second time. The in-memory registry is updated right away, since queued writes are not read back.
+        """
+        self.load()
+        try:
+            conn = self.connect()
+            rows = conn.execute('''
+            SELECT id, kind, key, new_coldkey, scheduled_block, execution_block, reminder_index
+            FROM pending_schedules WHERE resolved_block = ? AND status IN ('executed', 'replaced')
+            ''', (block_number,)).fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error reading the pending schedules of block {block_number} : {e}")
+            rows = []
+        for pending_key, schedule in list(self.pending.items()):
+            if schedule.scheduled_block == block_number:
+                del self.pending[pending_key]
+                # Its timers are skipped from now on.
+                schedule.status = 'reverted'
+        for row in rows:
+            schedule = PendingSchedule(*row)
+            if (schedule.kind, schedule.key) not in self.pending:
+                self.pending[(schedule.kind, schedule.key)] = schedule
+                self.push_timer(schedule)
+        (write or write_now)(self.save_revert, block_number)
+
+    def save_revert(self, block_number, conn=None):
+        """
+        Deletes the schedules a reorganised block added and reopens the ones it executed or replaced.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            conn.execute('DELETE FROM pending_schedules WHERE scheduled_block = ?', (block_number,))
+            conn.execute("UPDATE pending_schedules SET status = 'pending', resolved_block = NULL WHERE resolved_block = ? AND status IN ('executed', 'replaced')", (block_number,))
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error reverting the pending schedules of block {block_number} : {e}")
+
+    def advance(self, current_block_number, write=None):
+        """
+        Pops the timers due at `current_block_number`.
+
+        Returns:
+        list: (notice, schedule, blocks_left) tuples, where notice is 'reminder' or 'overdue'.
+        """
+        self.load()
+        write = write or write_now
+        notices = []
+        while self.timers and self.timers[0][0] <= current_block_number:
+            _, _, schedule = heapq.heappop(self.timers)
+            if schedule.status != 'pending':
+                continue
+            blocks_left = schedule.execution_block - current_block_number
+            if schedule.reminder_index < len(self.reminder_blocks):
+                if blocks_left > 0:
+                    notices.append(('reminder', schedule, blocks_left))
+                self.skip_passed_reminders(schedule, current_block_number)
+                write(self.save_status, schedule)
+                self.push_timer(schedule)
+            else:
+                schedule.status, schedule.resolved_block = 'overdue', current_block_number
+                self.pending.pop((schedule.kind, schedule.key), None)
+                write(self.save_status, schedule)
+                notices.append(('overdue', schedule, blocks_left))
+        return notices
+
+    def upcoming(self, current_block_number, within_blocks):
+        """
+        Returns the pending schedules executing within `within_blocks` blocks, served by the (status, execution_block) index.
+        """
+        try:
+            conn = self.connect()
+            rows = conn.execute('''
+            SELECT id, kind, key, new_coldkey, scheduled_block, execution_block, reminder_index, status, resolved_block
+            FROM pending_schedules WHERE status = 'pending' AND execution_block BETWEEN ? AND ?
+            ORDER BY execution_block
+            ''', (current_block_number, current_block_number + within_blocks)).fetchall()
+            return [PendingSchedule(*row) for row in rows]
+        except sqlite3.Error as e:
+            logging.error(f"Database error in upcoming schedules : {e}")
+            return []
+
+
+pending_schedules = PendingScheduleRegistry()
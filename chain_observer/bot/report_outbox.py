@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import sqlite3
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Delivery attempts (one per tick) of a report Discord does not accept before it is dropped.
+REPORT_MAX_ATTEMPTS = int(os.getenv('REPORT_MAX_ATTEMPTS', '25'))
+# Reports delivered per tick at most, oldest first.
+REPORT_DELIVERY_BATCH = int(os.getenv('REPORT_DELIVERY_BATCH', '50'))
+
+
+class OutboxReport:
+    def __init__(self, id, block_number, kind, webhook_url, report, proposal_hash=None, attempts=0):
+        self.id = id
+        self.block_number = block_number
+        self.kind = kind
+        self.webhook_url = webhook_url
+        self.report = json.loads(report) if isinstance(report, str) else report
+        self.proposal_hash = proposal_hash
+        self.attempts = attempts
+
+
+class ReportOutbox:
+    """
+    Reports waiting to be posted to Discord. A block's reports are added in the block's own transaction, so they are
+    committed together with everything the block wrote, and removed once Discord accepted them: a crash between the
+    commit and the posts delays the reports to the next tick instead of losing them.
+    """
+
+    def __init__(self, db_path=DB_PATH, max_attempts=None):
+        self.db_path = db_path
+        self.max_attempts = REPORT_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.tables_created = False
+
+    def create_tables(self, conn):
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS report_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            block_number INTEGER,
+            kind TEXT NOT NULL,
+            webhook_url TEXT NOT NULL,
+            report TEXT NOT NULL,
+            proposal_hash TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        # Tables created inside a transaction exist only once it commits; they are checked again until then.
+        self.tables_created = not conn.in_transaction
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self.tables_created:
+            self.create_tables(conn)
+        return conn
+
+    def add(self, block_number, reports, conn=None):
+        """
+        Adds the reports of a block.
+
+        Parameters:
+        block_number (int): The block the reports were produced for.
+        reports (list): (kind, report, webhook_url, proposal_hash) tuples; proposal_hash is set for the tally messages,
+            which are edited in place.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
+        """
+        if not reports:
+            return
+        rows = [(block_number, kind, webhook_url, json.dumps(report), proposal_hash) for kind, report, webhook_url, proposal_hash in reports]
+        sql = 'INSERT INTO report_outbox (block_number, kind, webhook_url, report, proposal_hash) VALUES (?, ?, ?, ?, ?)'
+        enclosing = conn is not None
+        try:
+            if enclosing:
+                if not self.tables_created:
+                    self.create_tables(conn)
+                conn.executemany(sql, rows)
+                return
+            conn = self.connect()
+            with conn:
+                conn.executemany(sql, rows)
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error adding the reports of block {block_number} to the outbox : {e}")
+
+    def pending(self, limit=None):
+        """
+        Returns the reports waiting to be posted, oldest first.
+        """
+        try:
+            conn = self.connect()
+            rows = conn.execute('''
+            SELECT id, block_number, kind, webhook_url, report, proposal_hash, attempts FROM report_outbox ORDER BY id LIMIT ?
+            ''', (REPORT_DELIVERY_BATCH if limit is None else limit,)).fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error reading the report outbox : {e}")
+            return []
+        return [OutboxReport(*row) for row in rows]
+
+    def delivered(self, entry):
+        """
+        Removes a report Discord accepted.
+        """
+        try:
+            conn = self.connect()
+            with conn:
+                conn.execute('DELETE FROM report_outbox WHERE id = ?', (entry.id,))
+        except sqlite3.Error as e:
+            logging.error(f"Database error removing report {entry.id} from the outbox : {e}")
+
+    def failed(self, entry):
+        """
+        Counts a failed delivery of a report; the report is dropped once it failed `max_attempts` times.
+        """
+        entry.attempts += 1
+        try:
+            conn = self.connect()
+            with conn:
+                if entry.attempts >= self.max_attempts:
+                    logging.error(f"Dropping the {entry.kind} report of block {entry.block_number} after {entry.attempts} failed deliveries.")
+                    conn.execute('DELETE FROM report_outbox WHERE id = ?', (entry.id,))
+                else:
+                    conn.execute('UPDATE report_outbox SET attempts = ? WHERE id = ?', (entry.attempts, entry.id))
+        except sqlite3.Error as e:
+            logging.error(f"Database error updating report {entry.id} in the outbox : {e}")
+
+
+report_outbox = ReportOutbox()
@@ -0,0 +1,246 @@
+import logging
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rule file (.toml, .yaml or .yml) declaring extra alerts; empty to disable.
+RULES_PATH = os.getenv('RULES_PATH', '')
+
+# Sink of rules whose matches are only archived, not posted.
+ARCHIVE_ONLY = 'archive'
+DEFAULT_SINK = 'coldkey_swap'
+DEFAULT_COLOR = 10181046
+
+
+def compare(op, expected):
+    """
+    Compiles one predicate operator into a function of the attribute value.
+    """
+    if op in ('in', 'not_in'):
+        values = frozenset(expected)
+        return (lambda value: value in values) if op == 'in' else (lambda value: value not in values)
+    if op == 'eq':
+        return lambda value: value == expected
+    if op == 'ne':
+        return lambda value: value != expected
+    if op in ('gt', 'gte', 'lt', 'lte'):
+        def ordered(value):
+            try:
+                if op == 'gt':
+                    return value > expected
+                if op == 'gte':
+                    return value >= expected
+                if op == 'lt':
+                    return value < expected
+                return value <= expected
+            except TypeError:
+                return False
+        return ordered
+    raise ValueError(f"Unknown operator {op}")
+
+
+def compile_path(path):
+    """
+    Splits an attribute path such as "amount", "0" or "dispatch_info.class" into its keys.
+    """
+    return tuple(int(part) if part.isdigit() else part for part in str(path).split('.'))
+
+
+def resolve(attributes, keys):
+    """
+    Returns the attribute at the compiled path, or None when it is missing.
+    """
+    value = attributes
+    for key in keys:
+        if isinstance(value, dict):
+            value = value.get(str(key))
+        elif isinstance(value, (list, tuple)) and isinstance(key, int) and key < len(value):
+            value = value[key]
+        else:
+            return None
+    return value
+
+
+class Rule:
+    """
+    One compiled rule: the event or call it applies to, its attribute predicates, its enrichment lookups and its sink.
+    """
+
+    def __init__(self, definition):
+        self.name = definition['name']
+        if ('event' in definition) == ('call' in definition):
+            raise ValueError(f"Rule {self.name} needs exactly one of event or call")
+        self.kind = 'event' if 'event' in definition else 'call'
+        module, _, item = definition[self.kind].partition('.')
+        if not module or not item:
+            raise ValueError(f"Rule {self.name}: expected Module.name, got {definition[self.kind]}")
+        self.key = (self.kind, module, item)
+        self.title = definition.get('title', self.name)
+        self.sink = definition.get('sink', DEFAULT_SINK)
+        self.color = definition.get('color', DEFAULT_COLOR)
+        self.predicates = []
+        for path, condition in (definition.get('where') or {}).items():
+            conditions = condition.items() if isinstance(condition, dict) else [('eq', condition)]
+            for op, expected in conditions:
+                self.predicates.append((compile_path(path), compare(op, expected)))
+        self.enrichment = [(str(path), compile_path(path), lookup) for path, lookup in (definition.get('enrich') or {}).items()]
+        for _, _, lookup in self.enrichment:
+            if lookup not in LOOKUPS:
+                raise ValueError(f"Rule {self.name}: unknown enrichment {lookup}")
+
+    def matches(self, attributes):
+        return all(predicate(resolve(attributes, keys)) for keys, predicate in self.predicates)
+
+    def enrich(self, attributes, db_manager, block_number=None):
+        """
+        Runs the rule's database lookups on the matched attributes, at `block_number` (the current mappings when None).
+        Returns {label: value} for the values found.
+        """
+        enriched = {}
+        for path, keys, lookup in self.enrichment:
+            value = resolve(attributes, keys)
+            if value is None:
+                continue
+            label, result = LOOKUPS[lookup](db_manager, value, block_number)
+            if result is not None:
+                enriched[f'{path} {label}'] = result
+        return enriched
+
+
+def validator_by_coldkey(db_manager, coldkey, block_number=None):
+    return 'validator', db_manager.get_validator_name(coldkey, block_number=block_number)[0]
+
+
+def validator_by_hotkey(db_manager, hotkey, block_number=None):
+    return 'validator', db_manager.get_validator_name(None, hotkey, block_number)[0]
+
+
+def owner_netuid(db_manager, coldkey, block_number=None):
+    return 'owner of subnet', db_manager.get_owner_netuid(coldkey, block_number)
+
+
+LOOKUPS = {
+    'validator_coldkey': validator_by_coldkey,
+    'validator_hotkey': validator_by_hotkey,
+    'owner': owner_netuid,
+}
+
+
+class RuleMatcher:
+    """
+    Rules indexed by (kind, module, event or call name): each event and extrinsic of a block costs one dictionary lookup,
+    and only the rules declared for it are evaluated, however many rules there are.
+    """
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self.index = {}
+        for rule in self.rules:
+            self.index.setdefault(rule.key, []).append(rule)
+        self.calls = {}
+        for kind, module, item in self.index:
+            if kind == 'call':
+                self.calls.setdefault(module, set()).add(item)
+
+    def match_block(self, extrinsics, events):
+        """
+        Returns (rule, match) for every event and extrinsic of a block matching a rule.
+        A match holds the source ("Module.name"), the extrinsic index and the attributes the predicates were checked on.
+        Call attributes are the call arguments by name, plus `signer` and `success`.
+        """
+        found = []
+        if not self.index:
+            return found
+        for event in events:
+            value = getattr(event, 'value', None)
+            if not value:
+                continue
+            rules = self.index.get(('event', value.get('module_id'), value.get('event_id')))
+            if rules:
+                attributes = value.get('attributes')
+                for rule in rules:
+                    if rule.matches(attributes):
+                        found.append((rule, {'source': f"{value['module_id']}.{value['event_id']}",
+                                             'extrinsic_idx': value.get('extrinsic_idx'), 'attributes': attributes}))
+        if not self.calls:
+            return found
+        outcomes = None
+        for idx, extrinsic in enumerate(extrinsics):
+            call = extrinsic.value.get('call') or {}
+            rules = self.index.get(('call', call.get('call_module'), call.get('call_function')))
+            if not rules:
+                continue
+            if outcomes is None:
+                outcomes = extrinsic_outcomes(events)
+            attributes = {arg['name']: arg['value'] for arg in call.get('call_args', [])}
+            attributes.update(signer=extrinsic.value.get('address'), success=outcomes.get(idx))
+            for rule in rules:
+                if rule.matches(attributes):
+                    found.append((rule, {'source': f"{call['call_module']}.{call['call_function']}",
+                                         'extrinsic_idx': idx, 'attributes': attributes}))
+        return found
+
+
+def extrinsic_outcomes(events):
+    """
+    Maps each extrinsic index of a block to True or False from its ExtrinsicSuccess / ExtrinsicFailed event.
+    """
+    outcomes = {}
+    for event in events:
+        value = getattr(event, 'value', None) or {}
+        if value.get('module_id') == 'System' and value.get('event_id') in ('ExtrinsicSuccess', 'ExtrinsicFailed'):
+            outcomes[value.get('extrinsic_idx')] = value['event_id'] == 'ExtrinsicSuccess'
+    return outcomes
+
+
+def load_rules(path):
+    """
+    Reads and compiles a rule file. Its rules are listed under `rule` (a TOML array of tables or a YAML list).
+    """
+    if path.endswith(('.yaml', '.yml')):
+        import yaml
+        with open(path) as f:
+            data = yaml.safe_load(f) or {}
+    else:
+        try:
+            import tomllib
+            with open(path, 'rb') as f:
+                data = tomllib.load(f)
+        except ImportError:
+            # Python < 3.11
+            import toml
+            data = toml.load(path)
+    return RuleMatcher(Rule(definition) for definition in data.get('rule', []))
+
+
+class RuleSet:
+    """
+    The rules of RULES_PATH, compiled again whenever the file changes. A file that fails to load keeps the previous rules.
+    """
+
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self.matcher = RuleMatcher()
+        self.mtime = None
+
+    def refresh(self):
+        """
+        Returns the current RuleMatcher, recompiling the rule file first if it changed.
+        """
+        if not self.path:
+            return self.matcher
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                self.mtime = mtime
+                self.matcher = load_rules(self.path)
+                logging.info(f"Loaded {len(self.matcher.rules)} rules from {self.path}.")
+        except Exception as e:
+            logging.error(f"Failed to load the rules of {self.path}, keeping the previous ones: {e}")
+        return self.matcher
+
+
+rule_set = RuleSet()
@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+import sqlite3
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+from db_manage.unit_of_work import write_now
+from chain_observer.bot.finality import FINALITY_WINDOW_BLOCKS
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+STAKE_FLOW = 'stake_flow'
+RAO_PER_TAO = 10 ** 9
+BLOCKS_PER_HOUR = 300
+
+# Net stake flow (added minus removed, in TAO) of a hotkey or subnet over the last hour / day that raises an alert.
+STAKE_FLOW_HOURLY_THRESHOLD_TAO = float(os.getenv('STAKE_FLOW_HOURLY_THRESHOLD_TAO', '1000'))
+STAKE_FLOW_DAILY_THRESHOLD_TAO = float(os.getenv('STAKE_FLOW_DAILY_THRESHOLD_TAO', '5000'))
+# Rate-of-change alert: the last hour's flow is this many times the hourly average of the rest of the day, and at least the minimum.
+# Keys without flow earlier in the day are left to the thresholds, as are all keys during the first hour of observation.
+STAKE_FLOW_RATE_FACTOR = float(os.getenv('STAKE_FLOW_RATE_FACTOR', '6'))
+STAKE_FLOW_RATE_MIN_TAO = float(os.getenv('STAKE_FLOW_RATE_MIN_TAO', '200'))
+
+# Rolling windows: (window length, bucket length) in blocks. A window spans a fixed ring of buckets, so it covers
+# between (length - bucket) and length blocks.
+WINDOWS = {
+    '1h': (BLOCKS_PER_HOUR, 25),
+    '24h': (24 * BLOCKS_PER_HOUR, BLOCKS_PER_HOUR),
+}
+STAKE_EVENTS = {'StakeAdded': 1, 'StakeRemoved': -1}
+
+
+class RollingSum:
+    """
+    Sum over the last buckets of a ring buffer. Moving forward clears only the buckets that fell out of the window.
+    """
+
+    def __init__(self, window_blocks, bucket_blocks, head=None, values=None):
+        self.bucket_blocks = bucket_blocks
+        self.size = window_blocks // bucket_blocks
+        self.head = head
+        self.values = values if values is not None else [0] * self.size
+        self.total = sum(self.values)
+
+    def advance(self, block_number):
+        bucket = block_number // self.bucket_blocks
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            for step in range(1, min(bucket - self.head, self.size) + 1):
+                slot = (self.head + step) % self.size
+                self.total -= self.values[slot]
+                self.values[slot] = 0
+            self.head = bucket
+
+    def add(self, block_number, amount):
+        """
+        Adds `amount` to the bucket of `block_number`; a negative amount takes back what an earlier block added.
+        Blocks that already left the window change nothing.
+        """
+        self.advance(block_number)
+        bucket = block_number // self.bucket_blocks
+        if self.head - bucket >= self.size:
+            return
+        self.values[bucket % self.size] += amount
+        self.total += amount
+
+    def sum(self, block_number):
+        self.advance(block_number)
+        return self.total
+
+    def expired(self, block_number):
+        """
+        True when nothing is left in the window at `block_number`.
+        """
+        self.advance(block_number)
+        return not any(self.values)
+
+
+class FlowAggregate:
+    """
+    Rolling net stake flow of one hotkey or subnet, with the alerts currently raised for it.
+    """
+
+    def __init__(self, windows=None, alerted=None):
+        self.windows = windows or {name: RollingSum(*WINDOWS[name]) for name in WINDOWS}
+        self.alerted = set(alerted or [])
+
+    def to_json(self):
+        return json.dumps({'windows': {name: [window.head, window.values] for name, window in self.windows.items()},
+                           'alerted': sorted(self.alerted)})
+
+    @classmethod
+    def from_json(cls, data):
+        data = json.loads(data)
+        windows = {}
+        for name, (window_blocks, bucket_blocks) in WINDOWS.items():
+            head, values = data['windows'].get(name, [None, None])
+            if values is not None and len(values) != window_blocks // bucket_blocks:
+                head, values = None, None
+            windows[name] = RollingSum(window_blocks, bucket_blocks, head, values)
+        return cls(windows, data.get('alerted'))
+
+
+def parse_stake_event(attributes):
+    """
+    Returns (hotkey, amount in RAO, netuid or None) of a StakeAdded / StakeRemoved event.
+    Older runtimes emit (coldkey, hotkey, amount); newer ones (coldkey, hotkey, tao amount, alpha amount, netuid, ...).
+    """
+    if isinstance(attributes, dict):
+        return attributes.get('hotkey'), int(attributes.get('tao_amount', attributes.get('amount')) or 0), attributes.get('netuid')
+    if isinstance(attributes, (list, tuple)) and len(attributes) >= 3:
+        netuid = attributes[4] if len(attributes) >= 5 else None
+        return attributes[1], int(attributes[2] or 0), netuid
+    return None, 0, None
+
+
+class StakeFlowMonitor:
+    """
+    Streaming aggregates of StakeAdded / StakeRemoved per hotkey and per subnet over the last hour and day.
+    Each block only touches the aggregates its stake events belong to, so it costs O(events); those aggregates are checked
+    against the thresholds and the rate of change and checkpointed in SQLite, so a restart keeps the windows.
+    """
+
+    def __init__(self, db_path=DB_PATH, hourly_threshold_tao=None, daily_threshold_tao=None, rate_factor=None, rate_min_tao=None):
+        self.db_path = db_path
+        self.thresholds = {
+            '1h': int((STAKE_FLOW_HOURLY_THRESHOLD_TAO if hourly_threshold_tao is None else hourly_threshold_tao) * RAO_PER_TAO),
+            '24h': int((STAKE_FLOW_DAILY_THRESHOLD_TAO if daily_threshold_tao is None else daily_threshold_tao) * RAO_PER_TAO),
+        }
+        self.rate_factor = STAKE_FLOW_RATE_FACTOR if rate_factor is None else rate_factor
+        self.rate_min = int((STAKE_FLOW_RATE_MIN_TAO if rate_min_tao is None else rate_min_tao) * RAO_PER_TAO)
+        self.aggregates = {}
+        self.last_block = None
+        self.started_block = None
+        # Heights reverted by a reorg, counted again when their canonical block is observed.
+        self.reopened = set()
+        self.last_prune = None
+        self.loaded = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS stake_flow (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            state TEXT NOT NULL,
+            PRIMARY KEY (scope, key)
+        )
+        ''')
+        # Stake amounts each recent block added, by aggregate, so a block reorganised out can be taken back.
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS stake_flow_blocks (
+            block_number INTEGER PRIMARY KEY,
+            block_hash TEXT,
+            amounts TEXT NOT NULL
+        )
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS stake_flow_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_block INTEGER NOT NULL,
+            started_block INTEGER NOT NULL
+        )
+        ''')
+        return conn
+
+    def load(self):
+        """
+        Loads the checkpointed aggregates once.
+        """
+        if self.loaded:
+            return
+        try:
+            conn = self.connect()
+            rows = conn.execute('SELECT scope, key, state FROM stake_flow').fetchall()
+            checkpoint = conn.execute('SELECT last_block, started_block FROM stake_flow_checkpoint WHERE id = 1').fetchone()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error loading stake flow : {e}")
+            rows, checkpoint = [], None
+        for scope, key, state in rows:
+            self.aggregates[(scope, key)] = FlowAggregate.from_json(state)
+        self.last_block, self.started_block = checkpoint if checkpoint else (None, None)
+        self.loaded = True
+
+    def reload(self):
+        """
+        Drops the in-memory aggregates so that the next block reloads them from the last checkpoint.
+        """
+        self.aggregates = {}
+        self.last_block = None
+        self.started_block = None
+        self.reopened = set()
+        self.last_prune = None
+        self.loaded = False
+
+    def check(self, aggregate, block_number):
+        """
+        Returns the alerts newly raised for an aggregate. A raised alert is re-armed once the flow is back under half its threshold.
+        """
+        alerts = []
+        sums = {name: window.sum(block_number) for name, window in aggregate.windows.items()}
+        for name, threshold in self.thresholds.items():
+            if abs(sums[name]) >= threshold:
+                if name not in aggregate.alerted:
+                    aggregate.alerted.add(name)
+                    alerts.append({'kind': 'threshold', 'window': name, 'flow': sums[name], 'threshold': threshold})
+            elif abs(sums[name]) < threshold / 2:
+                aggregate.alerted.discard(name)
+        hourly = sums['1h']
+        # Hourly average of the day outside the last hour, over the hours actually observed.
+        observed_hours = min(23, (block_number - self.started_block) // BLOCKS_PER_HOUR - 1)
+        baseline = (sums['24h'] - hourly) / observed_hours if observed_hours > 0 else 0
+        if baseline and abs(hourly) >= self.rate_min and abs(hourly) >= self.rate_factor * abs(baseline):
+            if 'rate' not in aggregate.alerted:
+                aggregate.alerted.add('rate')
+                alerts.append({'kind': 'rate', 'window': '1h', 'flow': hourly, 'baseline': baseline})
+        elif abs(hourly) < self.rate_min / 2:
+            aggregate.alerted.discard('rate')
+        return alerts
+
+    def process_block(self, block_number, events, block_hash=None, write=None):
+        """
+        Adds the stake events of a block to the aggregates and checkpoints them, with the amounts the block added
+        (kept for FINALITY_WINDOW_BLOCKS blocks, see `revert_block`).
+        Blocks at or before the checkpoint (re-observed or backfilled blocks) are ignored so that no flow is counted twice.
+        `write` (see BtChainObserver.write) queues the checkpoint into the block's unit of work; by default it is committed right away.
+
+        Returns:
+        list: The new alerts, as dicts with scope ('hotkey' or 'netuid'), key, kind ('threshold' or 'rate'), window and flow (RAO).
+        """
+        self.load()
+        if self.last_block is not None and block_number <= self.last_block and block_number not in self.reopened:
+            return []
+        self.reopened.discard(block_number)
+        if self.started_block is None:
+            self.started_block = block_number
+        touched = {}
+        amounts = {}
+        for event in events:
+            value = getattr(event, 'value', None) or {}
+            sign = STAKE_EVENTS.get(value.get('event_id')) if value.get('module_id') == 'SubtensorModule' else None
+            if sign is None:
+                continue
+            hotkey, amount, netuid = parse_stake_event(value.get('attributes'))
+            scopes = [('hotkey', str(hotkey))] if hotkey else []
+            if netuid is not None:
+                scopes.append(('netuid', str(netuid)))
+            for scope in scopes:
+                aggregate = self.aggregates.get(scope)
+                if aggregate is None:
+                    aggregate = self.aggregates[scope] = FlowAggregate()
+                for window in aggregate.windows.values():
+                    window.add(block_number, sign * amount)
+                touched[scope] = aggregate
+                amounts[scope] = amounts.get(scope, 0) + sign * amount
+        alerts = []
+        for (scope, key), aggregate in touched.items():
+            for alert in self.check(aggregate, block_number):
+                alerts.append(dict(alert, scope=scope, key=key))
+        expired = self.prune(block_number)
+        self.checkpoint(block_number, touched, expired, (block_hash, amounts), write)
+        return alerts
+
+    def revert_block(self, block_number, block_hash=None, write=None):
+        """
+        Takes back the amounts a block reorganised out added (when its recorded hash is `block_hash`), and reopens its
+        height so that the canonical block there is counted although it is before the checkpoint.
+        """
+        self.load()
+        try:
+            conn = self.connect()
+            row = conn.execute('SELECT block_hash, amounts FROM stake_flow_blocks WHERE block_number = ?', (block_number,)).fetchone()
+            conn.commit()
+        except sqlite3.Error as e:
+            logging.error(f"Database error reading the stake flow of block {block_number} : {e}")
+            return
+        touched = {}
+        if row and (block_hash is None or row[0] in (None, block_hash)):
+            for scope, key, amount in json.loads(row[1]):
+                aggregate = self.aggregates.get((scope, key))
+                if aggregate is None:
+                    continue
+                for window in aggregate.windows.values():
+                    window.add(block_number, -amount)
+                touched[(scope, key)] = aggregate
+        self.reopened.add(block_number)
+        if not touched:
+            return
+        (write or write_now)(self.save_revert, block_number, touched)
+
+    def save_revert(self, block_number, touched, conn=None):
+        """
+        Saves the aggregates a reverted block changed and drops the amounts it added.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            conn.execute('DELETE FROM stake_flow_blocks WHERE block_number = ?', (block_number,))
+            conn.executemany('INSERT OR REPLACE INTO stake_flow (scope, key, state) VALUES (?, ?, ?)',
+                             [(scope, key, aggregate.to_json()) for (scope, key), aggregate in touched.items()])
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error reverting the stake flow of block {block_number} : {e}")
+
+    def prune(self, block_number):
+        """
+        Once an hour, drops the aggregates with no stake event in the last day, which keeps memory bounded by the active keys.
+        """
+        if self.last_prune is not None and block_number - self.last_prune < BLOCKS_PER_HOUR:
+            return []
+        self.last_prune = block_number
+        expired = [scope for scope, aggregate in self.aggregates.items() if aggregate.windows['24h'].expired(block_number)]
+        for scope in expired:
+            del self.aggregates[scope]
+        return expired
+
+    def checkpoint(self, block_number, touched, expired, block_amounts=(None, {}), write=None):
+        self.last_block = max(block_number, self.last_block or block_number)
+        if not touched and not expired:
+            # Nothing to save; replaying a block without stake events changes nothing.
+            return
+        (write or write_now)(self.save_checkpoint, block_number, touched, expired, block_amounts, self.last_block, self.started_block)
+
+    def save_checkpoint(self, block_number, touched, expired, block_amounts, last_block, started_block, conn=None):
+        """
+        Saves the aggregates a block touched, drops the expired ones and moves the checkpoint to `last_block`.
+        The aggregates are serialized when the write runs, so a queued checkpoint saves their latest state.
+        """
+        block_hash, amounts = block_amounts
+        enclosing = conn is not None
+        try:
+            conn = conn or self.connect()
+            if amounts:
+                conn.execute('INSERT OR REPLACE INTO stake_flow_blocks (block_number, block_hash, amounts) VALUES (?, ?, ?)',
+                             (block_number, block_hash, json.dumps([[scope, key, amount] for (scope, key), amount in amounts.items()])))
+            conn.execute('DELETE FROM stake_flow_blocks WHERE block_number <= ?', (block_number - FINALITY_WINDOW_BLOCKS,))
+            conn.executemany('INSERT OR REPLACE INTO stake_flow (scope, key, state) VALUES (?, ?, ?)',
+                             [(scope, key, aggregate.to_json()) for (scope, key), aggregate in touched.items()])
+            conn.executemany('DELETE FROM stake_flow WHERE scope = ? AND key = ?', expired)
+            conn.execute('INSERT OR REPLACE INTO stake_flow_checkpoint (id, last_block, started_block) VALUES (1, ?, ?)',
+                         (last_block, started_block))
+            if not enclosing:
+                conn.commit()
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error checkpointing stake flow : {e}")
+
+stake_flow = StakeFlowMonitor()
@@ -0,0 +1,173 @@
+import csv
+import logging
+import os
+from dotenv import load_dotenv
+from chain_observer.utils.ss58 import ss58_decode, ss58_encode, public_key_from_hex, PUBLIC_KEY_LENGTH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# CSV file of watched coldkeys and hotkeys, one "address,label" per line (SS58 or 0x-prefixed public key); empty to disable.
+WATCHLIST_PATH = os.getenv('WATCHLIST_PATH', '')
+# Size in bits of the Bloom filter checked before the key set; 0 disables it.
+WATCHLIST_BLOOM_BITS = int(os.getenv('WATCHLIST_BLOOM_BITS', '0'))
+# Discord channel of the watchlist reports (WATCHLIST_DISCORD_WEBHOOK_URL).
+WATCHLIST = 'watchlist'
+
+BLOOM_HASHES = 4
+# Lengths of an SS58 address of a 32 byte key with a one or two byte format prefix (usually 47 to 49, less with leading zero bytes).
+SS58_LENGTHS = range(40, 51)
+HEX_KEY_LENGTH = 2 + 2 * PUBLIC_KEY_LENGTH
+
+
+def address_key(value):
+    """
+    Returns the public key of an event attribute that holds an address (SS58 string, 0x hex string or 32 bytes), otherwise None.
+    """
+    if isinstance(value, str):
+        length = len(value)
+        try:
+            if length == HEX_KEY_LENGTH and value.startswith('0x'):
+                return bytes.fromhex(value[2:])
+            if length in SS58_LENGTHS:
+                return ss58_decode(value)
+        except ValueError:
+            return None
+    elif isinstance(value, (bytes, bytearray)) and len(value) == PUBLIC_KEY_LENGTH:
+        return bytes(value)
+    return None
+
+
+def attribute_keys(value, path=''):
+    """
+    Yields (attribute path, public key) for every address found in a (possibly nested) event attribute value.
+    """
+    if isinstance(value, dict):
+        for name, item in value.items():
+            yield from attribute_keys(item, f'{path}.{name}' if path else str(name))
+    elif isinstance(value, (list, tuple)):
+        for index, item in enumerate(value):
+            yield from attribute_keys(item, f'{path}[{index}]' if path else str(index))
+    else:
+        key = address_key(value)
+        if key is not None:
+            yield path, key
+
+
+class BloomFilter:
+    """
+    Bloom filter over public keys. Keys are already uniformly distributed, so slices of the key serve as the hash values.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.array = bytearray((bits + 7) // 8)
+
+    def positions(self, key):
+        return [int.from_bytes(key[i * 8:(i + 1) * 8], 'little') % self.bits for i in range(BLOOM_HASHES)]
+
+    def add(self, key):
+        for position in self.positions(key):
+            self.array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.array[position >> 3] & (1 << (position & 7)) for position in self.positions(key))
+
+
+class Watchlist:
+    """
+    Watched coldkeys and hotkeys, held as public key bytes so that a lookup costs the same whatever the size of the list
+    and whatever SS58 format an address is written in. The file is read again when it changes.
+    """
+
+    def __init__(self, path=WATCHLIST_PATH, bloom_bits=None):
+        self.path = path
+        self.bloom_bits = WATCHLIST_BLOOM_BITS if bloom_bits is None else bloom_bits
+        self.labels = {}
+        self.bloom = None
+        self.mtime = None
+        self.read_failed = False
+
+    def load(self):
+        """
+        Reads the watchlist file. Lines starting with # and unparsable addresses are skipped.
+        """
+        labels = {}
+        with open(self.path, newline='') as f:
+            for row in csv.reader(f):
+                if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                    continue
+                address = row[0].strip()
+                try:
+                    key = public_key_from_hex(address) if address.startswith('0x') else ss58_decode(address)
+                except ValueError:
+                    logging.warning(f"Skipping invalid watchlist address {address}.")
+                    continue
+                labels[key] = row[1].strip() if len(row) > 1 and row[1].strip() else address
+        self.set_keys(labels)
+        logging.info(f"Loaded {len(labels)} watched addresses from {self.path}.")
+
+    def set_keys(self, labels):
+        """
+        Replaces the watched keys with `labels` (public key bytes -> label).
+        """
+        bloom = None
+        if self.bloom_bits:
+            bloom = BloomFilter(self.bloom_bits)
+            for key in labels:
+                bloom.add(key)
+        self.labels, self.bloom = labels, bloom
+
+    def refresh(self):
+        """
+        Loads the file on first use and again whenever its modification time changed. Returns False without a watchlist file.
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime != self.mtime:
+                self.load()
+                self.mtime = mtime
+            self.read_failed = False
+        except OSError as e:
+            # Keep the last loaded keys and log once until the file can be read again.
+            if not self.read_failed:
+                logging.error(f"Failed to read the watchlist {self.path}: {e}")
+            self.read_failed = True
+        return True
+
+    def label(self, key):
+        if self.bloom is not None and key not in self.bloom:
+            return None
+        return self.labels.get(key)
+
+    def match_events(self, events):
+        """
+        Checks every address attribute of every event against the watched keys.
+
+        Returns:
+        list: A dict per match with the event name, extrinsic index, attribute path, address and label.
+        """
+        if not self.labels:
+            return []
+        matches = []
+        for event in events:
+            value = getattr(event, 'value', None)
+            if not value or not value.get('attributes'):
+                continue
+            for path, key in attribute_keys(value['attributes']):
+                label = self.label(key)
+                if label is not None:
+                    matches.append({
+                        'event': f"{value.get('module_id')}.{value.get('event_id')}",
+                        'extrinsic_idx': value.get('extrinsic_idx'),
+                        'attribute': path or '0',
+                        'address': ss58_encode(key),
+                        'label': label,
+                    })
+        return matches
+
+
+watchlist = Watchlist()
@@ -0,0 +1,244 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Hedge delay used until an endpoint has LATENCY_MIN_SAMPLES latencies, and the lower bound of the p95 deadline.
+HEDGE_DEFAULT_DELAY_MS = float(os.getenv('HEDGE_DEFAULT_DELAY_MS', '2000'))
+HEDGE_MIN_DELAY_MS = float(os.getenv('HEDGE_MIN_DELAY_MS', '250'))
+# Consecutive failures before an endpoint is taken out of rotation, and for how long.
+ENDPOINT_FAILURE_THRESHOLD = int(os.getenv('ENDPOINT_FAILURE_THRESHOLD', '3'))
+ENDPOINT_COOLDOWN_SECONDS = float(os.getenv('ENDPOINT_COOLDOWN_SECONDS', '30'))
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+# SubstrateInterface methods that can be called on a ChainClient. Each call runs whole on one endpoint's connection, so
+# connection state (runtime_config, metadata, ...) and lazy results such as query_map iterators are not exposed.
+CLIENT_METHODS = frozenset({
+    'get_block', 'get_block_hash', 'get_block_header', 'get_block_number', 'get_chain_head', 'get_chain_finalised_head',
+    'get_events', 'get_metadata_module', 'query', 'rpc_request',
+})
+
+
+def get_endpoints():
+    """
+    Returns the configured chain endpoints: SUBTENSOR_ENDPOINTS (comma separated, by priority) or SUBTENSOR_ENDPOINT.
+    """
+    endpoints = os.getenv('SUBTENSOR_ENDPOINTS') or os.getenv('SUBTENSOR_ENDPOINT') or ''
+    return [endpoint.strip() for endpoint in endpoints.split(',') if endpoint.strip()]
+
+
+class MetadataCache:
+    """
+    Decoded runtime metadata shared by the connections to one chain, passed to SubstrateInterface as its `cache_region`.
+    Keys are 'METADATA_<spec version>'. Spec versions are only unique within a chain (finney, testnet and devnets can run
+    different metadata under the same number), so there is one cache per genesis hash, see `metadata_cache_for`.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+
+
+# Metadata caches by genesis hash.
+metadata_caches = {}
+metadata_caches_lock = threading.Lock()
+
+
+def metadata_cache_for(genesis_hash):
+    """
+    Returns the metadata cache of the chain with this genesis hash, shared by every endpoint of that chain.
+    """
+    with metadata_caches_lock:
+        if genesis_hash not in metadata_caches:
+            metadata_caches[genesis_hash] = MetadataCache()
+        return metadata_caches[genesis_hash]
+
+
+def connect_substrate(url):
+    """
+    Opens a connection to `url`. Its metadata cache is picked from the chain's genesis hash before any runtime is loaded,
+    so the endpoints of a chain decode each runtime once and different chains never share metadata.
+    """
+    # Imported here so that importing this module does not load substrate-interface.
+    from substrateinterface.base import SubstrateInterface
+    substrate = SubstrateInterface(url=url, ss58_format=42, use_remote_preset=True)
+    genesis_hash = substrate.rpc_request('chain_getBlockHash', [0])['result']
+    substrate.cache_region = metadata_cache_for(genesis_hash)
+    return substrate
+
+
+class Endpoint:
+    """
+    One chain endpoint: its connection, opened on first use, its latency per method and its health.
+    A single worker thread serializes the requests of the endpoint, as a websocket connection is not shared between threads.
+    """
+
+    def __init__(self, url, priority, connect=connect_substrate):
+        self.url = url
+        self.priority = priority
+        self.connect = connect
+        self.substrate = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'endpoint-{priority}')
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(lambda: deque(maxlen=LATENCY_WINDOW))
+        self.in_flight = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+
+    def healthy(self, now=None):
+        return (now or time.monotonic()) >= self.unhealthy_until
+
+    def samples(self, method=None):
+        with self.lock:
+            if method is not None:
+                return list(self.latencies.get(method, ()))
+            return [latency for latencies in self.latencies.values() for latency in latencies]
+
+    def percentile(self, pct, method=None):
+        """
+        Latency percentile of `method`, or of every method when None.
+        """
+        ordered = sorted(self.samples(method))
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def hedge_delay(self, method):
+        """
+        Seconds to wait for this endpoint before hedging `method`: the p95 latency of that method once enough samples exist.
+        A cheap call such as get_block_hash is not held to the deadline of get_block or get_events.
+        """
+        if len(self.samples(method)) < LATENCY_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY_MS / 1000
+        return max(HEDGE_MIN_DELAY_MS / 1000, self.percentile(95, method))
+
+    def request(self, method, args, kwargs):
+        start = time.monotonic()
+        try:
+            if self.substrate is None:
+                self.substrate = self.connect(self.url)
+            result = getattr(self.substrate, method)(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+        self.record_success(method, time.monotonic() - start)
+        return result
+
+    def submit(self, method, args, kwargs):
+        with self.lock:
+            self.in_flight += 1
+        return self.executor.submit(self.request, method, args, kwargs)
+
+    def record_success(self, method, latency):
+        with self.lock:
+            self.latencies[method].append(latency)
+            self.failures = 0
+            self.unhealthy_until = 0.0
+
+    def record_failure(self):
+        """
+        Counts a failed request and drops the connection, closing its websocket, so that the next request reconnects.
+        Runs on the endpoint's worker thread, the only one using the connection.
+        """
+        substrate, self.substrate = self.substrate, None
+        if substrate is not None:
+            try:
+                substrate.close()
+            except Exception as e:
+                logging.warning(f"Failed to close the connection to {self.url}: {e}")
+        with self.lock:
+            self.failures += 1
+            if self.failures >= ENDPOINT_FAILURE_THRESHOLD:
+                self.unhealthy_until = time.monotonic() + ENDPOINT_COOLDOWN_SECONDS
+                logging.warning(f"Endpoint {self.url} failed {self.failures} times in a row, out of rotation for {ENDPOINT_COOLDOWN_SECONDS}s.")
+
+    def stats(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "url": self.url,
+            "healthy": self.healthy(),
+            "failures": self.failures,
+            "in_flight": self.in_flight,
+            "samples": len(self.samples()),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "p95_ms_by_method": {method: round(self.percentile(95, method) * 1000, 1) for method in list(self.latencies)},
+        }
+
+
+class ChainClient:
+    """
+    SubstrateInterface stand-in spread over several endpoints.
+    A request goes to the best endpoint first; if it has not answered within that endpoint's p95 latency,
+    the same request is sent to the next one and the first answer wins. Failed requests fail over to the next endpoint.
+    The SubstrateInterface methods of CLIENT_METHODS can be called on it (get_block_hash, get_block, get_events, ...).
+    """
+
+    def __init__(self, endpoints=None, connect=connect_substrate):
+        urls = endpoints if endpoints is not None else get_endpoints()
+        self.endpoints = [Endpoint(url, priority, connect) for priority, url in enumerate(urls)]
+
+    def ranked_endpoints(self):
+        """
+        Healthy endpoints first, idle before busy, then by configured priority.
+        Unhealthy endpoints are kept at the end so that they are tried when nothing else is left.
+        """
+        now = time.monotonic()
+        return sorted(self.endpoints, key=lambda endpoint: (not endpoint.healthy(now), endpoint.in_flight > 0, endpoint.priority))
+
+    def call(self, method, *args, **kwargs):
+        """
+        Runs a SubstrateInterface method with hedging and failover.
+        Raises the last error when every endpoint failed.
+        """
+        candidates = self.ranked_endpoints()
+        if not candidates:
+            raise ConnectionError("No chain endpoint configured: set SUBTENSOR_ENDPOINTS or SUBTENSOR_ENDPOINT.")
+        pending = {}
+        last_error = None
+        while candidates or pending:
+            if candidates and not pending:
+                endpoint = candidates.pop(0)
+                pending[endpoint.submit(method, args, kwargs)] = endpoint
+            # Wait for the youngest request's hedge deadline, unless there is nobody left to hedge to.
+            timeout = list(pending.values())[-1].hedge_delay(method) if candidates else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                endpoint = candidates.pop(0)
+                logging.info(f"Hedging {method} to {endpoint.url} after {timeout * 1000:.0f} ms.")
+                pending[endpoint.submit(method, args, kwargs)] = endpoint
+                continue
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    logging.warning(f"{method} failed on {endpoint.url}: {e}")
+                    last_error = e
+        raise last_error
+
+    def stats(self):
+        return [endpoint.stats() for endpoint in self.endpoints]
+
+    def __getattr__(self, method):
+        if method not in CLIENT_METHODS:
+            raise AttributeError(f"{type(self).__name__} does not proxy {method}: only the methods of CLIENT_METHODS are spread over the endpoints.")
+        return lambda *args, **kwargs: self.call(method, *args, **kwargs)
@@ -1,13 +1,8 @@
-from substrateinterface import Keypair
+from chain_observer.utils.ss58 import ss58_encode
 
 def convert_hex_to_ss58(hex_string: str, ss58_format: int = 42) -> str:
-
-    public_key_hex = hex_string[-64:]
-    
-    public_key = bytes.fromhex(public_key_hex)
-    
-    if len(public_key) != 32:
-        raise ValueError('Public key should be 32 bytes long')
-    
-    keypair = Keypair(public_key=public_key, ss58_format=ss58_format)
-    return keypair.ss58_address
\ No newline at end of file
+    """
+    Converts the 32 byte public key at the end of a hex string into its SS58 address.
+    Uses the cached SS58 codec instead of building a Keypair for every key.
+    """
+    return ss58_encode(hex_string, ss58_format)
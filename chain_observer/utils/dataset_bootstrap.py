@@ -0,0 +1,93 @@
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from db_manage.snapshots import snapshot_store, dataset_version, record_version, SNAPSHOT_MAX_CATCHUP_BLOCKS
+from chain_observer.utils.refresh_coordinator import request_owner_refresh, request_validator_refresh
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def bootstrap_dataset(network, store=snapshot_store):
+    """
+    Loads the newest snapshot of a network into its database when the dataset there is older, or of unknown age.
+
+    Returns:
+    dict: The header of the loaded snapshot, or None when the dataset was kept.
+    """
+    path = store.latest(network.name)
+    if path is None:
+        return None
+    header = store.header(path)
+    version = dataset_version(network.db_path)
+    if version is not None and version >= header['block_number']:
+        logging.info(f"Dataset of network {network.name} is at block {version}, not older than the snapshot {path}.")
+        return None
+    return store.import_snapshot(network.db_path, path)
+
+
+def apply_coldkey_swap(manager, old_coldkey, new_coldkey, block_number=None):
+    """
+    Moves the validator and subnet owner rows of a swapped coldkey to the new one, as the observer does on ColdkeySwapped.
+    """
+    if manager.get_validator_name(old_coldkey)[2]:
+        manager.update_validator_coldkey(old_coldkey, new_coldkey, block_number)
+    netuid = manager.get_owner_netuid(old_coldkey)
+    if netuid:
+        manager.update_owner_coldkey(netuid, new_coldkey, block_number)
+
+
+def catch_up_dataset(network, from_block, substrate=None, to_block=None, max_blocks=None):
+    """
+    Brings the dataset from `from_block` up to the head by replaying the key swaps and dissolves of the blocks in between.
+    Only the events of those blocks are fetched; a gap longer than `max_blocks` requests full refreshes instead.
+
+    Returns:
+    int: The block the dataset is now up to date with.
+    """
+    max_blocks = SNAPSHOT_MAX_CATCHUP_BLOCKS if max_blocks is None else max_blocks
+    if substrate is None:
+        from chain_observer.utils.chain_client import ChainClient
+        substrate = ChainClient(network.endpoints)
+    to_block = substrate.get_block_number(None) if to_block is None else to_block
+    manager = network.db_manager
+    if to_block - from_block > max_blocks:
+        logging.info(f"Dataset of network {network.name} is {to_block - from_block} blocks behind, refreshing it in full.")
+        for ticket in [request_owner_refresh(manager, debounce=False), request_validator_refresh(manager, debounce=False)]:
+            ticket.wait()
+    else:
+        dissolved = False
+        for block_number in range(from_block + 1, to_block + 1):
+            events = substrate.get_events(block_hash=substrate.get_block_hash(block_id=block_number))
+            for event in events:
+                value = getattr(event, 'value', None) or {}
+                if value.get('module_id') != 'SubtensorModule':
+                    continue
+                if value.get('event_id') == 'ColdkeySwapped':
+                    apply_coldkey_swap(manager, value['attributes'].get('old_coldkey'), value['attributes'].get('new_coldkey'),
+                                       block_number)
+                elif value.get('event_id') == 'NetworkRemoved':
+                    dissolved = True
+        if dissolved:
+            request_owner_refresh(manager).wait()
+        logging.info(f"Dataset of network {network.name} caught up from block {from_block} to {to_block}.")
+    conn = sqlite3.connect(network.db_path)
+    try:
+        record_version(conn, to_block, datetime.now(timezone.utc).isoformat())
+    finally:
+        conn.close()
+    return to_block
+
+
+def start_dataset(network, store=snapshot_store):
+    """
+    Startup of a network's dataset: loads the newest snapshot if it is newer than the dataset.
+
+    Returns:
+    int: The block to catch up from, or None when unknown. After a load it is the snapshot's block; otherwise the later of
+    the dataset's block and the last observed block, since the observer kept the dataset up to date while it ran.
+    """
+    header = bootstrap_dataset(network, store)
+    if header:
+        return header['block_number']
+    starts = [block for block in (dataset_version(network.db_path), network.db_manager.get_last_block_number()) if block is not None]
+    return max(starts) if starts else None
@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Threads running the scheduled jobs, 0 to size the pool from the jobs (two per network in main.py, 4 otherwise).
+# A due job waits for a free thread instead of starting one more.
+SCHEDULER_MAX_WORKERS = int(os.getenv('SCHEDULER_MAX_WORKERS', '0'))
+# Seconds between two logs of the per-job run-time statistics.
+SCHEDULER_STATS_INTERVAL_SECONDS = float(os.getenv('SCHEDULER_STATS_INTERVAL_SECONDS', '3600'))
+
+# Overlap policies: a tick of a job that is still running is dropped, or kept to run right after the current run.
+SKIP = 'skip'
+QUEUE = 'queue'
+
+
+class JobStats:
+    """
+    Run-time statistics of a job over its last runs.
+    """
+
+    def __init__(self, window=1000):
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.queued = 0
+        self.overruns = 0
+        self.durations = deque(maxlen=window)
+
+    def record(self, duration, failed, interval):
+        self.runs += 1
+        self.failures += failed
+        self.overruns += duration > interval
+        self.durations.append(duration)
+
+    def summary(self):
+        durations = sorted(self.durations)
+        summary = {"runs": self.runs, "failures": self.failures, "skipped": self.skipped, "queued": self.queued, "overruns": self.overruns}
+        if durations:
+            summary.update({
+                "last_seconds": round(self.durations[-1], 3),
+                "mean_seconds": round(sum(durations) / len(durations), 3),
+                "p95_seconds": round(durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3),
+                "max_seconds": round(durations[-1], 3),
+            })
+        return summary
+
+
+class Job:
+    def __init__(self, name, func, interval, args=(), initial_delay=0, overlap=SKIP, max_queued=1):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.args = args
+        self.overlap = overlap
+        self.max_queued = max_queued
+        self.next_run = time.monotonic() + initial_delay
+        self.running = False
+        self.pending = 0
+        self.stats = JobStats()
+
+
+class JobScheduler:
+    """
+    Runs jobs at fixed intervals on a bounded thread pool.
+    Ticks are computed from the schedule (start + k * interval), not from when the previous tick ran, so they do not drift;
+    ticks missed while the process was busy are skipped rather than run in a burst.
+    A job never runs twice at the same time: a tick arriving while it runs is skipped (SKIP) or kept for right after
+    the current run (QUEUE, up to `max_queued` ticks).
+    """
+
+    def __init__(self, max_workers=None, stats_interval=None):
+        self.max_workers = max_workers or SCHEDULER_MAX_WORKERS or 4
+        self.stats_interval = SCHEDULER_STATS_INTERVAL_SECONDS if stats_interval is None else stats_interval
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scheduler')
+        self.condition = threading.Condition()
+        self.jobs = {}
+        self.stopped = False
+
+    def add_job(self, name, func, interval, *args, initial_delay=0, overlap=SKIP, max_queued=1):
+        """
+        Schedules `func(*args)` every `interval` seconds, the first time after `initial_delay` seconds.
+        """
+        with self.condition:
+            self.jobs[name] = Job(name, func, interval, args, initial_delay, overlap, max_queued)
+            self.condition.notify_all()
+        return self.jobs[name]
+
+    def tick(self, job, now):
+        """
+        Handles a due tick of `job` and moves its next run to the following slot of its schedule.
+        """
+        missed = int((now - job.next_run) // job.interval)
+        if missed:
+            job.stats.skipped += missed
+            logging.warning(f"Job {job.name} missed {missed} ticks.")
+        job.next_run += (missed + 1) * job.interval
+        if not job.running:
+            self.submit(job)
+        elif job.overlap == QUEUE and job.pending < job.max_queued:
+            job.pending += 1
+            job.stats.queued += 1
+        else:
+            job.stats.skipped += 1
+            logging.warning(f"Job {job.name} is still running, skipping this tick.")
+
+    def submit(self, job):
+        job.running = True
+        self.executor.submit(self.run_job, job)
+
+    def run_job(self, job):
+        start = time.monotonic()
+        failed = False
+        try:
+            job.func(*job.args)
+        except Exception as e:
+            failed = True
+            logging.exception(f"Job {job.name} failed: {e}")
+        duration = time.monotonic() - start
+        with self.condition:
+            job.stats.record(duration, failed, job.interval)
+            if duration > job.interval:
+                logging.warning(f"Job {job.name} took {duration:.3f} seconds, longer than its {job.interval} second interval.")
+            job.running = False
+            if job.pending and not self.stopped:
+                job.pending -= 1
+                self.submit(job)
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        Returns the run-time statistics of every job by name.
+        """
+        with self.condition:
+            return {name: job.stats.summary() for name, job in self.jobs.items()}
+
+    def run(self):
+        """
+        Runs the jobs until `shutdown` is called. Blocks the calling thread.
+        """
+        next_stats = time.monotonic() + self.stats_interval
+        with self.condition:
+            while not self.stopped:
+                now = time.monotonic()
+                for job in self.jobs.values():
+                    if job.next_run <= now:
+                        self.tick(job, now)
+                if self.stats_interval and now >= next_stats:
+                    next_stats = now + self.stats_interval
+                    for name, job in self.jobs.items():
+                        logging.info(f"Job {name}: {job.stats.summary()}")
+                wake_at = min([job.next_run for job in self.jobs.values()] + [next_stats if self.stats_interval else now + 60])
+                self.condition.wait(max(0, wake_at - time.monotonic()))
+
+    def shutdown(self, wait=True):
+        """
+        Stops scheduling ticks, drops queued ones and, with `wait`, waits for the running jobs to finish.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        self.executor.shutdown(wait=wait)
@@ -1,20 +1,30 @@
-import bittensor as bt
 from dotenv import load_dotenv
 import os
 import asyncio
 import json
-import websockets
-from chain_observer.utils.convert_hex_to_ss58 import convert_hex_to_ss58
+from chain_observer.utils.ss58 import batch_encode
 
 load_dotenv()
 
 chain_endpoint = os.getenv("SUBTENSOR_ENDPOINT")
 
-subtensor = bt.Subtensor(network=chain_endpoint)
+subtensors = {}
 
-async def rpc_requests(params):
+def get_subtensor(endpoint=None):
+    """
+    Returns the shared Subtensor connection of an endpoint (SUBTENSOR_ENDPOINT by default),
+    importing bittensor and connecting on first use only.
+    """
+    endpoint = endpoint or chain_endpoint
+    if endpoint not in subtensors:
+        import bittensor as bt
+        subtensors[endpoint] = bt.Subtensor(network=endpoint)
+    return subtensors[endpoint]
+
+async def rpc_requests(params, endpoint=None):
+    import websockets
     async with websockets.connect(
-        chain_endpoint, ping_interval=None
+        endpoint or chain_endpoint, ping_interval=None
     ) as ws:
         
         responses = []
@@ -47,22 +57,20 @@ def generate_params(module_hex_code, subnet_uids):
 
     return params
 
-def get_subnet_owner_coldkeys(rpc_call_module_name):
-    subnet_uids = subtensor.get_subnets()
+def get_subnet_owner_coldkeys(rpc_call_module_name, endpoint=None):
+    subnet_uids = get_subtensor(endpoint).get_subnets()
     subnet_uids.remove(0)
     subtensor_module_hex_code = '0x658faa385070e074c85bf6b568cf055536e3e82152c8758267395fe524fbbd16'
     if rpc_call_module_name == 'SubtensorModule':
         module_hex_code = subtensor_module_hex_code
     params = generate_params(module_hex_code, subnet_uids)
     
-    responses = asyncio.run(rpc_requests(params))
+    responses = asyncio.run(rpc_requests(params, endpoint))
     
-    owner_coldkeys = []
     response = responses[0]
-    for uid, result in zip(subnet_uids, response):
-        if result:  
-            coldkey = convert_hex_to_ss58(result[1])
-            owner_coldkeys.append({uid: coldkey}) 
+    owned_subnets = [(uid, result[1]) for uid, result in zip(subnet_uids, response) if result]
+    coldkeys = batch_encode([value for _, value in owned_subnets])
+    owner_coldkeys = [{uid: coldkey} for (uid, _), coldkey in zip(owned_subnets, coldkeys)]
     return owner_coldkeys
 
 if __name__ == "__main__":
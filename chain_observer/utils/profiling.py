@@ -0,0 +1,136 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+PROFILING_DIR = os.getenv('PROFILING_DIR', 'profiles')
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', '50'))
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '1.0'))
+BLOCK_LATENCY_BUDGET_MS = float(os.getenv('PROFILING_BLOCK_BUDGET_MS', '6000'))
+REFRESH_LATENCY_BUDGET_MS = float(os.getenv('PROFILING_REFRESH_BUDGET_MS', '600000'))
+TRACEMALLOC_FRAMES = 10
+TOP_STATS = 40
+
+# Captures running on this thread: a scope nested in a profiled one (e.g. a refresh run inline) is not profiled again.
+# Blocks of other networks and dataset refreshes run on other threads and are profiled independently.
+capture_state = threading.local()
+tracing_lock = threading.Lock()
+
+
+class ProfileScope:
+    """
+    Handle yielded by `profile_if_slow`; the label (usually the block number) can be set once it is known.
+    """
+    def __init__(self, kind, label=None):
+        self.kind = kind
+        self.label = label
+        self.elapsed_ms = None
+        self.saved_path = None
+
+
+def rotate_profiles(directory=None, max_files=None):
+    """
+    Deletes the oldest profile captures so that at most `max_files` captures remain in the directory.
+    """
+    directory = directory or PROFILING_DIR
+    max_files = PROFILING_MAX_FILES if max_files is None else max_files
+    try:
+        captures = sorted(
+            (entry for entry in os.scandir(directory) if entry.name.endswith('.prof')),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in captures[:max(0, len(captures) - max_files)]:
+            os.remove(entry.path)
+            summary_path = entry.path[:-len('.prof')] + '.txt'
+            if os.path.exists(summary_path):
+                os.remove(summary_path)
+    except OSError as e:
+        logging.error(f"Error rotating profiles in {directory}: {e}")
+
+
+def start_tracing():
+    """
+    Starts tracemalloc for the rest of the profiling session, on the first sampled run. It is never stopped here:
+    starting and stopping it for every block would cost more than the profiling itself.
+    """
+    with tracing_lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+
+def save_profile(scope, profiler, snapshot, directory=None):
+    """
+    Writes the cProfile stats (`.prof`, loadable with pstats/snakeviz) and a readable summary with the
+    top functions and top allocation sites (`.txt`) of a slow block or refresh.
+    """
+    directory = directory or PROFILING_DIR
+    os.makedirs(directory, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+    base_path = os.path.join(directory, f"{scope.kind}_{scope.label}_{timestamp}")
+    profiler.dump_stats(base_path + '.prof')
+
+    stream = io.StringIO()
+    stream.write(f"{scope.kind} {scope.label} took {scope.elapsed_ms:.1f} ms\n\n")
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(TOP_STATS)
+    if snapshot is not None:
+        current, peak = tracemalloc.get_traced_memory()
+        stream.write(f"\nTraced memory: {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB\n")
+        stream.write("Top allocations (tracemalloc):\n")
+        for stat in snapshot.statistics('lineno')[:TOP_STATS]:
+            stream.write(f"{stat}\n")
+    with open(base_path + '.txt', 'w') as f:
+        f.write(stream.getvalue())
+    return base_path + '.prof'
+
+
+@contextmanager
+def profile_if_slow(kind, budget_ms, label=None):
+    """
+    Profiles the wrapped code with cProfile when PROFILING_ENABLED is set and keeps the capture, with the top
+    allocation sites from tracemalloc (running for the whole session), only if it took longer than `budget_ms`.
+    Fast runs are discarded, so only the outliers end up in PROFILING_DIR. Does nothing when profiling is disabled.
+    Each thread profiles its own runs; a run nested in a profiled run of the same thread is covered by the outer capture.
+    """
+    scope = ProfileScope(kind, label)
+    if not PROFILING_ENABLED or getattr(capture_state, 'active', False) or random.random() >= PROFILING_SAMPLE_RATE:
+        yield scope
+        return
+
+    start_tracing()
+    profiler = cProfile.Profile()
+    start_time = time.perf_counter()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        # From Python 3.12 cProfile allows one active profiler per process, e.g. a refresh being profiled on another thread.
+        logging.info(f"Not profiling {kind} {scope.label}: {e}")
+        yield scope
+        return
+    capture_state.active = True
+    try:
+        yield scope
+    finally:
+        capture_state.active = False
+        try:
+            profiler.disable()
+            scope.elapsed_ms = (time.perf_counter() - start_time) * 1000
+            if scope.elapsed_ms > budget_ms:
+                snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+                scope.saved_path = save_profile(scope, profiler, snapshot)
+                rotate_profiles()
+                logging.warning(f"{kind} {scope.label} took {scope.elapsed_ms:.1f} ms (budget {budget_ms:.0f} ms), profile saved to {scope.saved_path}")
+        except Exception as e:
+            logging.error(f"Error saving profile of {kind} {scope.label}: {e}")
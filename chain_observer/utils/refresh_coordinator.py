@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Requests for the same refresh arriving within this many seconds are merged into one run.
+REFRESH_DEBOUNCE_SECONDS = float(os.getenv('REFRESH_DEBOUNCE_SECONDS', '30'))
+# A burst of requests never delays a refresh by more than this many seconds after its first request.
+REFRESH_MAX_DELAY_SECONDS = float(os.getenv('REFRESH_MAX_DELAY_SECONDS', '120'))
+
+
+class RefreshTicket:
+    """
+    Handle on one refresh run, shared by every request merged into it.
+    """
+
+    def __init__(self, key, func, due_at, latest_at):
+        self.key = key
+        self.func = func
+        self.due_at = due_at
+        self.latest_at = latest_at
+        self.requests = 1
+        self.done = threading.Event()
+        self.error = None
+
+    def wait(self, timeout=None):
+        """
+        Blocks until the run finished. Returns False on timeout, and raises the error of a failed run.
+        """
+        if not self.done.wait(timeout):
+            return False
+        if self.error is not None:
+            raise self.error
+        return True
+
+
+class RefreshCoordinator:
+    """
+    Single-flight runner of the dataset refreshes (owner and validator tables).
+    Requests for a key that is already waiting are merged into its pending run, whose start is pushed back by the debounce
+    window up to the maximum delay. A request arriving while its key runs schedules one follow-up run, since the running one
+    may have read the chain before the change. All refreshes run one after the other on a single worker thread, so they never overlap.
+    """
+
+    def __init__(self, debounce_seconds=None, max_delay_seconds=None):
+        self.debounce_seconds = REFRESH_DEBOUNCE_SECONDS if debounce_seconds is None else debounce_seconds
+        self.max_delay_seconds = REFRESH_MAX_DELAY_SECONDS if max_delay_seconds is None else max_delay_seconds
+        self.condition = threading.Condition()
+        self.pending = {}
+        self.running = None
+        self.worker = None
+
+    def request(self, key, func, debounce=True):
+        """
+        Asks for `func` to run for `key` (e.g. ('owners', db_path)). With `debounce` False the run starts as soon as the worker is free.
+
+        Returns:
+        RefreshTicket: The run this request was merged into; call `wait()` on it to block until the refresh completed.
+        """
+        now = time.monotonic()
+        delay = self.debounce_seconds if debounce else 0
+        with self.condition:
+            ticket = self.pending.get(key)
+            if ticket is None:
+                ticket = RefreshTicket(key, func, now + delay, now + self.max_delay_seconds)
+                self.pending[key] = ticket
+            else:
+                ticket.requests += 1
+                ticket.due_at = min(max(ticket.due_at, now + delay), ticket.latest_at) if debounce else now
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self.run_worker, name='refresh-coordinator', daemon=True)
+                self.worker.start()
+            self.condition.notify_all()
+            return ticket
+
+    def next_ticket(self):
+        """
+        Waits for the earliest due pending run and takes it out of the pending runs.
+        """
+        with self.condition:
+            while True:
+                if self.pending:
+                    ticket = min(self.pending.values(), key=lambda pending: pending.due_at)
+                    wait = ticket.due_at - time.monotonic()
+                    if wait <= 0:
+                        del self.pending[ticket.key]
+                        self.running = ticket
+                        return ticket
+                    self.condition.wait(wait)
+                else:
+                    self.condition.wait()
+
+    def run_worker(self):
+        while True:
+            ticket = self.next_ticket()
+            logging.info(f"Refreshing {ticket.key[0]} ({ticket.requests} merged requests).")
+            try:
+                ticket.func()
+            except Exception as e:
+                logging.error(f"Error in refreshing {ticket.key[0]}: {e}")
+                ticket.error = e
+            finally:
+                with self.condition:
+                    self.running = None
+                ticket.done.set()
+
+
+refresh_coordinator = RefreshCoordinator()
+
+
+def request_owner_refresh(manager, debounce=True):
+    """
+    Requests a reload of the owners table of `manager` (a DBManager) and returns its RefreshTicket.
+    """
+    def refresh():
+        from chain_observer.utils.profiling import profile_if_slow, REFRESH_LATENCY_BUDGET_MS
+        with profile_if_slow('owner_refresh', REFRESH_LATENCY_BUDGET_MS, manager.get_last_block_number()):
+            manager.update_whole_owner_coldkeys()
+    return refresh_coordinator.request(('owners', manager.db_path), refresh, debounce)
+
+
+def request_validator_refresh(manager, debounce=True):
+    """
+    Requests a reload of the validators table of `manager` (a DBManager) and returns its RefreshTicket.
+    """
+    def refresh():
+        from chain_observer.utils.profiling import profile_if_slow, REFRESH_LATENCY_BUDGET_MS
+        with profile_if_slow('validator_refresh', REFRESH_LATENCY_BUDGET_MS, manager.get_last_block_number()):
+            manager.update_whole_validator_coldkeys()
+    return refresh_coordinator.request(('validators', manager.db_path), refresh, debounce)
@@ -0,0 +1,124 @@
+"""
+SS58 address codec for 32 byte public keys (AccountId).
+
+Encodes and decodes without building a `Keypair` per key, caches the most recent results
+and offers batch variants for storage query results and events.
+"""
+import hashlib
+from functools import lru_cache
+
+SS58_PREFIX = b'SS58PRE'
+DEFAULT_SS58_FORMAT = 42
+PUBLIC_KEY_LENGTH = 32
+CACHE_SIZE = 65536
+
+BASE58_ALPHABET = b'123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+# Two base58 digits per division halves the big-integer work of encoding.
+BASE58_PAIRS = [bytes([BASE58_ALPHABET[i // 58], BASE58_ALPHABET[i % 58]]) for i in range(58 * 58)]
+
+
+def b58encode(data):
+    number = int.from_bytes(data, 'big')
+    digits = []
+    while number:
+        number, remainder = divmod(number, 58 * 58)
+        digits.append(BASE58_PAIRS[remainder])
+    encoded = b''.join(reversed(digits)).lstrip(b'1')
+    leading_zeros = len(data) - len(data.lstrip(b'\0'))
+    return (b'1' * leading_zeros + encoded).decode()
+
+
+def b58decode(text):
+    data = text.encode()
+    number = 0
+    try:
+        for char in data:
+            number = number * 58 + BASE58_INDEX[char]
+    except KeyError:
+        raise ValueError(f'Invalid base58 character in {text}')
+    leading_zeros = len(data) - len(data.lstrip(b'1'))
+    return b'\0' * leading_zeros + number.to_bytes((number.bit_length() + 7) // 8, 'big')
+
+
+def format_prefix(ss58_format):
+    """
+    Returns the address type prefix bytes of an SS58 format (simple for 0-63, full for 64-16383).
+    """
+    if 0 <= ss58_format < 64:
+        return bytes([ss58_format])
+    if 64 <= ss58_format < 16384:
+        return bytes([
+            ((ss58_format & 0b0000_0000_1111_1100) >> 2) | 0b0100_0000,
+            (ss58_format >> 8) | ((ss58_format & 0b0000_0000_0000_0011) << 6),
+        ])
+    raise ValueError(f'Invalid SS58 format: {ss58_format}')
+
+
+def checksum(payload):
+    return hashlib.blake2b(SS58_PREFIX + payload, digest_size=64).digest()[:2]
+
+
+def public_key_from_hex(hex_string):
+    """
+    Returns the 32 byte public key at the end of a hex string (storage values may carry a prefix).
+    """
+    public_key = bytes.fromhex(hex_string[-2 * PUBLIC_KEY_LENGTH:])
+    if len(public_key) != PUBLIC_KEY_LENGTH:
+        raise ValueError('Public key should be 32 bytes long')
+    return public_key
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def ss58_encode(public_key, ss58_format=DEFAULT_SS58_FORMAT):
+    """
+    Encodes a public key (bytes or hex string) into its SS58 address.
+    """
+    if isinstance(public_key, str):
+        public_key = public_key_from_hex(public_key)
+    elif len(public_key) != PUBLIC_KEY_LENGTH:
+        raise ValueError('Public key should be 32 bytes long')
+    payload = format_prefix(ss58_format) + public_key
+    return b58encode(payload + checksum(payload))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def ss58_decode(address, ss58_format=None):
+    """
+    Decodes an SS58 address into its 32 byte public key.
+    Raises ValueError on a bad checksum, length or, when `ss58_format` is given, a different format.
+    """
+    data = b58decode(address)
+    if len(data) < 3:
+        raise ValueError(f'Invalid SS58 address: {address}')
+    prefix_length = 1 if data[0] < 64 else 2
+    if prefix_length == 1:
+        address_format = data[0]
+    else:
+        address_format = ((data[0] & 0b0011_1111) << 2) | (data[1] >> 6) | ((data[1] & 0b0011_1111) << 8)
+    public_key = data[prefix_length:-2]
+    if len(public_key) != PUBLIC_KEY_LENGTH:
+        raise ValueError(f'Invalid SS58 address length: {address}')
+    if checksum(data[:-2]) != data[-2:]:
+        raise ValueError(f'Invalid SS58 checksum: {address}')
+    if ss58_format is not None and address_format != ss58_format:
+        raise ValueError(f'Invalid SS58 format {address_format}, expected {ss58_format}: {address}')
+    return public_key
+
+
+def batch_encode(public_keys, ss58_format=DEFAULT_SS58_FORMAT):
+    """
+    Encodes a list of public keys (bytes or hex strings) into SS58 addresses, in order.
+    """
+    return [ss58_encode(public_key, ss58_format) for public_key in public_keys]
+
+
+def batch_decode(addresses, ss58_format=None):
+    """
+    Decodes a list of SS58 addresses into public keys, in order.
+    """
+    return [ss58_decode(address, ss58_format) for address in addresses]
+
+
+def cache_info():
+    return {'encode': ss58_encode.cache_info(), 'decode': ss58_decode.cache_info()}
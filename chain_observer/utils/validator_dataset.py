@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import os
+from dotenv import load_dotenv
+from chain_observer.utils.ss58 import ss58_encode, PUBLIC_KEY_LENGTH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Keys per state_getKeysPaged page, and per state_queryStorageAt batch (nodes cap pages at 1000 keys).
+STORAGE_PAGE_SIZE = int(os.getenv('STORAGE_PAGE_SIZE', '500'))
+# Delegates with less stake (root stake on dynamic TAO runtimes, see STAKE_MAPS) are left out of the validators table.
+VALIDATOR_MIN_STAKE_TAO = float(os.getenv('VALIDATOR_MIN_STAKE_TAO', '1000'))
+
+RAO_PER_TAO = 10 ** 9
+MODULE = 'SubtensorModule'
+# Storage maps read for every delegate hotkey: (storage item, key hasher).
+DELEGATES = ('Delegates', 'Blake2_128Concat')
+OWNER = ('Owner', 'Blake2_128Concat')
+# Storage maps holding the stake of a hotkey in RAO, first one the runtime has: (storage item, second key or None).
+# Before dynamic TAO, TotalHotkeyStake holds its total stake. Dynamic TAO runtimes only keep the stake per subnet,
+# in the subnet's alpha, in TotalHotkeyAlpha; on the root subnet (netuid 0) alpha is TAO, so its root stake is read.
+STAKE_MAPS = [('TotalHotkeyStake', None), ('TotalHotkeyAlpha', (0).to_bytes(2, 'little'))]
+
+
+class StakeStorageMissing(Exception):
+    pass
+
+
+def twox128(data):
+    # Imported here: xxhash comes with substrate-interface and is only needed when the chain is read.
+    import xxhash
+    return xxhash.xxh64(data, seed=0).intdigest().to_bytes(8, 'little') + xxhash.xxh64(data, seed=1).intdigest().to_bytes(8, 'little')
+
+
+def storage_prefix(module, item):
+    """
+    Returns the 0x-prefixed storage prefix of a storage item: twox128(module) ++ twox128(item).
+    """
+    return '0x' + (twox128(module.encode()) + twox128(item.encode())).hex()
+
+
+def hash_key(hasher, key):
+    if hasher == 'Blake2_128Concat':
+        return hashlib.blake2b(key, digest_size=16).digest() + key
+    if hasher == 'Identity':
+        return key
+    raise ValueError(f"Unsupported hasher {hasher}")
+
+
+def map_key(prefix, hasher, key):
+    """
+    Returns the storage key of `key` (bytes) in a map with the given prefix and key hasher.
+    """
+    return prefix + hash_key(hasher, key).hex()
+
+
+def double_map_key(prefix, hashers, key1, key2):
+    """
+    Returns the storage key of (`key1`, `key2`) (bytes) in a double map with the given prefix and key hashers.
+    """
+    return prefix + (hash_key(hashers[0], key1) + hash_key(hashers[1], key2)).hex()
+
+
+def key_account(storage_key):
+    """
+    Returns the account (32 bytes) at the end of a storage key of a map keyed by account with a concat or identity hasher.
+    """
+    return bytes.fromhex(storage_key[-2 * PUBLIC_KEY_LENGTH:])
+
+
+def decode_u64(value):
+    return int.from_bytes(bytes.fromhex(value[2:]), 'little') if value else None
+
+
+def decode_account(value):
+    return ss58_encode(bytes.fromhex(value[2:])) if value else None
+
+
+class ChainValidatorLoader:
+    """
+    Reads the validator dataset straight from chain storage at one block: the delegate hotkeys are enumerated page by page
+    with state_getKeysPaged, and the owner coldkey and stake of each page are read with one state_queryStorageAt.
+    Rows are yielded page by page, so neither the key space nor the owner map is ever held in memory.
+    The runtime metadata only tells which stake map the runtime has and its key hashers; values are decoded from their
+    SCALE bytes directly (account ids and u64).
+    """
+
+    def __init__(self, substrate, page_size=None):
+        self.substrate = substrate
+        self.page_size = page_size or STORAGE_PAGE_SIZE
+        self.prefixes = {item: storage_prefix(MODULE, item) for item, _ in (DELEGATES, OWNER)}
+
+    def rpc(self, method, params):
+        response = self.substrate.rpc_request(method, params)
+        if 'error' in response:
+            raise ConnectionError(f"{method} failed: {response['error']}")
+        return response['result']
+
+    def key_pages(self, prefix, block_hash):
+        """
+        Yields the storage keys under `prefix` one page at a time.
+        """
+        start_key = None
+        while True:
+            keys = self.rpc('state_getKeysPaged', [prefix, self.page_size, start_key or prefix, block_hash])
+            if keys:
+                yield keys
+            if len(keys) < self.page_size:
+                return
+            start_key = keys[-1]
+
+    def read(self, keys, block_hash):
+        """
+        Reads many storage keys in one request. Returns {key: 0x value or None}.
+        """
+        values = dict.fromkeys(keys)
+        for change_set in self.rpc('state_queryStorageAt', [keys, block_hash]):
+            for key, value in change_set['changes']:
+                values[key] = value
+        return values
+
+    def stake_key_function(self, block_hash):
+        """
+        Returns a function giving the storage key of a hotkey's stake, in the first map of STAKE_MAPS that the runtime
+        at `block_hash` has. Raises StakeStorageMissing if it has none, rather than loading delegates without their stake.
+        """
+        for item, second_key in STAKE_MAPS:
+            storage_function = self.substrate.get_metadata_storage_function(MODULE, item, block_hash=block_hash)
+            if storage_function is None:
+                continue
+            prefix = storage_prefix(MODULE, item)
+            hashers = storage_function.get_param_hashers()
+            logging.info(f"Reading validator stakes from {MODULE}.{item}")
+            if second_key is None:
+                return lambda hotkey: map_key(prefix, hashers[0], hotkey)
+            return lambda hotkey: double_map_key(prefix, hashers, hotkey, second_key)
+        raise StakeStorageMissing(f"The runtime at {block_hash} has none of the stake maps {[item for item, _ in STAKE_MAPS]}.")
+
+    def validators(self, block_hash=None):
+        """
+        Yields the delegates of the chain as lists of (coldkey, hotkey, stake in RAO) tuples, one list per page.
+        """
+        block_hash = block_hash or self.rpc('chain_getFinalizedHead', [])
+        stake_key = self.stake_key_function(block_hash)
+        for keys in self.key_pages(self.prefixes[DELEGATES[0]], block_hash):
+            hotkeys = [key_account(key) for key in keys]
+            owner_keys = [map_key(self.prefixes[OWNER[0]], OWNER[1], hotkey) for hotkey in hotkeys]
+            stake_keys = [stake_key(hotkey) for hotkey in hotkeys]
+            values = self.read(owner_keys + stake_keys, block_hash)
+            # The stake maps default to 0: a hotkey without an entry has no stake.
+            yield [(decode_account(values[owner_key]), ss58_encode(hotkey), decode_u64(values[hotkey_stake_key]) or 0)
+                   for hotkey, owner_key, hotkey_stake_key in zip(hotkeys, owner_keys, stake_keys)]
@@ -1,34 +1,175 @@
-import sentry_sdk
 import sqlite3
 from dotenv import load_dotenv
 import os
-import requests
 import time
 import logging
-from chain_observer.utils.owner_coldkeys import get_subnet_owner_coldkeys
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 DB_PATH = 'database/db.sqlite3'
+# Source of the validators table: 'taostats' reads it from the TaoStats API, 'chain' reads it from chain storage
+# (TaoStats then only supplies display names).
+VALIDATOR_SOURCE = os.getenv('VALIDATOR_SOURCE', 'taostats')
+
+# valid_to of the history rows that are still current.
+OPEN_ENDED = 2 ** 63 - 1
+# Block-versioned history of the dataset tables: table -> (history table, key column, versioned column, carried columns).
+# A history row maps its key to the versioned column for the blocks valid_from <= block < valid_to.
+MAPPING_HISTORY = {
+    'validators': ('validator_history', 'hot_key', 'cold_key', ('name',)),
+    'owners': ('owner_history', 'net_uid', 'owner_coldkey', ()),
+}
+
+
+def enable_wal(conn):
+    """
+    Switches the database of `conn` to write-ahead logging. The mode is stored in the file, so it is set once for good:
+    readers (the query API) then see the last commit without taking locks that block the observer's commits.
+    """
+    mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    if mode != 'wal':
+        logging.warning(f"Could not switch the database to WAL mode, journal mode is {mode}.")
+    return mode
+
+
+def create_history_tables(cursor):
+    """
+    Creates the mapping history tables with their interval indexes: (key, valid_from, valid_to) on both sides of each
+    mapping, so the row valid at a block is found with one index seek.
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS validator_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cold_key TEXT,
+        hot_key TEXT,
+        name TEXT,
+        valid_from INTEGER,
+        valid_to INTEGER
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS validator_history_coldkey ON validator_history (cold_key, valid_from, valid_to)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS validator_history_hotkey ON validator_history (hot_key, valid_from, valid_to)')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS owner_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        net_uid TEXT,
+        owner_coldkey TEXT,
+        valid_from INTEGER,
+        valid_to INTEGER
+    )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS owner_history_coldkey ON owner_history (owner_coldkey, valid_from, valid_to)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS owner_history_netuid ON owner_history (net_uid, valid_from, valid_to)')
+    # First block covered by the history of each table; lookups of earlier blocks use the current table.
+    cursor.execute('CREATE TABLE IF NOT EXISTS mapping_history (name TEXT PRIMARY KEY, start_block INTEGER)')
+
+
+def history_start(cursor, table):
+    """
+    Returns the first block covered by the history of a dataset table, or None when it has no history yet.
+    """
+    try:
+        result = cursor.execute('SELECT start_block FROM mapping_history WHERE name = ?', (table,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return result[0] if result else None
+
+
+def sync_history(conn, table, block_number):
+    """
+    Brings the history of a dataset table in line with the table's rows from `block_number` on: the mappings that changed
+    or disappeared are closed at that block, and the new ones are opened there.
+    The changes are not committed, so they land in the caller's transaction.
+    """
+    history, key, value, carried = MAPPING_HISTORY[table]
+    cursor = conn.cursor()
+    create_history_tables(cursor)
+    columns = (key, value) + carried
+    current = {row[0]: row[1:] for row in cursor.execute(f'SELECT {", ".join(columns)} FROM {table}')}
+    open_rows = {row[1]: (row[0], row[2:]) for row in
+                 cursor.execute(f'SELECT id, {", ".join(columns)}, valid_from FROM {history} WHERE valid_to = ?', (OPEN_ENDED,))}
+    for mapping_key, (row_id, values) in open_rows.items():
+        current_values = current.get(mapping_key)
+        if current_values is not None and current_values[0] == values[0]:
+            if current_values[1:] != values[1:-1]:
+                cursor.execute(f'UPDATE {history} SET {", ".join(f"{column} = ?" for column in carried)} WHERE id = ?',
+                               current_values[1:] + (row_id,))
+        elif values[-1] >= block_number:
+            cursor.execute(f'DELETE FROM {history} WHERE id = ?', (row_id,))
+        else:
+            cursor.execute(f'UPDATE {history} SET valid_to = ? WHERE id = ?', (block_number, row_id))
+    opened = [(mapping_key,) + values + (block_number, OPEN_ENDED) for mapping_key, values in current.items()
+              if mapping_key not in open_rows or open_rows[mapping_key][1][0] != values[0]]
+    cursor.executemany(f'INSERT INTO {history} ({", ".join(columns)}, valid_from, valid_to) VALUES ({", ".join("?" * (len(columns) + 2))})',
+                       opened)
+    cursor.execute('INSERT OR IGNORE INTO mapping_history (name, start_block) VALUES (?, ?)', (table, block_number))
+    logging.info(f"{history} synced at block {block_number}: {len(opened)} mappings opened.")
+
+
+def split_history(cursor, history, match_column, match_value, value_column, new_value, block_number):
+    """
+    Remaps the history rows matching `match_value` at `block_number` to `new_value` from that block on: each such row is
+    closed at the block and continued with the new value until the old row's valid_to, so swaps found by a backfill land
+    in the middle of the history. Replaying a swap changes nothing, since the old rows no longer cover its block.
+    """
+    cursor.execute(f'SELECT * FROM {history} WHERE {match_column} = ? AND valid_from <= ? AND valid_to > ?',
+                   (match_value, block_number, block_number))
+    columns = [description[0] for description in cursor.description]
+    for row in [dict(zip(columns, values)) for values in cursor.fetchall()]:
+        if row[value_column] == new_value:
+            continue
+        row_id = row.pop('id')
+        if row['valid_from'] == block_number:
+            cursor.execute(f'DELETE FROM {history} WHERE id = ?', (row_id,))
+        else:
+            cursor.execute(f'UPDATE {history} SET valid_to = ? WHERE id = ?', (block_number, row_id))
+        row.update({value_column: new_value, 'valid_from': block_number})
+        cursor.execute(f'INSERT INTO {history} ({", ".join(row)}) VALUES ({", ".join("?" * len(row))})', tuple(row.values()))
+
+
+def unsplit_history(cursor, history, key_column, value_column, old_value, new_value, block_number):
+    """
+    Undoes `split_history` for a remap of `old_value` to `new_value` at `block_number`: the rows the remap opened at that
+    block are merged back into the rows it closed there.
+
+    Returns:
+    list: The keys whose mapping was restored.
+    """
+    cursor.execute(f'SELECT id, {key_column}, valid_to FROM {history} WHERE {value_column} = ? AND valid_from = ?',
+                   (new_value, block_number))
+    restored = []
+    for row_id, key, valid_to in cursor.fetchall():
+        closed = cursor.execute(f'SELECT id FROM {history} WHERE {key_column} = ? AND {value_column} = ? AND valid_to = ?',
+                                (key, old_value, block_number)).fetchone()
+        if closed is None:
+            continue
+        cursor.execute(f'DELETE FROM {history} WHERE id = ?', (row_id,))
+        cursor.execute(f'UPDATE {history} SET valid_to = ? WHERE id = ?', (valid_to, closed[0]))
+        restored.append(key)
+    return restored
+
 
 class DBManager:
     
-    def __init__(self):
+    def __init__(self, db_path=DB_PATH, chain_endpoint=None):
         """
-        initialize the database connection with conn and cursor and also get the TAOSTATS_API_KEY from the environment variable.
+        get the TAOSTATS_API_KEY from the environment variable.
+        Connections are opened per query, so creating the manager (and importing this module) does not touch the database.
+        `db_path` is the SQLite file of the observed network and `chain_endpoint` the node its owner table is read from
+        (SUBTENSOR_ENDPOINT when None).
         """       
-        conn = sqlite3.connect(DB_PATH)      
-        if not conn:
-            raise Exception("Database connection failed.")        
         self.TAOSTATS_API_KEY = os.getenv("TAOSTATS_API_KEY")
+        self.db_path = db_path
+        self.chain_endpoint = chain_endpoint
         
-    def create_table_if_not_exist(self, table_name):
+    def create_table_if_not_exist(self, table_name, cursor=None):
         """
-        create table if not exist
-        """          
-        conn = sqlite3.connect(DB_PATH)   
-        cursor = conn.cursor()
+        create table if not exist, through `cursor` when given (e.g. inside an enclosing transaction)
+        """
+        if cursor is None:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
         
         sql = f'''
         CREATE TABLE IF NOT EXISTS {table_name} (
@@ -38,21 +179,35 @@ class DBManager:
         '''
         cursor.execute(sql)
         
-    def get_validator_name(self, coldkey, hotkey=None):
+    def get_validator_name(self, coldkey, hotkey=None, block_number=None):
         """
         Retrieves the name and hot_key of a validator based on their coldkey.
         
         Parameters:
         coldkey (str): The coldkey of the validator.
-        
+        hotkey (str): The hotkey of the validator, looked up when coldkey is None.
+        block_number (int): The block the mapping is looked up at, in the validator history; None for the current one.
+
         Returns:
         tuple: (name, hot_key, status) where name and hot_key are the values of the validator if found,
             otherwise None, and status is 1 if the coldkey exists, otherwise 0.
         """        
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         try:
-            if coldkey:
+            if self.use_history(cursor, 'validators', block_number):
+                if coldkey:
+                    cursor.execute('''
+                    SELECT name, hot_key FROM validator_history WHERE cold_key = ? AND valid_from <= ? AND valid_to > ?
+                    ORDER BY valid_from DESC LIMIT 1
+                    ''', (coldkey, block_number, block_number))
+                else:
+                    cursor.execute('''
+                    SELECT name, cold_key FROM validator_history WHERE hot_key = ? AND valid_from <= ? AND valid_to > ?
+                    ORDER BY valid_from DESC LIMIT 1
+                    ''', (hotkey, block_number, block_number))
+                result = cursor.fetchone()
+            elif coldkey:
                 cursor.execute('SELECT name, hot_key FROM validators WHERE cold_key = ?', (coldkey,))
                 result = cursor.fetchone()
             else:
@@ -66,21 +221,28 @@ class DBManager:
             logging.exception(f"Database error in get_validator_name : {e}")
             return None, None, 0
 
-    def get_owner_netuid(self, coldkey):
+    def get_owner_netuid(self, coldkey, block_number=None):
         """
         Retrieves the name of the owner based on their coldkey.
         
         Parameters:
         coldkey (str): The coldkey of the owner.
+        block_number (int): The block the mapping is looked up at, in the owner history; None for the current one.
         
         Returns:
         tuple: (name, status) where name is the value of the owner if found, otherwise None, and status is 1 if the coldkey exists, otherwise 0.
         """
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute('SELECT net_uid FROM owners WHERE owner_coldkey = ?', (coldkey,))
+            if self.use_history(cursor, 'owners', block_number):
+                cursor.execute('''
+                SELECT net_uid FROM owner_history WHERE owner_coldkey = ? AND valid_from <= ? AND valid_to > ?
+                ORDER BY valid_from DESC LIMIT 1
+                ''', (coldkey, block_number, block_number))
+            else:
+                cursor.execute('SELECT net_uid FROM owners WHERE owner_coldkey = ?', (coldkey,))
             result = cursor.fetchone()
             if result:
                 return result[0]
@@ -89,13 +251,67 @@ class DBManager:
         except sqlite3.Error as e:
             logging.exception(f"Database error in get_owner_name : {e}")
             return None
+
+    def use_history(self, cursor, table, block_number):
+        """
+        Whether a lookup at `block_number` is answered from the history of `table`. Blocks before the start of the
+        history, and lookups without a block, are answered from the current table.
+        """
+        if block_number is None:
+            return False
+        start = history_start(cursor, table)
+        return start is not None and block_number >= start
+
+    def history_block(self):
+        """
+        Returns the block a dataset refresh takes effect at in the history: the block after the last observed one.
+        """
+        last_block_number = self.get_last_block_number()
+        return last_block_number + 1 if last_block_number is not None else 0
+
+    def sync_mapping_history(self, block_number=None):
+        """
+        Records the validators and owners tables in their history from `block_number` on
+        (the block after the last observed one by default).
+        """
+        block_number = self.history_block() if block_number is None else block_number
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for table in MAPPING_HISTORY:
+                sync_history(conn, table, block_number)
+            conn.commit()
+        finally:
+            conn.close()
     
-    def verify_update_block_number(self, current_block_number):   
-        try:            
-            conn = sqlite3.connect(DB_PATH)
+    def get_last_block_number(self):
+        """
+        Returns the last processed block number stored in block_number_table, or None if there is none.
+        """
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            cursor.execute('SELECT current_block_number FROM block_number_table LIMIT 1')
+            result = cursor.fetchone()
+            return int(result[0]) if result else None
+        except sqlite3.Error as e:
+            logging.error(f"Database error in get_last_block_number : {e}")
+            return None
+
+    def verify_update_block_number(self, current_block_number, conn=None):
+        """
+        Checks that `current_block_number` follows the stored checkpoint, and stores it as the new checkpoint.
+
+        Parameters:
+        current_block_number (int): The block being processed.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction (see db_manage.unit_of_work);
+            it is not committed here, and database errors are raised to it.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            self.create_table_if_not_exist("block_number_table")
+            self.create_table_if_not_exist("block_number_table", cursor)
             
             cursor.execute('SELECT current_block_number FROM block_number_table LIMIT 1')
             result = cursor.fetchone()
@@ -108,64 +324,121 @@ class DBManager:
             
             cursor.execute('DROP TABLE IF EXISTS block_number_table')
             
-            self.create_table_if_not_exist('block_number_table')
+            self.create_table_if_not_exist('block_number_table', cursor)
             
             cursor.execute('''
             INSERT INTO block_number_table (current_block_number)
             VALUES (?)
             ''', (current_block_number,))
-            conn.commit()
+            if not enclosing:
+                conn.commit()
         except ValueError as ve:
+            import sentry_sdk
             sentry_sdk.capture_exception(ve)
             logging.error(f"ValueError in check_update_block_number: {ve}")
             try:
                 cursor.execute('DROP TABLE IF EXISTS block_number_table')
-                self.create_table_if_not_exist('block_number_table')
+                self.create_table_if_not_exist('block_number_table', cursor)
                 cursor.execute('''
                 INSERT INTO block_number_table (current_block_number)
                 VALUES (?)
                 ''', (current_block_number,))
-                conn.commit()
+                if not enclosing:
+                    conn.commit()
             except sqlite3.Error as e:
+                if enclosing:
+                    raise
                 logging.error(f"Error in updating block number after ValueError: {e}")
         except sqlite3.Error as e:
+            if enclosing:
+                raise
             logging.error(f"Error in verify_update_block_number: {e}")
 
-    def update_validator_coldkey(self, old_coldkey, new_coldkey):
+    def update_validator_coldkey(self, old_coldkey, new_coldkey, block_number=None, conn=None):
         """
         Updates the coldkey of a validator in the database.
         
         Parameters:
         old_coldkey (str): The old coldkey of the validator.
         new_coldkey (str): The new coldkey of the validator.
+        block_number (int): The block of the swap; when given, the validator history is remapped from that block on.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
         """
+        enclosing = conn is not None
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = conn or sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            if block_number is not None and history_start(cursor, 'validators') is not None:
+                split_history(cursor, 'validator_history', 'cold_key', old_coldkey, 'cold_key', new_coldkey, block_number)
             cursor.execute('UPDATE validators SET cold_key = ? WHERE cold_key = ?', (new_coldkey, old_coldkey))
-            conn.commit()
+            if not enclosing:
+                conn.commit()
             logging.info("Coldkey updated successfully.")
         except sqlite3.Error as e:
+            if enclosing:
+                raise
             logging.error(f"Database error: {e}")
 
-    def update_owner_coldkey(self, net_uid, new_coldkey):
+    def update_owner_coldkey(self, net_uid, new_coldkey, block_number=None, conn=None):
         """
         Updates the coldkey of an owner in the database.
         
         Parameters:
         net_uid (str): The net_uid of the owner.
         new_coldkey (str): The new coldkey of the owner.
+        block_number (int): The block of the swap; when given, the owner history is remapped from that block on.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
         """
+        enclosing = conn is not None
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = conn or sqlite3.connect(self.db_path)
             cursor = conn.cursor()
+            if block_number is not None and history_start(cursor, 'owners') is not None:
+                split_history(cursor, 'owner_history', 'net_uid', net_uid, 'owner_coldkey', new_coldkey, block_number)
             cursor.execute('UPDATE owners SET owner_coldkey = ? WHERE net_uid = ?', (new_coldkey, net_uid))
-            conn.commit()
+            if not enclosing:
+                conn.commit()
             logging.info("Owner coldkey updated successfully.")
         except sqlite3.Error as e:
+            if enclosing:
+                raise
             logging.error(f"Database error: {e}")
         logging.exception("Owner coldkey data has updated with new coldkey.(one element)")
     
+    def revert_coldkey_swap(self, old_coldkey, new_coldkey, block_number, conn=None):
+        """
+        Undoes a coldkey swap applied at a block that was reorganised out: the validators and subnets it moved to
+        `new_coldkey` go back to `old_coldkey`, in the tables and in their history.
+        Without a history, every validator and subnet of `new_coldkey` goes back.
+
+        Parameters:
+        old_coldkey (str): The coldkey the swap moved away from.
+        new_coldkey (str): The coldkey the swap moved to.
+        block_number (int): The block the swap was applied at.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
+        """
+        enclosing = conn is not None
+        try:
+            conn = conn or sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+            for table, (history, key, value, _) in MAPPING_HISTORY.items():
+                if history_start(cursor, table) is None:
+                    cursor.execute(f'UPDATE {table} SET {value} = ? WHERE {value} = ?', (old_coldkey, new_coldkey))
+                    continue
+                keys = unsplit_history(cursor, history, key, value, old_coldkey, new_coldkey, block_number)
+                cursor.executemany(f'UPDATE {table} SET {value} = ? WHERE {value} = ? AND {key} = ?',
+                                   [(old_coldkey, new_coldkey, mapping_key) for mapping_key in keys])
+            if not enclosing:
+                conn.commit()
+            logging.info(f"Coldkey swap {old_coldkey} -> {new_coldkey} of block {block_number} reverted.")
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error: {e}")
+
     def fetch_all_validators(self, url, headers):
         """
         Fetches all validators using pagination.
@@ -177,6 +450,7 @@ class DBManager:
         Returns:
             list: A list of all validators.
         """
+        import requests
         validators = []
         page = 1
         while True:
@@ -196,9 +470,11 @@ class DBManager:
         """
         Fetches owner coldkeys and net_uids from the API and saves them to the SQLite database.
         """
-        conn = sqlite3.connect(DB_PATH)
+        # Loads bittensor and the chain connection only when the owner table is actually refreshed.
+        from chain_observer.utils.owner_coldkeys import get_subnet_owner_coldkeys
+        conn = sqlite3.connect(self.db_path)
         module_name = 'SubtensorModule'
-        subnet_owner_coldkeys = get_subnet_owner_coldkeys(module_name)
+        subnet_owner_coldkeys = get_subnet_owner_coldkeys(module_name, self.chain_endpoint)
         cursor = conn.cursor()
 
         cursor.execute('DROP TABLE IF EXISTS owners')
@@ -216,10 +492,81 @@ class DBManager:
                 INSERT INTO owners (net_uid, owner_coldkey)
                 VALUES (?, ?)
                 ''', (key, value))
+        sync_history(conn, 'owners', self.history_block())
         conn.commit()
         logging.info("Owner coldkeys table is updated")
 
     def update_whole_validator_coldkeys(self):
+        """
+        Reloads the validators table from VALIDATOR_SOURCE.
+        """
+        if VALIDATOR_SOURCE == 'taostats':
+            self.update_validator_coldkeys_from_taostats()
+        else:
+            self.update_validator_coldkeys_from_chain()
+
+    def update_validator_coldkeys_from_chain(self, substrate=None, min_stake_tao=None):
+        """
+        Builds the validators table from chain storage: every delegate hotkey with its owner coldkey and stake.
+        Raises StakeStorageMissing, leaving the table as it is, when the runtime has no stake map it can read.
+        The rows are streamed page by page into a new table, which replaces the old one once complete; names are kept
+        from the old table, and only the names of new validators are asked from TaoStats (when TAOSTATS_API_KEY is set).
+
+        Parameters:
+        substrate: The chain connection, by default the shared connection of the owner table refresh.
+        min_stake_tao (float): Delegates with less stake are skipped (VALIDATOR_MIN_STAKE_TAO by default).
+        """
+        from chain_observer.utils.validator_dataset import ChainValidatorLoader, VALIDATOR_MIN_STAKE_TAO, RAO_PER_TAO
+        if substrate is None:
+            from chain_observer.utils.owner_coldkeys import get_subtensor
+            substrate = get_subtensor(self.chain_endpoint).substrate
+        min_stake = (VALIDATOR_MIN_STAKE_TAO if min_stake_tao is None else min_stake_tao) * RAO_PER_TAO
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('DROP TABLE IF EXISTS validators_new')
+        cursor.execute('''
+        CREATE TABLE validators_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cold_key TEXT,
+            hot_key TEXT,
+            amount TEXT,
+            name TEXT
+        )
+        ''')
+        rows = 0
+        for page in ChainValidatorLoader(substrate).validators():
+            page = [(cold_key, hot_key, str(stake / RAO_PER_TAO)) for cold_key, hot_key, stake in page if cold_key and stake > min_stake]
+            cursor.executemany('INSERT INTO validators_new (cold_key, hot_key, amount) VALUES (?, ?, ?)', page)
+            # Committed page by page: the write lock is not held while the next page is read from the chain.
+            conn.commit()
+            rows += len(page)
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'validators'").fetchone():
+            cursor.execute('''
+            UPDATE validators_new SET name = (SELECT name FROM validators WHERE validators.hot_key = validators_new.hot_key)
+            ''')
+        conn.commit()
+        unnamed = [hot_key for hot_key, in cursor.execute("SELECT hot_key FROM validators_new WHERE name IS NULL OR name = 'Unknown'")]
+        # Names are fetched before anything is written, so no transaction is open during the TaoStats requests (and their rate-limit waits).
+        names = {}
+        if self.TAOSTATS_API_KEY:
+            for hot_key in unnamed:
+                try:
+                    name = self.get_validator_names(hot_key)
+                except Exception as e:
+                    logging.warning(f"TaoStats name lookup failed for {hot_key}: {e}")
+                    continue
+                if name:
+                    names[hot_key] = name
+        history_block = self.history_block()
+        cursor.executemany('UPDATE validators_new SET name = ? WHERE hot_key = ?', [(name, hot_key) for hot_key, name in names.items()])
+        cursor.execute("UPDATE validators_new SET name = 'Unknown' WHERE name IS NULL")
+        cursor.execute('DROP TABLE IF EXISTS validators')
+        cursor.execute('ALTER TABLE validators_new RENAME TO validators')
+        sync_history(conn, 'validators', history_block)
+        conn.commit()
+        logging.info(f"validator coldkeys table is updated from the chain ({rows} validators)")
+
+    def update_validator_coldkeys_from_taostats(self):
         """
         Fetches validator coldkeys, hotkeys, and amounts from the API and saves them to the SQLite database.
         """  
@@ -244,7 +591,7 @@ class DBManager:
                 validator_names.append(name)
                 validator_amounts.append(amount)
                 
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
 
         cursor.execute('DROP TABLE IF EXISTS validators')
@@ -269,11 +616,13 @@ class DBManager:
                 ''', (cold_key, hot_key, amount, name))
             except sqlite3.Error as e:
                 logging.exception(f"Error inserting data : {e}")
+        sync_history(conn, 'validators', self.history_block())
         conn.commit()
         logging.info("validator coldkeys table is updated")
 
     def get_validator_names(self, hotkey): 
         '''Get validator name using taostats API'''
+        import requests
         url = f"https://api.taostats.io/api/v1/delegate/info?address={hotkey}"
         headers = {
             "accept": "application/json",
@@ -0,0 +1,276 @@
+import json
+import logging
+import sqlite3
+from db_manage.db_manager import DB_PATH
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+ARCHIVE_COLUMNS = ['block_number', 'event_type', 'extrinsic_idx', 'success', 'coldkey', 'new_coldkey', 'hotkey', 'netuid', 'proposal', 'execution_block', 'payload']
+# Archive table, its indexes and the triggers that keep it append-only.
+ARCHIVE_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS event_archive (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        block_number INTEGER NOT NULL,
+        event_type TEXT NOT NULL,
+        extrinsic_idx INTEGER,
+        success INTEGER,
+        coldkey TEXT,
+        new_coldkey TEXT,
+        hotkey TEXT,
+        netuid INTEGER,
+        proposal TEXT,
+        execution_block INTEGER,
+        payload TEXT
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_block ON event_archive (block_number, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_coldkey ON event_archive (coldkey, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_new_coldkey ON event_archive (new_coldkey, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_hotkey ON event_archive (hotkey, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_netuid ON event_archive (netuid, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_event_type ON event_archive (event_type, id)',
+    'CREATE INDEX IF NOT EXISTS idx_event_archive_proposal ON event_archive (proposal, id)',
+    # Blocks reorganised out: their events up to last_id are left out of the queries, without touching the archive.
+    '''
+    CREATE TABLE IF NOT EXISTS retracted_blocks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        block_number INTEGER NOT NULL,
+        block_hash TEXT,
+        last_id INTEGER NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_retracted_blocks_block ON retracted_blocks (block_number, last_id)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS event_archive_no_update BEFORE UPDATE ON event_archive
+    BEGIN SELECT RAISE(ABORT, 'event_archive is append-only'); END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS event_archive_no_delete BEFORE DELETE ON event_archive
+    BEGIN SELECT RAISE(ABORT, 'event_archive is append-only'); END
+    ''',
+]
+# Leaves out the events of retracted blocks.
+RETRACTED_FILTER = ('NOT EXISTS (SELECT 1 FROM retracted_blocks r '
+                    'WHERE r.block_number = event_archive.block_number AND r.last_id >= event_archive.id)')
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class EventArchive:
+    """
+    Append-only archive of every detected event, indexed by block, coldkey, hotkey, netuid, event type and proposal.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.tables_created = False
+
+    def create_tables(self, conn):
+        """
+        Creates the archive table, its indexes and the triggers that keep it append-only.
+        Every index ends with id so that keyset pagination is served straight from the index.
+        The statements are run one by one, so an enclosing transaction of `conn` stays open.
+        """
+        for statement in ARCHIVE_SCHEMA:
+            conn.execute(statement)
+        # Tables created inside a transaction exist only once it commits; they are checked again until then.
+        self.tables_created = not conn.in_transaction
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path)
+        if not self.tables_created:
+            self.create_tables(conn)
+        return conn
+
+    def to_row(self, block_number, event):
+        """
+        Turns an event dict built by the observer into an archive row; unknown keys go to the JSON payload.
+        """
+        known = {column: event.get(column) for column in ARCHIVE_COLUMNS if column not in ('block_number', 'payload')}
+        extra = {key: value for key, value in event.items() if key not in known}
+        row = dict(known, block_number=block_number, payload=json.dumps(extra, default=str) if extra else None)
+        if row['success'] is not None:
+            row['success'] = int(bool(row['success']))
+        if row['netuid'] is not None:
+            try:
+                row['netuid'] = int(row['netuid'])
+            except (TypeError, ValueError):
+                extra['netuid'] = row['netuid']
+                row['netuid'] = None
+                row['payload'] = json.dumps(extra, default=str)
+        return tuple(row[column] for column in ARCHIVE_COLUMNS)
+
+    def record_block_events(self, block_number, events, conn=None):
+        """
+        Appends all events detected in a block in a single transaction.
+        Blocks without events do not touch the database.
+
+        Parameters:
+        block_number (int): The block the events were detected in.
+        events (list): Event dicts with the keys of ARCHIVE_COLUMNS; other keys are kept in the payload.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
+        """
+        if not events:
+            return 0
+        rows = [self.to_row(block_number, event) for event in events]
+        placeholders = ', '.join('?' for _ in ARCHIVE_COLUMNS)
+        sql = f"INSERT INTO event_archive ({', '.join(ARCHIVE_COLUMNS)}) VALUES ({placeholders})"
+        enclosing = conn is not None
+        try:
+            if enclosing:
+                if not self.tables_created:
+                    self.create_tables(conn)
+                conn.executemany(sql, rows)
+                return len(rows)
+            conn = self.connect()
+            with conn:
+                conn.executemany(sql, rows)
+            return len(rows)
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error in record_block_events for block {block_number}: {e}")
+            return 0
+
+    def retract_block(self, block_number, block_hash=None, conn=None):
+        """
+        Retracts the events archived so far for a block that was reorganised out: they no longer show in queries.
+        The events of the canonical block at that height, archived afterwards, are not affected.
+
+        Parameters:
+        block_number (int): The orphaned block.
+        block_hash (str): Its hash, kept for reference.
+        conn (sqlite3.Connection): Optional connection of an enclosing transaction; it is not committed here,
+            and database errors are raised to it.
+        """
+        sql = '''
+        INSERT INTO retracted_blocks (block_number, block_hash, last_id)
+        SELECT ?, ?, COALESCE(MAX(id), 0) FROM event_archive WHERE block_number = ?
+        '''
+        enclosing = conn is not None
+        try:
+            if enclosing:
+                if not self.tables_created:
+                    self.create_tables(conn)
+                conn.execute(sql, (block_number, block_hash, block_number))
+                return
+            conn = self.connect()
+            with conn:
+                conn.execute(sql, (block_number, block_hash, block_number))
+        except sqlite3.Error as e:
+            if enclosing:
+                raise
+            logging.error(f"Database error in retract_block for block {block_number}: {e}")
+
+    def block_events(self, block_number, block_hash=None):
+        """
+        Returns the events archived for a block and not retracted; with `block_hash`, only those observed in that block.
+        """
+        events, before_id = [], None
+        while True:
+            page, before_id = self.query_events(from_block=block_number, to_block=block_number, before_id=before_id, limit=MAX_PAGE_SIZE)
+            events.extend(page)
+            if before_id is None:
+                break
+        return [event for event in reversed(events) if block_hash is None or event.get('block_hash') in (None, block_hash)]
+
+    def query_events(self, event_type=None, coldkey=None, hotkey=None, netuid=None, proposal=None,
+                     from_block=None, to_block=None, before_id=None, limit=DEFAULT_PAGE_SIZE, conn=None):
+        """
+        Returns archived events, newest first, matching all the given filters.
+        `coldkey` matches both the old and the new coldkey of swaps.
+        Pages by keyset: pass the returned cursor as `before_id` to get the next page.
+        `conn` may be a (read-only) connection to query through instead of the archive's own.
+
+        Returns:
+        tuple: (events, next_cursor) where next_cursor is None on the last page.
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        sql, params = self.build_query(event_type, coldkey, hotkey, netuid, proposal, from_block, to_block, before_id, limit)
+        try:
+            conn = conn or self.connect()
+            cursor = conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Database error in query_events : {e}")
+            return [], None
+        events = [self.to_event(dict(zip(columns, row))) for row in rows]
+        next_cursor = events[-1]['id'] if len(events) == limit else None
+        return events, next_cursor
+
+    def build_query(self, event_type=None, coldkey=None, hotkey=None, netuid=None, proposal=None,
+                    from_block=None, to_block=None, before_id=None, limit=DEFAULT_PAGE_SIZE):
+        """
+        Builds the SQL of `query_events` for the given filters.
+
+        Returns:
+        tuple: (sql, params)
+        """
+        conditions, params = [], []
+        if event_type is not None:
+            conditions.append('event_type = ?')
+            params.append(event_type)
+        if coldkey is not None:
+            conditions.append('(coldkey = ? OR new_coldkey = ?)')
+            params.extend([coldkey, coldkey])
+        if hotkey is not None:
+            conditions.append('hotkey = ?')
+            params.append(hotkey)
+        if netuid is not None:
+            conditions.append('netuid = ?')
+            params.append(int(netuid))
+        if proposal is not None:
+            conditions.append('proposal = ?')
+            params.append(proposal)
+        if from_block is not None:
+            conditions.append('block_number >= ?')
+            params.append(int(from_block))
+        if to_block is not None:
+            conditions.append('block_number <= ?')
+            params.append(int(to_block))
+        if before_id is not None:
+            conditions.append('id < ?')
+            params.append(int(before_id))
+        conditions.append(RETRACTED_FILTER)
+        where = " AND ".join(conditions)
+        sql = f"SELECT id, {', '.join(ARCHIVE_COLUMNS)} FROM event_archive WHERE {where} ORDER BY id DESC LIMIT ?"
+        return sql, params + [limit]
+
+    def to_event(self, event):
+        """
+        Turns an archive row back into an event dict, merging its JSON payload.
+        """
+        payload = event.pop('payload')
+        if payload:
+            event.update(json.loads(payload))
+        if event['success'] is not None:
+            event['success'] = bool(event['success'])
+        return event
+
+    def last_retraction_id(self, conn=None):
+        """
+        Returns the id of the newest block retraction (0 when none); it changes whenever events are retracted.
+        """
+        try:
+            conn = conn or self.connect()
+            return conn.execute('SELECT MAX(id) FROM retracted_blocks').fetchone()[0] or 0
+        except sqlite3.Error as e:
+            logging.error(f"Database error in last_retraction_id : {e}")
+            return 0
+
+    def last_event_id(self, conn=None):
+        """
+        Returns the id of the newest archived event (0 when empty); it changes whenever the archive grows.
+        """
+        try:
+            conn = conn or self.connect()
+            return conn.execute('SELECT MAX(id) FROM event_archive').fetchone()[0] or 0
+        except sqlite3.Error as e:
+            logging.error(f"Database error in last_event_id : {e}")
+            return 0
+
+
+event_archive = EventArchive()
@@ -0,0 +1,275 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# A leader that stops renewing its lease is replaced by a standby after this many seconds.
+LEADER_LEASE_SECONDS = float(os.getenv('LEADER_LEASE_SECONDS', '20'))
+# A backfill range not completed within this many seconds is handed to another worker.
+RANGE_LEASE_SECONDS = float(os.getenv('RANGE_LEASE_SECONDS', '300'))
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+def default_holder():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """
+    Leases stored in the SQLite file shared by the observer instances.
+    Every lease change runs in a BEGIN IMMEDIATE transaction, so SQLite's write lock makes the check-and-set atomic across processes.
+    A lease is held until it expires; its holder renews it by acquiring it again.
+    """
+
+    def __init__(self, db_path=DB_PATH, holder=None):
+        self.db_path = db_path
+        self.holder = holder or default_holder()
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            fencing_token INTEGER NOT NULL
+        )
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS range_leases (
+            job TEXT NOT NULL,
+            range_start INTEGER NOT NULL,
+            range_end INTEGER NOT NULL,
+            holder TEXT,
+            expires_at REAL,
+            done INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (job, range_start)
+        )
+        ''')
+        # Blocks of a range job that failed, handed out again until they succeed or fail too often.
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS range_failures (
+            job TEXT NOT NULL,
+            block_number INTEGER NOT NULL,
+            attempts INTEGER NOT NULL,
+            error TEXT,
+            holder TEXT,
+            expires_at REAL,
+            PRIMARY KEY (job, block_number)
+        )
+        ''')
+        return conn
+
+    def acquire(self, name, ttl=None):
+        """
+        Takes or renews the lease `name` for `ttl` seconds (LEADER_LEASE_SECONDS by default).
+
+        Returns:
+        int: The fencing token of the lease, which grows every time the lease changes holder; None if another holder has it.
+        """
+        ttl = LEADER_LEASE_SECONDS if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self.connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                row = conn.execute('SELECT holder, expires_at, fencing_token FROM leases WHERE name = ?', (name,)).fetchone()
+                if row is None:
+                    token = 1
+                    conn.execute('INSERT INTO leases (name, holder, expires_at, fencing_token) VALUES (?, ?, ?, ?)',
+                                 (name, self.holder, now + ttl, token))
+                elif row[0] == self.holder or row[1] <= now:
+                    token = row[2] if row[0] == self.holder else row[2] + 1
+                    conn.execute('UPDATE leases SET holder = ?, expires_at = ?, fencing_token = ? WHERE name = ?',
+                                 (self.holder, now + ttl, token, name))
+                    if row[0] != self.holder:
+                        logging.warning(f"Lease {name} taken over from {row[0]} by {self.holder}.")
+                else:
+                    token = None
+                conn.execute('COMMIT')
+                return token
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logging.error(f"Database error acquiring lease {name} : {e}")
+            return None
+
+    def check(self, name, token, conn=None):
+        """
+        Raises LeaseLostError unless this instance still holds the lease `name` with the fencing token `token`.
+        Run with the connection of a write transaction (`conn`), the check holds until that transaction commits:
+        a standby cannot take the lease over in between, since that needs the write lock.
+        """
+        try:
+            own_conn = conn is None
+            conn = conn or self.connect()
+            row = conn.execute('SELECT holder, fencing_token FROM leases WHERE name = ?', (name,)).fetchone()
+            if own_conn:
+                conn.close()
+        except sqlite3.Error as e:
+            raise LeaseLostError(f"Lease {name} could not be checked: {e}")
+        if row is None or row[0] != self.holder or row[1] != token:
+            raise LeaseLostError(f"Lease {name} (token {token}) is no longer held by {self.holder}.")
+
+    def keep(self, name, token, ttl=None):
+        """
+        Returns a LeaseKeeper renewing the lease `name` in the background while long work runs under it.
+        """
+        return LeaseKeeper(self, name, token, ttl)
+
+    def release(self, name):
+        """
+        Gives up the lease `name` if this instance holds it, so that a standby can take it over at once.
+        """
+        try:
+            conn = self.connect()
+            conn.execute('UPDATE leases SET expires_at = 0 WHERE name = ? AND holder = ?', (name, self.holder))
+        except sqlite3.Error as e:
+            logging.error(f"Database error releasing lease {name} : {e}")
+
+    def claim_range(self, job, start, end, chunk_size, ttl=None):
+        """
+        Leases the first chunk of [start, end) that is neither done nor leased by a live worker.
+        Chunks are aligned on `start`, so every worker splits the range the same way.
+
+        Returns:
+        tuple: (chunk_start, chunk_end), or None when no chunk is left.
+        """
+        ttl = RANGE_LEASE_SECONDS if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self.connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                taken = {row[0] for row in conn.execute('''
+                SELECT range_start FROM range_leases
+                WHERE job = ? AND range_start >= ? AND range_start < ? AND (done = 1 OR (expires_at > ? AND holder != ?))
+                ''', (job, start, end, now, self.holder))}
+                chunk = None
+                for chunk_start in range(start, end, chunk_size):
+                    if chunk_start not in taken:
+                        chunk = (chunk_start, min(chunk_start + chunk_size, end))
+                        conn.execute('''
+                        INSERT OR REPLACE INTO range_leases (job, range_start, range_end, holder, expires_at, done)
+                        VALUES (?, ?, ?, ?, ?, 0)
+                        ''', (job, chunk[0], chunk[1], self.holder, now + ttl))
+                        break
+                conn.execute('COMMIT')
+                return chunk
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logging.error(f"Database error claiming a range of {job} : {e}")
+            return None
+
+    def complete_range(self, job, range_start):
+        """
+        Marks a leased chunk as done so that no other worker processes it again.
+        """
+        try:
+            conn = self.connect()
+            conn.execute('UPDATE range_leases SET done = 1, expires_at = NULL WHERE job = ? AND range_start = ? AND holder = ?',
+                         (job, range_start, self.holder))
+        except sqlite3.Error as e:
+            logging.error(f"Database error completing range {range_start} of {job} : {e}")
+
+    def fail_block(self, job, block_number, error=None):
+        """
+        Records a block of a range job that failed, so that `claim_failed_block` hands it out again.
+        """
+        try:
+            conn = self.connect()
+            conn.execute('''
+            INSERT INTO range_failures (job, block_number, attempts, error) VALUES (?, ?, 1, ?)
+            ON CONFLICT (job, block_number) DO UPDATE SET attempts = attempts + 1, error = excluded.error, holder = NULL, expires_at = NULL
+            ''', (job, block_number, error))
+        except sqlite3.Error as e:
+            logging.error(f"Database error recording failed block {block_number} of {job} : {e}")
+
+    def claim_failed_block(self, job, max_attempts, ttl=None):
+        """
+        Leases the first failed block of a range job that failed fewer than `max_attempts` times and is not leased by
+        another live worker.
+
+        Returns:
+        int: The block number, or None when no failed block is left to retry.
+        """
+        ttl = RANGE_LEASE_SECONDS if ttl is None else ttl
+        now = time.time()
+        try:
+            conn = self.connect()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                row = conn.execute('''
+                SELECT block_number FROM range_failures
+                WHERE job = ? AND attempts < ? AND (expires_at IS NULL OR expires_at <= ? OR holder = ?)
+                ORDER BY block_number LIMIT 1
+                ''', (job, max_attempts, now, self.holder)).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE range_failures SET holder = ?, expires_at = ? WHERE job = ? AND block_number = ?',
+                                 (self.holder, now + ttl, job, row[0]))
+                conn.execute('COMMIT')
+                return row[0] if row else None
+            except sqlite3.Error:
+                conn.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            logging.error(f"Database error claiming a failed block of {job} : {e}")
+            return None
+
+    def resolve_failed_block(self, job, block_number):
+        """
+        Forgets a failed block that succeeded on a retry.
+        """
+        try:
+            conn = self.connect()
+            conn.execute('DELETE FROM range_failures WHERE job = ? AND block_number = ?', (job, block_number))
+        except sqlite3.Error as e:
+            logging.error(f"Database error resolving failed block {block_number} of {job} : {e}")
+
+
+class LeaseKeeper:
+    """
+    Context manager renewing a held lease every third of its TTL until the work under it is done, so a block or a catch-up
+    slower than the TTL does not let a standby take over. A renewal that finds the lease taken over stops the keeper;
+    writes are fenced by LeaseManager.check either way.
+    """
+
+    def __init__(self, leases, name, token, ttl=None):
+        self.leases = leases
+        self.name = name
+        self.token = token
+        self.ttl = LEADER_LEASE_SECONDS if ttl is None else ttl
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def renew(self):
+        while not self.stopped.wait(self.ttl / 3):
+            token = self.leases.acquire(self.name, self.ttl)
+            if token is not None and token != self.token:
+                logging.warning(f"Lease {self.name} was lost and taken again (token {token}); the work under token {self.token} is fenced.")
+                return
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.renew, name=f'lease:{self.name}', daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.thread.join()
+        return False
@@ -0,0 +1,235 @@
+import glob
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from db_manage.db_manager import DB_PATH, MAPPING_HISTORY, sync_history
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Directory of the dataset snapshots: loaded on startup when newer than the dataset, written after every dataset refresh.
+# Empty to disable.
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', '')
+# Snapshots kept per network; older ones are deleted after an export.
+SNAPSHOT_KEEP = int(os.getenv('SNAPSHOT_KEEP', '7'))
+# Blocks between a loaded snapshot and the head that are replayed for key swaps; a larger gap refreshes the dataset instead.
+SNAPSHOT_MAX_CATCHUP_BLOCKS = int(os.getenv('SNAPSHOT_MAX_CATCHUP_BLOCKS', '14400'))
+
+# Version of the snapshot file layout: a JSON header line, then one ["table", [values]] line per row, gzip-compressed.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_SUFFIX = '.snapshot.gz'
+BATCH_ROWS = 1000
+# The dataset tables, as created by DBManager.update_whole_validator_coldkeys and update_whole_owner_coldkeys.
+DATASET_TABLES = {
+    'validators': ['cold_key', 'hot_key', 'amount', 'name'],
+    'owners': ['net_uid', 'owner_coldkey'],
+}
+TABLE_SCHEMAS = {
+    'validators': '''
+        CREATE TABLE validators (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cold_key TEXT,
+            hot_key TEXT,
+            amount TEXT,
+            name TEXT
+        )
+        ''',
+    'owners': '''
+        CREATE TABLE owners (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            net_uid TEXT,
+            owner_coldkey TEXT
+        )
+        ''',
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class SnapshotStore:
+    """
+    Versioned, compressed snapshots of the dataset tables (validators and owners), named after their network and the block
+    they were taken at. A snapshot is streamed row by row in both directions, and imported in a single transaction.
+    """
+
+    def __init__(self, directory=SNAPSHOT_DIR, keep=None):
+        self.directory = directory
+        self.keep = SNAPSHOT_KEEP if keep is None else keep
+
+    def path(self, network, block_number):
+        return os.path.join(self.directory, f'{network}-{block_number:010d}{SNAPSHOT_SUFFIX}')
+
+    def list(self, network):
+        """
+        Returns the snapshot files of a network, oldest first.
+        """
+        if not self.directory:
+            return []
+        return sorted(glob.glob(os.path.join(glob.escape(self.directory), f'{glob.escape(network)}-*{SNAPSHOT_SUFFIX}')))
+
+    def latest(self, network):
+        snapshots = self.list(network)
+        return snapshots[-1] if snapshots else None
+
+    def export(self, db_path, network, block_number):
+        """
+        Writes the dataset tables of `db_path` to a new snapshot taken at `block_number` and records it as the dataset's version.
+        The file is written under a temporary name and renamed, so a reader never sees half a snapshot.
+
+        Returns:
+        str: The path of the snapshot.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(network, block_number)
+        taken_at = time.time()
+        header = {
+            'format': SNAPSHOT_FORMAT,
+            'network': network,
+            'block_number': block_number,
+            'taken_at': datetime.fromtimestamp(taken_at, tz=timezone.utc).isoformat(),
+            'tables': DATASET_TABLES,
+        }
+        conn = sqlite3.connect(db_path)
+        rows = {}
+        with gzip.open(path + '.tmp', 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+            for table, columns in DATASET_TABLES.items():
+                rows[table] = 0
+                try:
+                    cursor = conn.execute(f'SELECT {", ".join(columns)} FROM {table} ORDER BY id')
+                except sqlite3.OperationalError:
+                    # The table has not been created yet.
+                    continue
+                for row in cursor:
+                    f.write(json.dumps([table, row]) + '\n')
+                    rows[table] += 1
+        os.replace(path + '.tmp', path)
+        record_version(conn, block_number, header['taken_at'])
+        conn.close()
+        logging.info(f"Exported dataset snapshot {path} at block {block_number}: {rows}.")
+        self.prune(network)
+        return path
+
+    def prune(self, network):
+        for path in self.list(network)[:-self.keep] if self.keep else []:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging.warning(f"Failed to delete old snapshot {path}: {e}")
+
+    def import_snapshot(self, db_path, path):
+        """
+        Replaces the dataset tables of `db_path` with the rows of a snapshot, and records them in the mapping history
+        from the snapshot's block on, in one transaction.
+
+        Returns:
+        dict: The snapshot header (network, block_number, taken_at, ...).
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = read_header(f, path)
+            conn = sqlite3.connect(db_path, isolation_level=None)
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                for table in DATASET_TABLES:
+                    conn.execute(f'DROP TABLE IF EXISTS {table}')
+                    conn.execute(TABLE_SCHEMAS[table])
+                batches = {table: [] for table in DATASET_TABLES}
+                for line in f:
+                    table, values = json.loads(line)
+                    batches[table].append(values)
+                    if len(batches[table]) >= BATCH_ROWS:
+                        insert_rows(conn, table, batches[table])
+                        batches[table] = []
+                for table, batch in batches.items():
+                    insert_rows(conn, table, batch)
+                for table in MAPPING_HISTORY:
+                    sync_history(conn, table, header['block_number'])
+                record_version(conn, header['block_number'], header['taken_at'])
+                conn.execute('COMMIT')
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                conn.close()
+        logging.info(f"Imported dataset snapshot {path} taken at block {header['block_number']} ({header['taken_at']}).")
+        return header
+
+    def header(self, path):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return read_header(f, path)
+
+
+def read_header(f, path):
+    try:
+        header = json.loads(f.readline())
+    except ValueError:
+        raise SnapshotError(f"{path} is not a dataset snapshot")
+    if header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} has snapshot format {header.get('format')}, expected {SNAPSHOT_FORMAT}")
+    return header
+
+
+def insert_rows(conn, table, rows):
+    if rows:
+        columns = DATASET_TABLES[table]
+        conn.executemany(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))})', rows)
+
+
+def create_version_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS dataset_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        block_number INTEGER NOT NULL,
+        taken_at TEXT NOT NULL
+    )
+    ''')
+
+
+def record_version(conn, block_number, taken_at):
+    """
+    Records the block the dataset tables are up to date with.
+    """
+    create_version_table(conn)
+    conn.execute('INSERT OR REPLACE INTO dataset_version (id, block_number, taken_at) VALUES (1, ?, ?)', (block_number, taken_at))
+    if conn.isolation_level is not None:
+        conn.commit()
+
+
+def dataset_version(db_path):
+    """
+    Returns the block the dataset tables of `db_path` are up to date with, or None when unknown.
+    """
+    try:
+        conn = sqlite3.connect(db_path)
+        create_version_table(conn)
+        row = conn.execute('SELECT block_number FROM dataset_version WHERE id = 1').fetchone()
+        return row[0] if row else None
+    except sqlite3.Error as e:
+        logging.error(f"Database error reading the dataset version : {e}")
+        return None
+
+
+def dataset_rows(db_path):
+    """
+    Returns the number of rows of every dataset table (0 for a missing table).
+    """
+    conn = sqlite3.connect(db_path)
+    counts = {}
+    for table in DATASET_TABLES:
+        try:
+            counts[table] = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+        except sqlite3.OperationalError:
+            counts[table] = 0
+    return counts
+
+
+snapshot_store = SnapshotStore()
@@ -0,0 +1,91 @@
+import logging
+import sqlite3
+import threading
+from db_manage.db_manager import enable_wal
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Seconds to wait for the write lock, e.g. while a dataset refresh of another thread commits.
+LOCK_TIMEOUT = 10
+
+# Databases already switched to WAL mode by this process.
+wal_databases = set()
+wal_lock = threading.Lock()
+
+
+def write_now(writer, *args):
+    """
+    Runs a writer on its own connection, committed right away: the default `write` of the components that can also
+    queue their writes into a block's unit of work (see BtChainObserver.write).
+    """
+    return writer(*args)
+
+
+class BlockUnitOfWork:
+    """
+    All the writes of one block: its checkpoint, the key swaps it applies to the dataset, the events archived for it,
+    the state of the pending schedules, stake flow, governance tallies, digest and block window, and the reports it
+    queues for Discord (see ReportOutbox). They are gathered while the block is processed and run in one transaction
+    when it is done, so a crash leaves all of them or none, and together they cost one commit.
+    The components keep their state in memory as well; when the writes are rolled back, the callbacks registered with
+    `on_rollback` drop that state so that it is read back from the last commit.
+    """
+
+    def __init__(self, db_path, block_number):
+        self.db_path = db_path
+        self.block_number = block_number
+        self.writes = []
+        self.rollback_callbacks = []
+
+    def add(self, write, *args, **kwargs):
+        """
+        Queues `write(*args, **kwargs, conn=...)`, a writer taking the connection of an enclosing transaction.
+        """
+        self.writes.append((write, args, kwargs))
+
+    def on_rollback(self, callback):
+        """
+        Registers `callback()`, run when the writes are rolled back instead of committed.
+        """
+        self.rollback_callbacks.append(callback)
+
+    def rollback(self):
+        """
+        Drops the queued writes and runs the rollback callbacks. Does nothing once the writes were committed or rolled back.
+        """
+        self.writes = []
+        callbacks, self.rollback_callbacks = self.rollback_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.exception(f"Rollback callback of block {self.block_number} failed: {e}")
+
+    def commit(self):
+        """
+        Runs the queued writes in one transaction. On an error nothing is written, the writes are rolled back
+        (see `rollback`) and the error is raised.
+        """
+        if not self.writes:
+            self.rollback_callbacks = []
+            return
+        conn = sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            with wal_lock:
+                if self.db_path not in wal_databases:
+                    enable_wal(conn)
+                    wal_databases.add(self.db_path)
+            conn.execute('BEGIN IMMEDIATE')
+            for write, args, kwargs in self.writes:
+                write(*args, conn=conn, **kwargs)
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            logging.error(f"Writes of block {self.block_number} rolled back.")
+            self.rollback()
+            raise
+        finally:
+            conn.close()
+        self.writes = []
+        self.rollback_callbacks = []
@@ -1,32 +1,67 @@
 # Description: Main script for running the bot and updating the dataset at regular intervals.
-import subprocess
-import time
-import sched
-import threading
 import logging
+import threading
 from db_manage.db_manager import db_manager
-from chain_observer.utils.check_thread_status import check_thread_staus
+from db_manage.snapshots import snapshot_store, SNAPSHOT_DIR
+from chain_observer.bot.networks import DEFAULT_NETWORK
+from chain_observer.utils.refresh_coordinator import request_owner_refresh, request_validator_refresh
+from chain_observer.utils.job_scheduler import JobScheduler, SKIP, QUEUE, SCHEDULER_MAX_WORKERS
 from chain_observer.utils.sentry import init_sentry
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_script(script_name):
-    """Runs a specified Python script."""
-    try:
-        subprocess.run(['python', script_name], check=True)
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error executing script {script_name}: {e}")
+def update_coldkeys(network=None):
+    """
+    Refreshes the owner and validator tables of a network and waits for both.
+    The refresh coordinator runs them one after the other and merges them with refreshes already requested by the bot.
+    """
+    if network and not network.is_leader():
+        logging.info(f"Standby for network {network.name}: dataset refresh left to the leader.")
+        return
+    manager = network.db_manager if network else db_manager
+    tickets = [request_owner_refresh(manager, debounce=False), request_validator_refresh(manager, debounce=False)]
+    failed = False
+    for ticket in tickets:
+        try:
+            ticket.wait()
+        except Exception as e:
+            failed = True
+            logging.error(f"Dataset refresh failed: {e}")
+    block_number = manager.get_last_block_number()
+    if SNAPSHOT_DIR and not failed and block_number is not None:
+        # The next instance starts from this snapshot instead of waiting for a full refresh.
+        try:
+            snapshot_store.export(manager.db_path, network.name if network else DEFAULT_NETWORK, block_number)
+        except Exception as e:
+            logging.error(f"Dataset snapshot export failed: {e}")
 
-def schedule_task(scheduler, task, interval, *args):
-    """Schedules a task to run at regular intervals."""
-    threading.Thread(target=task, args=args).start()
-    scheduler.enter(interval, 1, schedule_task, (scheduler, task, interval) + args)
+def start_network_dataset(network):
+    """
+    Loads the newest dataset snapshot of a network if it is newer than its dataset, then catches the dataset up to the head
+    in the background while the bot already observes the head.
+    """
+    from chain_observer.utils.dataset_bootstrap import start_dataset, catch_up_dataset
+    if not network.is_leader():
+        return
+    try:
+        from_block = start_dataset(network)
+    except Exception as e:
+        logging.error(f"Failed to load the dataset snapshot of network {network.name}: {e}")
+        return
+    if from_block is None:
+        return
+    def catch_up():
+        try:
+            catch_up_dataset(network, from_block)
+        except Exception as e:
+            logging.error(f"Dataset catch-up of network {network.name} failed: {e}")
+    threading.Thread(target=catch_up, name=f'dataset-catch-up:{network.name}', daemon=True).start()
 
-def update_coldkeys():
-    """Executes find_validator_coldkey and find_owner_coldkey in sequence."""
-    if check_thread_staus() == 'not running':
-        db_manager.update_whole_owner_coldkeys()
-    db_manager.update_whole_validator_coldkeys()
+def run_network_bot(network):
+    """Observes the next block of a network in this process."""
+    # Imported here so that the scheduler starts without loading the observer.
+    from run import run
+    run(network)
 
 if __name__ == "__main__":
     
@@ -36,14 +71,34 @@ if __name__ == "__main__":
     update_dataset_interval = 86400  # Interval in seconds for updating the dataset (1 day)
     initial_delay = 86400  # Delay in seconds before starting the dataset update (1 day)
 
-    scheduler = sched.scheduler(time.time, time.sleep)
-    scheduler.enter(0, 1, schedule_task, (scheduler, run_script, bot_interval, 'run.py'))
-    scheduler.enter(initial_delay, 1, schedule_task, (scheduler, update_coldkeys, update_dataset_interval))
+    # Every network listed in NETWORKS (or the single default one) is observed in this process,
+    # sharing the scheduler, the HTTP session and the runtime metadata cache.
+    from chain_observer.bot.networks import load_networks, LEADER_LEASE
+    networks = load_networks()
+    if SNAPSHOT_DIR:
+        for network in networks:
+            start_network_dataset(network)
+
+    # Bot ticks of a network still processing its previous blocks are skipped, and the next tick observes every block
+    # after the checkpoint, so none is missed; a dataset refresh that is still
+    # running when the next one is due is followed by it. Each network gets a thread for its bot and one for its
+    # dataset job, which blocks its thread while waiting for the serialized refresh.
+    scheduler = JobScheduler(SCHEDULER_MAX_WORKERS or 2 * len(networks))
+    for network in networks:
+        scheduler.add_job(f'bot:{network.name}', run_network_bot, bot_interval, network, overlap=SKIP)
+        scheduler.add_job(f'dataset:{network.name}', update_coldkeys, update_dataset_interval, network,
+                          initial_delay=initial_delay, overlap=QUEUE)
     
     try:
         logging.info("Starting the scheduler.")
         scheduler.run()
     except KeyboardInterrupt:
         logging.info("Scheduler terminated by user.")
+        scheduler.shutdown(wait=False)
+        for name, stats in scheduler.stats().items():
+            logging.info(f"Job {name}: {stats}")
+        # Let a standby take over right away instead of waiting for the leases to expire.
+        for network in networks:
+            network.leases.release(LEADER_LEASE)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
@@ -0,0 +1,17 @@
+# Description: Read-only HTTP API over the observed events and the validator / owner datasets.
+import os
+import logging
+import uvicorn
+from dotenv import load_dotenv
+from chain_observer.api.query_service import create_app
+
+load_dotenv()
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+QUERY_API_HOST = os.getenv('QUERY_API_HOST', '0.0.0.0')
+QUERY_API_PORT = int(os.getenv('QUERY_API_PORT', '8000'))
+QUERY_API_POOL_SIZE = int(os.getenv('QUERY_API_POOL_SIZE', '4'))
+
+if __name__ == "__main__":
+    uvicorn.run(create_app(pool_size=QUERY_API_POOL_SIZE), host=QUERY_API_HOST, port=QUERY_API_PORT)
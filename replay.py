@@ -0,0 +1,41 @@
+# Description: Replays recorded blocks through the observer and checks that it produces the recorded reports.
+# Usage: python replay.py [SEGMENT ...] [--dir records] [--network finney] [--db BASE.sqlite3] [--show]
+import argparse
+import json
+import logging
+import sys
+from chain_observer.bot.block_recorder import replay_segment, list_segments, RECORD_DIR
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded blocks and compare their reports with the recorded ones.")
+    parser.add_argument('segments', nargs='*', help="Segment files to replay (all segments of --dir by default).")
+    parser.add_argument('--dir', default=RECORD_DIR or 'records', help="Directory of the segments (RECORD_DIR by default).")
+    parser.add_argument('--network', help="Only replay the segments of this network.")
+    parser.add_argument('--db', help="Database to start from instead of the copy recorded with each segment.")
+    parser.add_argument('--show', action='store_true', help="Print the recorded and replayed reports of the blocks that differ.")
+    args = parser.parse_args()
+
+    segments = args.segments or list_segments(args.dir, args.network)
+    if not segments:
+        parser.error(f"No segment found in {args.dir}.")
+
+    def show(block_number, recorded, replayed):
+        print(json.dumps({'block_number': block_number, 'recorded': recorded, 'replayed': replayed}, indent=2))
+
+    # The observer logs every block; only warnings are kept during the replay.
+    logging.getLogger().setLevel(logging.WARNING)
+    mismatches = 0
+    for path in segments:
+        stats = replay_segment(path, args.db, show if args.show else None)
+        mismatches += len(stats['mismatches'])
+        rate = stats['blocks'] / stats['seconds'] if stats['seconds'] else 0
+        print(f"{path}: {stats['blocks']} blocks ({rate:.0f} blocks/s), {stats['reports']} reports, "
+              f"{len(stats['mismatches'])} blocks with different reports {stats['mismatches'][:10]}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,203 @@
 import os
 import time
+from collections import Counter
 from datetime import datetime
-import threading
 import logging
 from dotenv import load_dotenv
-from chain_observer.bot.discord_report import post_to_discord
-from chain_observer.bot.bt_chain_observer import BtChainObserver
+from chain_observer.bot.discord_report import post_to_discord, post_or_edit_discord
+from chain_observer.bot.governance import GOVERNANCE
+from chain_observer.bot.digest import DIGEST_MODE, DIGEST
+from chain_observer.bot.generate_reports import generate_digest_report
+from chain_observer.bot import networks
 from db_manage.db_manager import db_manager
-from chain_observer.utils.check_thread_status import check_thread_staus
+from chain_observer.utils.refresh_coordinator import request_owner_refresh
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-COLDKEY_SWAP_DISCORD_WEBHOOK_URL = os.getenv('COLDKEY_SWAP_DISCORD_WEBHOOK_URL')
-DISSOLVE_NETWORK_DISCORD_WEBHOOK_URL = os.getenv('DISSOLVE_NETWORK_DISCORD_WEBHOOK_URL')
-chain_observer = BtChainObserver()
+# Blocks observed per tick at most while the checkpoint is behind the head (a slow or failed block, or a restart).
+CATCHUP_BLOCKS_PER_TICK = int(os.getenv('CATCHUP_BLOCKS_PER_TICK', '10'))
+# A checkpoint further behind the head is not caught up: the tick observes the head and logs the gap for backfill.py.
+CATCHUP_MAX_GAP_BLOCKS = int(os.getenv('CATCHUP_MAX_GAP_BLOCKS', '300'))
 
-def run_update_owner_coldkey_function():
-    """Runs the find_owner_coldkey function in a new thread."""
+default_network = None
+
+def get_default_network():
+    """Creates the network configured by the single-network environment variables on first use."""
+    global default_network
+    if default_network is None:
+        default_network = networks.default_network()
+    return default_network
+
+def get_chain_observer():
+    """Creates the BtChainObserver (and its chain connection) of the default network on first use."""
+    return get_default_network().get_observer()
+
+def apply_digest(network, chain_observer, reports, now=None):
+    """
+    Holds back the block's reports whose kind is not critical; the block's detections go to the running digests instead,
+    saved in the block's transaction.
+    Returns the reports to post now: the critical ones, and the digests of the periods that just ended.
+    """
+    immediate = []
+    held = Counter()
+    for kind, report, webhook_url in reports:
+        if not report:
+            continue
+        if network.digest.is_immediate(kind):
+            immediate.append((kind, report, webhook_url))
+        else:
+            held[kind] += 1
+    finished = network.digest.add_block(chain_observer.current_block_number, chain_observer.detected_events, held, now,
+                                        write=chain_observer.write)
+    if finished:
+        network.pending_schedules.load()
+        pending = list(network.pending_schedules.pending.values())
+        for period in finished:
+            report = generate_digest_report(f"📋 __ {period.name.upper()} DIGEST __ 📋", network.digest.details(period, pending))
+            immediate.append((DIGEST, report, network.webhook(DIGEST)))
+    return immediate
+
+def queue_reports(network, chain_observer, results):
+    """
+    Adds the reports of the block just processed to the network's outbox. Called by bt_block_observer before the block
+    commits, so the reports (and the digests) are committed with everything else the block wrote.
+    """
+    (report_swap_coldkey, report_dissolve_network, report_vote,
+     dissolved_subnet_report, swapped_coldkey_report, _) = results
+
+    coldkey_swap_webhook = network.webhook('coldkey_swap')
+    dissolve_network_webhook = network.webhook('dissolve_network')
+    reports = [
+        ('schedule_swap_coldkey', report_swap_coldkey, coldkey_swap_webhook),
+        ('schedule_dissolve_network', report_dissolve_network, dissolve_network_webhook),
+        ('NetworkRemoved', dissolved_subnet_report, dissolve_network_webhook),
+        ('vote', report_vote, coldkey_swap_webhook),
+        ('ColdkeySwapped', swapped_coldkey_report, coldkey_swap_webhook),
+    ]
+
+    # Reports of the other detectors, routed by channel
+    for report, channel in chain_observer.extra_reports:
+        reports.append((channel, report, network.webhook(channel)))
+
+    if DIGEST_MODE:
+        chain_observer.unit_of_work.on_rollback(network.digest.reload)
+        reports = apply_digest(network, chain_observer, reports)
+
+    # Only reports with values and a channel to go to
+    entries = [(kind, report, webhook_url, None) for kind, report, webhook_url in reports if report and webhook_url]
+    # One message per proposal, edited with its latest tally
+    governance_webhook = network.webhook(GOVERNANCE)
+    if governance_webhook:
+        entries.extend((GOVERNANCE, report, governance_webhook, proposal_hash)
+                       for proposal_hash, report in chain_observer.tally_updates.items())
+    chain_observer.write(network.report_outbox.add, chain_observer.current_block_number, entries)
+
+def deliver_report(network, entry):
+    """
+    Posts a report of the outbox, or edits the tally message of its proposal. Returns True once Discord accepted it.
+    """
+    if entry.proposal_hash is None:
+        status_code, text = post_to_discord(entry.report, entry.webhook_url)
+        if status_code >= 300:
+            logging.error(f"Failed to post to Discord: {status_code} {text}")
+            return False
+        return True
+    tally = network.governance.get(entry.proposal_hash)
+    message_id = post_or_edit_discord(entry.report, entry.webhook_url, tally.message_id if tally else None)
+    if message_id is None:
+        return False
+    network.governance.set_message_id(entry.proposal_hash, message_id)
+    return True
+
+def deliver_reports(network):
+    """
+    Posts the reports waiting in the network's outbox, oldest first, and removes each one Discord accepted.
+    After a failure, the later reports of the same webhook wait for the next tick, so every channel keeps its order.
+    """
+    # A standby that took over meanwhile posts the reports; this instance stays silent.
+    if network.leader_token is not None:
+        network.check_leader()
+    failed_webhooks = set()
+    for entry in network.report_outbox.pending():
+        if entry.webhook_url in failed_webhooks:
+            continue
+        try:
+            delivered = deliver_report(network, entry)
+        except Exception as e:
+            logging.error(f"Failed to post the {entry.kind} report of block {entry.block_number} to Discord: {e}")
+            delivered = False
+        if delivered:
+            network.report_outbox.delivered(entry)
+        else:
+            network.report_outbox.failed(entry)
+            failed_webhooks.add(entry.webhook_url)
+
+def blocks_to_observe(network, chain_observer):
+    """
+    Returns the blocks of this tick: the blocks after the network's checkpoint up to the chain head, at most
+    CATCHUP_BLOCKS_PER_TICK of them, oldest first. So a block produced while a slow block was processed, or a block whose
+    writes were rolled back, is observed at the next tick. Without a checkpoint, or when it is more than
+    CATCHUP_MAX_GAP_BLOCKS behind, only the head is observed.
+    """
+    head = chain_observer.get_current_block_number()
+    last_block_number = network.db_manager.get_last_block_number()
+    if last_block_number is None:
+        return [head]
+    if head - last_block_number > CATCHUP_MAX_GAP_BLOCKS:
+        logging.warning(f"Network {network.name} is {head - last_block_number} blocks behind, observing the head; "
+                        f"observe the gap with backfill.py --start {last_block_number + 1} --end {head}.")
+        return [head]
+    return list(range(last_block_number + 1, min(head, last_block_number + CATCHUP_BLOCKS_PER_TICK) + 1))
+
+def run_bot(network=None):
+    """
+    Process and send reports of one network (the default one when None) to Discord.
+    A block that fails stops the tick; the next tick starts again from the checkpoint.
+    """
+    network = network or get_default_network()
     try:
-        with open('config/thread_status.status', 'w') as f:
-            f.write('running')
-        db_manager.update_whole_owner_coldkeys()
+        chain_observer = network.get_observer()
+        for block_number in blocks_to_observe(network, chain_observer):
+            results = chain_observer.bt_block_observer(block_number, on_processed=lambda results: queue_reports(network, chain_observer, results))
+
+            if results[5]:
+                # Merged with any owner refresh already waiting; bursts of NetworkRemoved events reload the table once.
+                request_owner_refresh(network.db_manager)
     except Exception as e:
-        logging.error(f"Error in updating owner coldkey: {e}")
-    finally:
-        with open('config/thread_status.status', 'w') as f:
-            f.write('not running')
+        logging.error(f"Error during running bot: {e}")
+    try:
+        # The block's reports, and any left over by an earlier tick (Discord unreachable, or a crash after the commit).
+        deliver_reports(network)
+    except Exception as e:
+        logging.error(f"Error delivering reports: {e}")
 
-def run_bot():
-    """Process and send reports to Discord."""
+def run(network=None):
+    """
+    Runs the bot once for a network. A tick is skipped while the previous blocks of the same network are still processed
+    (the next one catches up from the checkpoint), and on standby instances that do not hold the network's leader lease.
+    """
+    network = network or get_default_network()
+    if not network.lock.acquire(blocking=False):
+        logging.warning(f"Previous blocks of network {network.name} are still being processed, skipping this tick.")
+        return
     try:
-        (report_swap_coldkey, report_dissolve_network, report_vote, 
-         dissolved_subnet_report, swapped_coldkey_report, 
-         should_update_owner_table) = chain_observer.bt_block_observer()
+        if not network.is_leader():
+            logging.info(f"Standby for network {network.name}: another instance holds the leader lease.")
+            return
+        time_now = datetime.now()
+        start_time = time.time()
+        logging.info(f"Bot process started for network {network.name} at {time_now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}.")
         
-        if should_update_owner_table:
-            thread_status = check_thread_staus()
-            if thread_status == 'not running':
-                update_owner_thread = threading.Thread(target=run_update_owner_coldkey_function)
-                update_owner_thread.start()
-            else:
-                logging.info("Update owner coldkey function is already running.")
-
-        reports = [
-            (report_swap_coldkey, COLDKEY_SWAP_DISCORD_WEBHOOK_URL),
-            (report_dissolve_network, DISSOLVE_NETWORK_DISCORD_WEBHOOK_URL),
-            (dissolved_subnet_report, DISSOLVE_NETWORK_DISCORD_WEBHOOK_URL),
-            (report_vote, COLDKEY_SWAP_DISCORD_WEBHOOK_URL),
-            (swapped_coldkey_report, COLDKEY_SWAP_DISCORD_WEBHOOK_URL),
-        ]
+        # The lease is renewed while the block is processed, however long it takes.
+        with network.keep_leader():
+            run_bot(network)
         
-        # Post reports to Discord only if they have values
-        for report, webhook_url in reports:
-            if report:
-                post_to_discord(report, webhook_url)
-    except Exception as e:
-        logging.error(f"Error during running bot: {e}")
-
-def run():
-    """Main function to run the bot process."""
-    time_now = datetime.now()
-    start_time = time.time()
-    logging.info(f"Bot process started at {time_now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}.")
-    
-    run_bot()
-    
-    end_time = time.time()
-    logging.info(f"Process completed in {end_time - start_time:.3f} seconds.")
+        end_time = time.time()
+        logging.info(f"Process completed in {end_time - start_time:.3f} seconds.")
+    finally:
+        network.lock.release()
 
 if __name__ == "__main__":
     run()
@@ -0,0 +1,44 @@
+# Description: Exports and imports versioned, compressed snapshots of the dataset tables (validators and owners).
+# Usage: python snapshot.py export [--network finney] [--dir snapshots] [--block 4000000]
+#        python snapshot.py import PATH [--network finney]
+#        python snapshot.py list [--network finney] [--dir snapshots]
+import argparse
+import logging
+from db_manage.snapshots import SnapshotStore, SNAPSHOT_DIR
+from chain_observer.bot.networks import load_networks
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import dataset snapshots.")
+    parser.add_argument('command', choices=['export', 'import', 'list'])
+    parser.add_argument('path', nargs='?', help="Snapshot file to import.")
+    parser.add_argument('--network', help="Name of the network in NETWORKS (the first one by default).")
+    parser.add_argument('--dir', default=SNAPSHOT_DIR or 'snapshots', help="Snapshot directory (SNAPSHOT_DIR by default).")
+    parser.add_argument('--block', type=int, help="Block the dataset is up to date with (the last observed block by default).")
+    args = parser.parse_args()
+
+    networks = load_networks()
+    network = next((network for network in networks if network.name == args.network), None) if args.network else networks[0]
+    if network is None:
+        parser.error(f"Unknown network {args.network}.")
+    store = SnapshotStore(args.dir)
+    if args.command == 'export':
+        block_number = args.block if args.block is not None else network.db_manager.get_last_block_number()
+        if block_number is None:
+            parser.error("No block observed yet, pass --block.")
+        print(store.export(network.db_path, network.name, block_number))
+    elif args.command == 'import':
+        if not args.path:
+            parser.error("import needs the path of a snapshot.")
+        header = store.import_snapshot(network.db_path, args.path)
+        print(f"Imported {args.path}: block {header['block_number']}, taken at {header['taken_at']}.")
+    else:
+        for path in store.list(network.name):
+            header = store.header(path)
+            print(f"{path}: block {header['block_number']}, taken at {header['taken_at']}")
+
+
+if __name__ == "__main__":
+    main()
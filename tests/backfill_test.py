@@ -0,0 +1,45 @@
+import shutil
+import pytest
+import backfill
+from benchmarks.corpus import ReplaySubstrate, RecordedBlock, load_scenario
+from chain_observer.bot.bt_chain_observer import BtChainObserver
+from chain_observer.bot.networks import Network
+
+START = 3901000
+
+@pytest.fixture
+def blocks():
+    """ Fixture to renumber the recorded swap blocks into consecutive blocks from START. """
+    return [RecordedBlock({'block_number': START + position, 'block_hash': f'0x{position:064x}', 'parent_hash': f'0x{position - 1:064x}',
+                           'extrinsics': [extrinsic.value for extrinsic in block.extrinsics],
+                           'events': [event.value for event in block.events]})
+            for position, block in enumerate(load_scenario('swaps'))]
+
+@pytest.fixture
+def network(tmp_path, blocks):
+    """ Fixture to create a network on a copy of the database, observing the blocks. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', db_path)
+    network = Network('test', [], db_path, {})
+    network.observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=network)
+    return network
+
+def test_backfill_leaves_live_schedules_alone(network, blocks):
+    """ Test backfilled schedules and swaps are archived without touching the live pending schedules. """
+    assert backfill.backfill(network, START, START + len(blocks), 100) == len(blocks)
+    assert network.event_archive.query_events(event_type='schedule_swap_coldkey')[0]
+    assert network.pending_schedules.upcoming(START, 10 ** 6) == []
+
+def test_failed_block_is_retried(network, blocks, monkeypatch):
+    """ Test a block that fails once is observed again after the chunks, and its chunk is still completed. """
+    failures = {START + 1: 1}
+    observe_block = BtChainObserver.observe_block
+    def flaky_observe_block(self, block_number, block_data=None):
+        if failures.get(block_number):
+            failures[block_number] -= 1
+            raise RuntimeError('node timeout')
+        return observe_block(self, block_number, block_data)
+    monkeypatch.setattr(BtChainObserver, 'observe_block', flaky_observe_block)
+    assert backfill.backfill(network, START, START + len(blocks), 5) == len(blocks)
+    assert network.event_archive.block_events(START + 1)
+    assert network.leases.claim_failed_block(f'backfill:{START}:{START + len(blocks)}', 3) is None
@@ -0,0 +1,94 @@
+import os
+import shutil
+import pytest
+from benchmarks.corpus import ReplaySubstrate, load_scenario
+from chain_observer.bot.block_recorder import BlockRecorder, read_segment, replay_segment, list_segments, FRAME_HEADER
+from chain_observer.bot.bt_chain_observer import BtChainObserver
+from chain_observer.bot.networks import Network
+
+@pytest.fixture
+def recording(tmp_path):
+    """ Fixture to observe the recorded swap and vote blocks on a copy of the database, recording them in segments of 10 blocks. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', db_path)
+    blocks = load_scenario('swaps') + load_scenario('votes')
+    observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=Network('finney', [], db_path, {}))
+    observer.block_recorder = BlockRecorder(str(tmp_path / 'records'), 'finney', db_path, segment_blocks=10)
+    for block in blocks:
+        observer.tally_updates = {}
+        observer.observe_block(block.block_number)
+    observer.block_recorder.close()
+    return str(tmp_path / 'records'), blocks
+
+def test_blocks_are_recorded_in_segments(recording):
+    """ Test every observed block is recorded, with its payloads and reports, in segments of the configured size. """
+    directory, blocks = recording
+    segments = list_segments(directory, 'finney')
+    assert len(segments) == 3
+    assert all(os.path.exists(segment[:-len('.seg')] + '.base.sqlite3') for segment in segments)
+    frames = [frame for segment in segments for frame in read_segment(segment)]
+    assert [frame['block_number'] for frame in frames] == [block.block_number for block in blocks]
+    assert any(frame['reports'] for frame in frames)
+
+def test_replay_reproduces_the_reports(recording):
+    """ Test replaying the segments gives the recorded reports for every block. """
+    directory, blocks = recording
+    stats = [replay_segment(segment) for segment in list_segments(directory)]
+    assert sum(stat['blocks'] for stat in stats) == len(blocks)
+    assert sum(stat['reports'] for stat in stats) > 0
+    assert [stat['mismatches'] for stat in stats] == [[], [], []]
+
+def test_replay_catches_a_changed_detector(recording, monkeypatch):
+    """ Test a detector whose reports change shows up as a mismatch, and a partial last frame is ignored. """
+    directory, _ = recording
+    segment = list_segments(directory)[0]
+    with open(segment, 'ab') as f:
+        f.write(FRAME_HEADER.pack(1, 500) + b'cut')
+    monkeypatch.setattr(BtChainObserver, 'process_swapped_coldkey', lambda self, *args: None)
+    stats = replay_segment(segment)
+    assert stats['blocks'] == 10
+    assert stats['mismatches']
+
+def test_raw_payloads_are_decoded_at_replay(tmp_path):
+    """ Test raw payloads are recorded with their spec version and decoded again at replay, so a decoder change shows up. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', db_path)
+    directory = str(tmp_path / 'records')
+    blocks = {block.block_number: block for block in load_scenario('swaps')}
+    substrate = ReplaySubstrate(list(blocks.values()))
+
+    def fetch(substrate, metadata_files, block_number):
+        extrinsics = [f'{block_number}:{index}' for index in range(len(blocks[block_number].extrinsics))]
+        return {'block_number': block_number, 'extrinsics': extrinsics, 'events': f'{block_number}', 'spec_version': 7}
+
+    def decode(raw_block):
+        assert raw_block['metadata_path'] == os.path.join(directory, 'finney-metadata', 'metadata_7.hex')
+        block = blocks[raw_block['block_number']]
+        extrinsics = [block.extrinsics[int(raw.split(':')[1])].value for raw in raw_block['extrinsics']]
+        return raw_block['block_number'], extrinsics, [event.value for event in block.events]
+
+    observer = BtChainObserver(substrate=substrate, network=Network('finney', [], db_path, {}))
+    observer.block_recorder = BlockRecorder(directory, 'finney', db_path, substrate=substrate, fetch=fetch)
+    for block_number in blocks:
+        observer.tally_updates = {}
+        observer.observe_block(block_number)
+    observer.block_recorder.close()
+    segment = list_segments(directory)[0]
+    assert all('raw' in frame and 'extrinsics' not in frame for frame in read_segment(segment))
+    assert replay_segment(segment, decode=decode)['mismatches'] == []
+
+    def decode_without_extrinsics(raw_block):
+        block_number, _, events = decode(raw_block)
+        return block_number, [], events
+
+    assert replay_segment(segment, decode=decode_without_extrinsics)['mismatches']
+
+def test_recorded_blocks_are_fully_decoded(tmp_path, monkeypatch):
+    """ Test lazy decoding is skipped while recording, so blocks are recorded with all their extrinsics. """
+    monkeypatch.setattr('chain_observer.bot.bt_chain_observer.LAZY_DECODING', True)
+    blocks = load_scenario('swaps')
+    observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=Network('finney', [], str(tmp_path / 'db.sqlite3'), {}))
+    observer.block_recorder = BlockRecorder(str(tmp_path / 'records'), 'finney', observer.db_manager.db_path)
+    monkeypatch.setattr(observer, 'load_lazy_block', lambda block_hash, events: {'header': {}, 'extrinsics': []})
+    block, _ = observer.get_block_data(blocks[0].block_number)
+    assert len(block['extrinsics']) == len(blocks[0].extrinsics)
@@ -0,0 +1,115 @@
+import time
+import pytest
+import chain_observer.utils.chain_client as chain_client
+from chain_observer.utils.chain_client import ChainClient
+
+class FakeSubstrate:
+    """ Substrate answering get_block_hash after `delay` seconds (get_block ten times slower), or failing when `fail` is set. """
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.closed = False
+
+    def get_block_hash(self, block_id=None):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return f"{self.name}-{block_id}"
+
+    def get_block(self, block_hash=None):
+        time.sleep(self.delay * 10)
+        return {'hash': block_hash}
+
+    def close(self):
+        self.closed = True
+
+def make_client(substrates):
+    return ChainClient(list(substrates), connect=lambda url: substrates[url])
+
+@pytest.fixture(autouse=True)
+def short_delays(monkeypatch):
+    """ Fixture to hedge after 50 ms and take endpoints out of rotation after 2 failures. """
+    monkeypatch.setattr(chain_client, 'HEDGE_DEFAULT_DELAY_MS', 50)
+    monkeypatch.setattr(chain_client, 'ENDPOINT_FAILURE_THRESHOLD', 2)
+
+def test_primary_answers():
+    """ Test a fast primary answers alone, without hedging. """
+    primary, secondary = FakeSubstrate('primary'), FakeSubstrate('secondary')
+    client = make_client({'a': primary, 'b': secondary})
+    assert client.get_block_hash(block_id=7) == 'primary-7'
+    assert secondary.calls == 0
+
+def test_slow_primary_is_hedged():
+    """ Test the secondary's answer wins when the primary misses the hedge deadline. """
+    primary, secondary = FakeSubstrate('primary', delay=0.5), FakeSubstrate('secondary')
+    client = make_client({'a': primary, 'b': secondary})
+    start = time.monotonic()
+    assert client.get_block_hash(block_id=7) == 'secondary-7'
+    assert time.monotonic() - start < 0.4
+
+def test_failover_and_unhealthy_endpoint():
+    """ Test a failing primary falls over to the secondary and leaves the rotation after repeated failures. """
+    primary, secondary = FakeSubstrate('primary', fail=True), FakeSubstrate('secondary')
+    client = make_client({'a': primary, 'b': secondary})
+    assert client.get_block_hash(block_id=1) == 'secondary-1'
+    assert client.get_block_hash(block_id=2) == 'secondary-2'
+    assert client.get_block_hash(block_id=3) == 'secondary-3'
+    assert primary.calls == 2
+    assert [stats['healthy'] for stats in client.stats()] == [False, True]
+
+def test_all_endpoints_failing_raises():
+    """ Test the last error is raised when no endpoint answers. """
+    client = make_client({'a': FakeSubstrate('a', fail=True), 'b': FakeSubstrate('b', fail=True)})
+    with pytest.raises(ConnectionError):
+        client.get_block_hash(block_id=1)
+
+def test_failed_connection_is_closed():
+    """ Test a failed request closes the websocket of the dropped connection before the next request reconnects. """
+    connections = []
+    def connect(url):
+        connections.append(FakeSubstrate(url, fail=len(connections) == 0))
+        return connections[-1]
+    client = ChainClient(['a'], connect=connect)
+    with pytest.raises(ConnectionError):
+        client.get_block_hash(block_id=1)
+    assert client.get_block_hash(block_id=2) == 'a-2'
+    assert [substrate.closed for substrate in connections] == [True, False]
+
+def test_hedge_delay_is_per_method(monkeypatch):
+    """ Test slow get_block calls do not raise the hedge deadline of get_block_hash. """
+    monkeypatch.setattr(chain_client, 'LATENCY_MIN_SAMPLES', 3)
+    monkeypatch.setattr(chain_client, 'HEDGE_MIN_DELAY_MS', 0)
+    client = make_client({'a': FakeSubstrate('a', delay=0.01)})
+    for block_id in range(3):
+        client.get_block_hash(block_id=block_id)
+        client.get_block(block_hash='0x00')
+    endpoint = client.endpoints[0]
+    assert endpoint.hedge_delay('get_block_hash') < 0.05 < endpoint.hedge_delay('get_block')
+    assert endpoint.hedge_delay('get_events') == chain_client.HEDGE_DEFAULT_DELAY_MS / 1000
+
+def test_only_request_methods_are_proxied():
+    """ Test connection attributes such as runtime_config are not turned into remote calls. """
+    client = make_client({'a': FakeSubstrate('a')})
+    assert not hasattr(client, 'runtime_config')
+    with pytest.raises(AttributeError):
+        client.metadata
+    assert client.get_block_hash(block_id=1) == 'a-1'
+
+def test_metadata_cache_is_per_chain(monkeypatch):
+    """ Test endpoints of one chain share a metadata cache and a chain with another genesis hash gets its own. """
+    import substrateinterface.base
+    class FakeInterface:
+        def __init__(self, url, **kwargs):
+            self.url = url
+            self.cache_region = kwargs.get('cache_region')
+        def rpc_request(self, method, params):
+            assert (method, params) == ('chain_getBlockHash', [0])
+            return {'result': '0xtestnet' if 'test' in self.url else '0xfinney'}
+    monkeypatch.setattr(substrateinterface.base, 'SubstrateInterface', FakeInterface)
+    finney, finney_backup, testnet = (chain_client.connect_substrate(url) for url in ('wss://a', 'wss://b', 'wss://test'))
+    finney.cache_region.set('METADATA_200', 'finney metadata')
+    assert finney_backup.cache_region is finney.cache_region
+    assert testnet.cache_region.get('METADATA_200') is None
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+import pytest
+import run
+from chain_observer.bot.digest import DigestBuilder, DIGEST
+from chain_observer.bot.pending_schedules import PendingScheduleRegistry, COLDKEY_SWAP
+from db_manage.unit_of_work import write_now
+
+# The start of the second hour of a UTC day
+HOUR = 1_700_000_000 // 86400 * 86400 + 3600
+
+@pytest.fixture
+def builder(tmp_path):
+    """ Fixture to create an hourly and daily digest builder on a temporary database. """
+    return DigestBuilder(str(tmp_path / 'db.sqlite3'), periods=['hourly', 'daily'], immediate=['ColdkeySwapped', 'coldkey_swap'], top=2)
+
+def swap(coldkey, netuid=None):
+    return {'event_type': 'schedule_swap_coldkey', 'coldkey': coldkey, 'netuid': netuid}
+
+def test_periods_are_summarised_as_blocks_arrive(builder):
+    """ Test a period's digest counts its events, coldkeys, subnets and held back reports, and is returned once it ends. """
+    assert builder.add_block(100, [swap('5A'), swap('5A', 3)], {'watchlist': 1}, now=HOUR + 10) == []
+    assert builder.add_block(101, [], {}, now=HOUR + 20) == []
+    assert builder.add_block(102, [swap('5B', 3), {'event_type': 'vote', 'hotkey': '5H'}], {}, now=HOUR + 30) == []
+    finished = builder.add_block(400, [], {}, now=HOUR + 3600)
+    assert [period.name for period in finished] == ['hourly']
+    hourly, = finished
+    assert (hourly.first_block, hourly.last_block) == (100, 102)
+    assert hourly.counts == {'schedule_swap_coldkey': 3, 'vote': 1}
+    assert hourly.coldkeys.most_common(1) == [('5A', 2)]
+    assert hourly.netuids == {'3': 2}
+    assert hourly.held == {'watchlist': 1}
+    # The daily period keeps running and empty periods are not reported
+    assert builder.add_block(700, [], {}, now=HOUR + 7200) == []
+
+def test_running_periods_survive_a_restart(builder):
+    """ Test the running summaries are read back after a restart and still close at the end of their period. """
+    builder.add_block(100, [swap('5A')], {}, now=HOUR + 10)
+    restarted = DigestBuilder(builder.db_path, periods=['hourly'])
+    hourly, = restarted.add_block(400, [], {}, now=HOUR + 3600)
+    assert hourly.counts == {'schedule_swap_coldkey': 1}
+
+def test_apply_digest_posts_critical_reports_and_digests(builder):
+    """ Test run_bot holds back the non-critical reports, posts the critical ones and then the digest of the ended period. """
+    schedules = PendingScheduleRegistry(builder.db_path)
+    schedules.add(COLDKEY_SWAP, '5Old', '5New', 90, 7290)
+    network = SimpleNamespace(digest=builder, pending_schedules=schedules, webhook=lambda channel: f'https://discord.example/{channel}')
+    observer = SimpleNamespace(current_block_number=100, detected_events=[swap('5Old')], write=write_now)
+    reports = [('ColdkeySwapped', {'title': 'swapped'}, 'https://discord.example/coldkey_swap'),
+               ('watchlist', {'title': 'watched'}, 'https://discord.example/watchlist'),
+               ('vote', None, 'https://discord.example/coldkey_swap')]
+    builder.add_block(99, [], {}, now=HOUR - 10)
+    builder.add_block(99, [swap('5Old')], {'stake_flow': 1}, now=HOUR - 5)
+    posted = run.apply_digest(network, observer, reports, now=HOUR + 10)
+    assert [kind for kind, _, _ in posted] == ['ColdkeySwapped', DIGEST]
+    digest = posted[1][1]
+    values = {field['name'].strip(' \n*📋').lower(): field['value'] for field in digest['fields']}
+    assert 'stake_flow: 1' in values['reports held back']
+    assert '1 pending' in values['pending schedules']
+    assert builder.current['hourly'].held == {'watchlist': 1}
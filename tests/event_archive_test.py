@@ -0,0 +1,76 @@
+import sqlite3
+import pytest
+from db_manage.event_archive import EventArchive
+
+@pytest.fixture
+def archive(tmp_path):
+    """ Fixture to create an EventArchive on a temporary database. """
+    yield EventArchive(str(tmp_path / 'archive.sqlite3'))
+
+def test_record_and_query_by_coldkey(archive):
+    """ Test swaps are found by either their old or their new coldkey. """
+    archive.record_block_events(100, [
+        {'event_type': 'schedule_swap_coldkey', 'coldkey': 'old', 'new_coldkey': 'new', 'execution_block': 200, 'success': True},
+        {'event_type': 'vote', 'hotkey': 'hot', 'proposal': '0xabc', 'index': 3, 'approve': True, 'success': True},
+    ])
+    archive.record_block_events(200, [{'event_type': 'ColdkeySwapped', 'coldkey': 'old', 'new_coldkey': 'new', 'success': True}])
+
+    events, cursor = archive.query_events(coldkey='new')
+    assert [event['event_type'] for event in events] == ['ColdkeySwapped', 'schedule_swap_coldkey']
+    assert cursor is None
+
+    votes, _ = archive.query_events(event_type='vote', proposal='0xabc')
+    assert votes[0]['hotkey'] == 'hot'
+    assert votes[0]['index'] == 3
+    assert votes[0]['approve'] is True
+
+def test_keyset_pagination(archive):
+    """ Test pages follow each other without gaps or duplicates. """
+    for block_number in range(1, 26):
+        archive.record_block_events(block_number, [{'event_type': 'NetworkRemoved', 'netuid': block_number % 3}])
+    seen, cursor = [], None
+    while True:
+        page, cursor = archive.query_events(netuid=1, before_id=cursor, limit=3)
+        seen.extend(event['block_number'] for event in page)
+        if cursor is None:
+            break
+    assert seen == sorted((n for n in range(1, 26) if n % 3 == 1), reverse=True)
+
+def test_block_range_filter(archive):
+    """ Test block range filters are inclusive. """
+    for block_number in range(10):
+        archive.record_block_events(block_number, [{'event_type': 'vote', 'hotkey': 'hot'}])
+    events, _ = archive.query_events(hotkey='hot', from_block=3, to_block=5)
+    assert [event['block_number'] for event in events] == [5, 4, 3]
+
+def test_archive_is_append_only(archive):
+    """ Test archived rows cannot be updated or deleted. """
+    archive.record_block_events(1, [{'event_type': 'vote', 'hotkey': 'hot'}])
+    conn = sqlite3.connect(archive.db_path)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("UPDATE event_archive SET hotkey = 'other'")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("DELETE FROM event_archive")
+
+def test_empty_block_does_not_touch_database(archive, tmp_path):
+    """ Test blocks without events are not written. """
+    assert archive.record_block_events(1, []) == 0
+    assert not (tmp_path / 'archive.sqlite3').exists()
+
+@pytest.mark.parametrize('filters, index', [
+    ({'event_type': 'vote'}, 'idx_event_archive_event_type'),
+    ({'coldkey': 'cold'}, 'idx_event_archive_new_coldkey'),
+    ({'hotkey': 'hot', 'before_id': 5}, 'idx_event_archive_hotkey'),
+    ({'netuid': 1}, 'idx_event_archive_netuid'),
+    ({'proposal': '0xabc'}, 'idx_event_archive_proposal'),
+    ({'from_block': 1, 'to_block': 5}, 'idx_event_archive_block'),
+])
+def test_queries_use_indexes(archive, filters, index):
+    """ Test the queries built by query_events are served by the archive indexes, retracted-block check included. """
+    archive.record_block_events(1, [{'event_type': 'vote', 'hotkey': 'hot'}])
+    sql, params = archive.build_query(**filters)
+    conn = sqlite3.connect(archive.db_path)
+    plan = [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+    assert any(index in detail for detail in plan)
+    assert not any(detail.startswith('SCAN event_archive') for detail in plan)
+    assert any('idx_retracted_blocks_block' in detail for detail in plan)
@@ -0,0 +1,97 @@
+import pytest
+from chain_observer.bot.finality import FinalityTracker
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'db.sqlite3')
+
+@pytest.fixture
+def tracker(db_path):
+    """ Fixture to create a tracker over blocks 100..104 of chain 'a', with a vote in 102. """
+    tracker = FinalityTracker(db_path, window_blocks=8)
+    for number in range(100, 105):
+        tracker.record(number, f'a{number}', f'a{number - 1}', ['vote'] if number == 102 else [])
+    return tracker
+
+def test_continuous_chain_has_no_reorg(tracker):
+    """ Test a block whose parent is the stored hash is accepted without touching the node. """
+    def canonical_hash(number):
+        raise AssertionError("canonical hashes must not be fetched")
+    assert tracker.check_parent(105, 'a104', canonical_hash) == []
+
+def test_reorg_returns_orphaned_blocks(tracker):
+    """ Test a fork from block 102 orphans blocks 102..104, oldest first. """
+    canonical = {number: (f'a{number}' if number < 102 else f'b{number}') for number in range(100, 106)}
+    orphaned = tracker.check_parent(105, 'b104', canonical.get)
+    assert [block.block_number for block in orphaned] == [102, 103, 104]
+    assert orphaned[0].detections == 'vote'
+
+def test_finalize_confirms_blocks(db_path, tracker):
+    """ Test finalizing block 103 confirms 100..103 once, and the state survives a restart. """
+    confirmed, orphaned = tracker.finalize(103, 'a103', lambda number: f'a{number}')
+    assert [block.block_number for block in confirmed] == [100, 101, 102, 103]
+    assert orphaned == []
+    restarted = FinalityTracker(db_path, window_blocks=8)
+    confirmed, _ = restarted.finalize(104, 'a104', lambda number: f'a{number}')
+    assert [block.block_number for block in confirmed] == [104]
+
+def test_finalize_on_other_fork(tracker):
+    """ Test a finalized hash different from the observed one orphans the blocks since the fork. """
+    canonical = {number: (f'a{number}' if number < 103 else f'b{number}') for number in range(100, 105)}
+    confirmed, orphaned = tracker.finalize(104, 'b104', canonical.get)
+    assert [block.block_number for block in confirmed] == [100, 101, 102]
+    assert [block.block_number for block in orphaned] == [103, 104]
+
+def test_window_is_bounded(tracker):
+    """ Test blocks older than the window are dropped. """
+    tracker.record(110, 'a110', 'a109', [])
+    assert sorted(tracker.window) == [103, 104, 110]
+
+def test_gap_before_block_is_checked_against_node(tracker):
+    """ Test a block whose parent height was not observed checks the newest observed block against the node. """
+    canonical = {number: (f'a{number}' if number < 103 else f'b{number}') for number in range(100, 110)}
+    orphaned = tracker.check_parent(107, 'b106', canonical.get)
+    assert [block.block_number for block in orphaned] == [103, 104]
+    assert tracker.check_parent(107, 'a106', lambda number: f'a{number}') == []
+
+def test_reorg_reverts_orphaned_writes(tmp_path, monkeypatch):
+    """ Test the swap, schedule, stake flow and archived events of an orphaned block are undone and the canonical block is counted. """
+    import shutil
+    import sqlite3
+    import chain_observer.bot.bt_chain_observer as observer_module
+    from benchmarks.corpus import ReplaySubstrate, RecordedBlock, load_scenario
+    from chain_observer.bot.bt_chain_observer import BtChainObserver
+    from chain_observer.bot.networks import Network
+    db_path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', db_path)
+    quiet, swap = load_scenario('quiet')[0], load_scenario('swaps')[1]
+    def block(source, number, block_hash, parent_hash):
+        return RecordedBlock({'block_number': number, 'block_hash': block_hash, 'parent_hash': parent_hash,
+                              'extrinsics': [extrinsic.value for extrinsic in source.extrinsics],
+                              'events': [event.value for event in source.events]})
+    number = swap.block_number
+    chain = ReplaySubstrate([block(quiet, number - 1, 'p', 'o'), block(swap, number, 'x', 'p')])
+    chain.get_chain_finalised_head = lambda: 'p'
+    monkeypatch.setattr(observer_module, 'FINALITY_MODE', True)
+    network = Network('test', [], db_path, {})
+    observer = BtChainObserver(substrate=chain, network=network)
+    old_coldkey, new_coldkey = '5DcihsNXRDg6XoZeatHJfa5UzDuVg5KNzeDsoYgGwRXCgCu5', '5CBgrDMmkBXE3Lv2fvGMYFygkPcdpCb7jd77vcGfEgz1PFeP'
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("INSERT INTO validators (cold_key, hot_key, amount, name) VALUES (?, '5ReorgHot', '1', 'reorg')", (old_coldkey,))
+    observer.bt_block_observer(number - 1)
+    observer.bt_block_observer(number)
+    assert network.db_manager.get_validator_name(new_coldkey)[2]
+    assert network.event_archive.block_events(number)
+    assert network.pending_schedules.upcoming(number, 10 ** 6)
+
+    for canonical in (block(quiet, number, 'y', 'p'), block(quiet, number + 1, 'z', 'y')):
+        chain.by_number[canonical.block_number] = canonical
+        chain.by_hash[canonical.block_hash] = canonical
+    observer.bt_block_observer(number + 1)
+    assert network.db_manager.get_validator_name(old_coldkey)[2]
+    assert not network.db_manager.get_validator_name(new_coldkey)[2]
+    assert all(event['block_hash'] == 'y' for event in network.event_archive.block_events(number))
+    assert network.pending_schedules.upcoming(number, 10 ** 6) == []
+    assert network.stake_flow.last_block == number + 1
+    assert network.stake_flow.aggregates[('hotkey', '5C5JU5tYdyTjsXwWdqEzJcrgCAKvygYSJo295id42XAuXAvU')].windows['24h'].total == 0
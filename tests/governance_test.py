@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+import pytest
+from chain_observer.bot import discord_report
+from chain_observer.bot.governance import GovernanceTally
+
+PROPOSAL = '0x' + '12' * 32
+
+def collective_event(event_id, attributes):
+    return SimpleNamespace(value={'module_id': 'Triumvirate', 'event_id': event_id, 'attributes': attributes})
+
+def voted(account, approve, yes, no):
+    return collective_event('Voted', {'account': account, 'proposal_hash': PROPOSAL, 'voted': approve, 'yes': yes, 'no': no})
+
+@pytest.fixture
+def tallies(tmp_path):
+    """ Fixture to create a governance tally registry on a temporary database. """
+    return GovernanceTally(str(tmp_path / 'db.sqlite3'))
+
+def test_tally_from_votes_and_events(tallies):
+    """ Test a proposal's tally follows its Proposed and Voted events, with the index taken from the vote extrinsic. """
+    tallies.process_block(100, [], [collective_event('Proposed', ['5Prop', 7, PROPOSAL, 3])])
+    changed = tallies.process_block(101, [('5HotA', PROPOSAL, True, 7)], [voted('5HotA', True, 1, 0)])
+    changed = tallies.process_block(102, [('5HotB', PROPOSAL, False, 7)], [voted('5HotB', False, 1, 1)])
+    tally, = changed
+    assert (tally.proposal_index, tally.threshold, tally.ayes, tally.nays, tally.needed) == (7, 3, 1, 1, 2)
+    assert tally.voters == {'5HotA': True, '5HotB': False}
+    # Replaying a block changes nothing
+    tallies.process_block(102, [('5HotB', PROPOSAL, False, 7)], [voted('5HotB', False, 1, 1)])
+    assert (tally.ayes, tally.nays) == (1, 1)
+
+def test_final_event_and_persistence(tallies):
+    """ Test the status set by a final event, the counts and the message id are kept across restarts. """
+    tallies.process_block(101, [], [voted('5HotA', True, 1, 0)])
+    tallies.set_message_id(PROPOSAL, '555')
+    tallies.process_block(120, [], [collective_event('Closed', {'proposal_hash': PROPOSAL, 'yes': 1, 'no': 2}),
+                                    collective_event('Disapproved', {'proposal_hash': PROPOSAL})])
+    restarted = GovernanceTally(tallies.db_path)
+    tally = restarted.get(PROPOSAL)
+    assert (tally.status, tally.ayes, tally.nays, tally.message_id, tally.last_block) == ('disapproved', 1, 2, '555', 120)
+
+def test_unknown_proposal_is_read_from_chain(tallies):
+    """ Test a proposal first seen through a vote is seeded from the collective's Voting storage. """
+    def lookup(proposal_hash):
+        return {'index': 4, 'threshold': 2, 'ayes': ['5HotA'], 'nays': [], 'end': 5000}
+    tally, = tallies.process_block(200, [('5HotB', PROPOSAL, True, 4)], [], lookup)
+    assert (tally.proposal_index, tally.threshold, tally.ayes, tally.nays, tally.needed) == (4, 2, 2, 0, 0)
+
+class FakeResponse:
+    def __init__(self, status_code, body=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.text = str(self.body)
+
+    def json(self):
+        return self.body
+
+class FakeSession:
+    def __init__(self, patch_status):
+        self.patch_status = patch_status
+        self.requests = []
+
+    def post(self, url, params=None, data=None, headers=None):
+        self.requests.append(('POST', url, params))
+        return FakeResponse(200, {'id': '777'})
+
+    def patch(self, url, data=None, headers=None):
+        self.requests.append(('PATCH', url, None))
+        return FakeResponse(self.patch_status)
+
+def test_tally_message_is_edited_in_place(monkeypatch):
+    """ Test the tally message is posted once, then edited, and posted again when it was deleted. """
+    session = FakeSession(patch_status=200)
+    monkeypatch.setattr(discord_report, 'get_session', lambda: session)
+    webhook = 'https://discord.example/api/webhooks/1/token?thread_id=9'
+    assert discord_report.post_or_edit_discord({'title': 'tally'}, webhook) == '777'
+    assert discord_report.post_or_edit_discord({'title': 'tally'}, webhook, '777') == '777'
+    assert session.requests == [('POST', webhook, {'wait': 'true'}),
+                                ('PATCH', 'https://discord.example/api/webhooks/1/token/messages/777?thread_id=9', None)]
+    session.patch_status = 404
+    assert discord_report.post_or_edit_discord({'title': 'tally'}, webhook, '123') == '777'
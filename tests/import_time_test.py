@@ -0,0 +1,14 @@
+import pytest
+from benchmarks.import_time import IMPORT_BUDGETS_MS, check_module, measure
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS_MS))
+def test_startup_modules_load_heavy_dependencies_lazily(module):
+    """ Test importing a startup module does not load bittensor, substrate-interface or the network stack. """
+    result = check_module(module, runs=1)
+    assert result['eager_dependencies'] == []
+
+def test_refresh_coordinator_loads_the_profiler_lazily():
+    """ Test importing the refresh coordinator does not load cProfile, pstats or tracemalloc; its refreshes do. """
+    _, imported = measure('chain_observer.utils.refresh_coordinator', runs=1)
+    assert 'chain_observer.utils.profiling' not in imported
+    assert not {'cProfile', 'pstats', 'tracemalloc'} & imported
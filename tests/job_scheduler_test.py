@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from chain_observer.utils.job_scheduler import JobScheduler, SKIP, QUEUE
+
+@pytest.fixture
+def scheduler():
+    """ Fixture to run a scheduler with two worker threads in the background. """
+    scheduler = JobScheduler(max_workers=2, stats_interval=0)
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+    yield scheduler
+    scheduler.shutdown()
+    thread.join(2)
+
+def slow_job(runs, seconds):
+    def job():
+        runs.append(time.monotonic())
+        time.sleep(seconds)
+    return job
+
+def test_overlapping_ticks_are_skipped(scheduler):
+    """ Test a job slower than its interval never runs twice at the same time with the SKIP policy. """
+    runs = []
+    scheduler.add_job('bot', slow_job(runs, 0.25), 0.1, overlap=SKIP)
+    time.sleep(0.6)
+    stats = scheduler.stats()['bot']
+    assert len(runs) <= 3
+    assert all(later - earlier >= 0.24 for earlier, later in zip(runs, runs[1:]))
+    assert stats['skipped'] >= 2
+    assert stats['overruns'] >= 1
+
+def test_overlapping_ticks_are_queued(scheduler):
+    """ Test a tick arriving during a run is run right after it with the QUEUE policy, and extra ticks are dropped. """
+    runs = []
+    scheduler.add_job('dataset', slow_job(runs, 0.3), 0.1, overlap=QUEUE, max_queued=1)
+    time.sleep(0.45)
+    assert len(runs) == 2
+    assert 0.29 <= runs[1] - runs[0] < 0.35
+    stats = scheduler.stats()['dataset']
+    assert stats['queued'] >= 1
+    assert stats['skipped'] >= 1
+
+def test_ticks_do_not_drift(scheduler):
+    """ Test ticks follow the schedule even when the job itself takes time. """
+    runs = []
+    start = time.monotonic()
+    scheduler.add_job('bot', slow_job(runs, 0.03), 0.1)
+    time.sleep(0.55)
+    assert len(runs) == 6
+    assert all(abs(run - start - 0.1 * index) < 0.03 for index, run in enumerate(runs))
+
+def test_failures_are_counted(scheduler):
+    """ Test a failing job keeps being scheduled and its failures are counted. """
+    calls = []
+    third_failure = threading.Event()
+    def job():
+        calls.append(1)
+        if len(calls) >= 3:
+            third_failure.set()
+        raise ValueError("boom")
+    scheduler.add_job('bot', job, 0.05)
+    assert third_failure.wait(5)
+    deadline = time.monotonic() + 5
+    while scheduler.stats()['bot']['runs'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stats = scheduler.stats()['bot']
+    assert stats['runs'] >= 3
+    assert stats['failures'] == stats['runs']
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+from chain_observer.bot.lazy_decoding import LazyBlockLoader, may_contain_call, read_compact
+
+SUBTENSOR_INDEX = 7
+VOTE = bytes([SUBTENSOR_INDEX, 55])
+WATCHED = {VOTE, bytes([SUBTENSOR_INDEX, 73]), bytes([SUBTENSOR_INDEX, 74])}
+
+def encode_compact(value):
+    if value < 1 << 6:
+        return bytes([value << 2])
+    return ((value << 2) | 1).to_bytes(2, 'little')
+
+def extrinsic(call_index, signed=True, args=b'\x01' * 40):
+    """ Encodes an extrinsic like chain_getBlock returns it: length prefix, version byte, signature, call. """
+    if signed:
+        body = b'\x84' + b'\x00' + b'\xaa' * 32 + b'\x01' + b'\xbb' * 64 + b'\x00' + encode_compact(12) + b'\x00' + b'\x00'
+    else:
+        body = b'\x04'
+    body += call_index + args
+    return '0x' + (encode_compact(len(body)) + body).hex()
+
+def test_read_compact():
+    """ Test the SCALE compact modes. """
+    assert read_compact(bytes([0x04]), 0) == (1, 1)
+    assert read_compact((69 << 2 | 1).to_bytes(2, 'little'), 0) == (69, 2)
+    assert read_compact((70000 << 2 | 2).to_bytes(4, 'little'), 0) == (70000, 4)
+
+def test_watched_calls_are_candidates():
+    """ Test signed and unsigned extrinsics of watched calls are found, other calls are not. """
+    assert may_contain_call(extrinsic(VOTE), WATCHED)
+    assert may_contain_call(extrinsic(VOTE, signed=False), WATCHED)
+    assert not may_contain_call(extrinsic(bytes([SUBTENSOR_INDEX, 0])), WATCHED)
+    assert not may_contain_call(extrinsic(bytes([2, 0]), signed=False), WATCHED)
+
+def test_call_index_in_arguments_is_ignored():
+    """ Test watched call index bytes far inside the arguments do not make the extrinsic a candidate. """
+    assert not may_contain_call(extrinsic(bytes([SUBTENSOR_INDEX, 0]), args=b'\x00' * 60 + VOTE), WATCHED)
+
+class FakeSubstrate:
+    def __init__(self, raw_extrinsics):
+        self.raw_extrinsics = raw_extrinsics
+        self.metadata_reads = 0
+        self.spec_versions = {}
+
+    def get_metadata_module(self, name, block_hash=None):
+        self.metadata_reads += 1
+        calls = [SimpleNamespace(name=name, value={'index': index}) for name, index in
+                 [('vote', 55), ('schedule_swap_coldkey', 73), ('schedule_dissolve_network', 74), ('set_weights', 0)]]
+        return SimpleNamespace(value={'index': SUBTENSOR_INDEX}, calls=calls)
+
+    def rpc_request(self, method, params):
+        if method == 'state_getRuntimeVersion':
+            return {'result': {'specVersion': self.spec_versions.get(params[0], 200)}}
+        return {'result': {'block': {'header': {'parentHash': params[0] + 'parent', 'number': '0x10'}, 'extrinsics': self.raw_extrinsics}}}
+
+def event(event_id):
+    return SimpleNamespace(value={'event_id': event_id})
+
+def test_quiet_block_is_not_decoded():
+    """ Test a block without watched calls or events is returned without extrinsics, and metadata is read once. """
+    substrate = FakeSubstrate([extrinsic(bytes([3, 0]), signed=False), extrinsic(bytes([SUBTENSOR_INDEX, 0]))])
+    loader = LazyBlockLoader(substrate)
+    block = loader.load('0xhash', [event('ExtrinsicSuccess')])
+    assert block == {'header': {'hash': '0xhash', 'parentHash': '0xhashparent', 'number': 16}, 'extrinsics': []}
+    loader.load('0xhash', [event('ExtrinsicSuccess')])
+    assert substrate.metadata_reads == 1
+
+def test_candidates_are_decoded():
+    """ Test watched calls or events ask for the full block. """
+    loader = LazyBlockLoader(FakeSubstrate([extrinsic(VOTE)]))
+    assert loader.load('0xhash', []) is None
+    assert loader.load('0xhash', [event('NetworkRemoved')]) is None
+
+def test_call_indices_follow_parent_runtime():
+    """ Test the upgrade block keeps the old call indices and the next blocks read the new ones, even when the upgrade block is skipped. """
+    substrate = FakeSubstrate([])
+    loader = LazyBlockLoader(substrate)
+    loader.load('0xupgrade', [event('CodeUpdated')])
+    assert substrate.metadata_reads == 1
+    substrate.spec_versions['0xnextparent'] = 201
+    loader.load('0xnext', [])
+    assert substrate.metadata_reads == 2
+    assert sorted(loader.call_indices) == [200, 201]
+    loader.load('0xupgrade', [])
+    assert substrate.metadata_reads == 2
+
+def test_rule_calls_are_candidates():
+    """ Test calls declared by the rule file make a block a candidate, and changing them reloads the call indices. """
+    substrate = FakeSubstrate([extrinsic(bytes([SUBTENSOR_INDEX, 0]))])
+    loader = LazyBlockLoader(substrate)
+    assert loader.load('0xhash', []) is not None
+    loader.watch({'SubtensorModule': {'set_weights'}})
+    assert loader.load('0xhash', []) is None
+    loader.watch({'SubtensorModule': {'set_weights'}})
+    loader.load('0xhash', [])
+    assert substrate.metadata_reads == 2
@@ -0,0 +1,84 @@
+import time
+import pytest
+from db_manage.leases import LeaseManager, LeaseLostError
+from db_manage.unit_of_work import BlockUnitOfWork
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'db.sqlite3')
+
+def test_single_leader_and_takeover(db_path):
+    """ Test only one instance holds the lease, and a standby takes over once it expires. """
+    active, standby = LeaseManager(db_path, 'active'), LeaseManager(db_path, 'standby')
+    assert active.acquire('leader', ttl=0.2) == 1
+    assert standby.acquire('leader', ttl=0.2) is None
+    assert active.acquire('leader', ttl=0.2) == 1
+    time.sleep(0.3)
+    assert standby.acquire('leader', ttl=0.2) == 2
+    assert active.acquire('leader', ttl=0.2) is None
+
+def test_release_hands_over_at_once(db_path):
+    """ Test a released lease is available to the standby immediately. """
+    active, standby = LeaseManager(db_path, 'active'), LeaseManager(db_path, 'standby')
+    active.acquire('leader')
+    active.release('leader')
+    assert standby.acquire('leader') == 2
+
+def test_ranges_are_split_without_overlap(db_path):
+    """ Test two workers get disjoint chunks and the range is covered exactly once. """
+    first, second = LeaseManager(db_path, 'first'), LeaseManager(db_path, 'second')
+    chunks = []
+    while True:
+        claimed = [worker.claim_range('job', 0, 250, 100) for worker in (first, second)]
+        for worker, chunk in zip((first, second), claimed):
+            if chunk:
+                chunks.append(chunk)
+                worker.complete_range('job', chunk[0])
+        if not any(claimed):
+            break
+    assert sorted(chunks) == [(0, 100), (100, 200), (200, 250)]
+
+def test_expired_range_is_reclaimed(db_path):
+    """ Test the chunk of a worker that stopped is handed to another worker after its lease expires. """
+    crashed, worker = LeaseManager(db_path, 'crashed'), LeaseManager(db_path, 'worker')
+    assert crashed.claim_range('job', 0, 100, 100, ttl=0.1) == (0, 100)
+    assert worker.claim_range('job', 0, 100, 100) is None
+    time.sleep(0.2)
+    assert worker.claim_range('job', 0, 100, 100) == (0, 100)
+
+def test_kept_lease_is_not_taken_over(db_path):
+    """ Test a lease renewed in the background outlives its TTL while the work under it runs. """
+    active, standby = LeaseManager(db_path, 'active'), LeaseManager(db_path, 'standby')
+    token = active.acquire('leader', ttl=0.3)
+    with active.keep('leader', token, ttl=0.3):
+        time.sleep(0.7)
+        assert standby.acquire('leader', ttl=0.3) is None
+    active.check('leader', token)
+
+def test_old_leader_writes_are_fenced(db_path):
+    """ Test a leader whose lease was taken over cannot commit its block, and checking before posting fails too. """
+    active, standby = LeaseManager(db_path, 'active'), LeaseManager(db_path, 'standby')
+    token = active.acquire('leader', ttl=0.1)
+    time.sleep(0.2)
+    assert standby.acquire('leader') == token + 1
+    unit = BlockUnitOfWork(db_path, 100)
+    unit.add(active.check, 'leader', token)
+    unit.add(lambda conn: conn.execute('CREATE TABLE block_writes (block_number INTEGER)'))
+    with pytest.raises(LeaseLostError):
+        unit.commit()
+    with pytest.raises(LeaseLostError):
+        active.check('leader', token)
+    standby.check('leader', token + 1)
+
+def test_failed_blocks_are_handed_out_again(db_path):
+    """ Test a failed block is leased to one worker at a time, and given up after the maximum number of attempts. """
+    first, second = LeaseManager(db_path, 'first'), LeaseManager(db_path, 'second')
+    first.fail_block('job', 42, 'node timeout')
+    assert first.claim_failed_block('job', 2) == 42
+    assert second.claim_failed_block('job', 2) is None
+    first.fail_block('job', 42, 'node timeout')
+    assert second.claim_failed_block('job', 2) is None
+    first.fail_block('job', 7, 'node timeout')
+    assert second.claim_failed_block('job', 2) == 7
+    second.resolve_failed_block('job', 7)
+    assert first.claim_failed_block('job', 2) is None
@@ -0,0 +1,56 @@
+import sqlite3
+import pytest
+from db_manage.db_manager import DBManager, OPEN_ENDED
+from db_manage.snapshots import TABLE_SCHEMAS
+
+@pytest.fixture
+def manager(tmp_path):
+    """ Fixture to create a dataset with one validator and one subnet owner, recorded in the history from block 100. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    conn = sqlite3.connect(db_path)
+    for table in TABLE_SCHEMAS:
+        conn.execute(TABLE_SCHEMAS[table])
+    conn.execute('INSERT INTO validators (cold_key, hot_key, amount, name) VALUES (?, ?, ?, ?)', ('5Cold', '5Hot', '2000', 'Validator'))
+    conn.execute('INSERT INTO owners (net_uid, owner_coldkey) VALUES (?, ?)', ('3', '5Cold'))
+    conn.commit()
+    manager = DBManager(db_path)
+    manager.sync_mapping_history(100)
+    return manager
+
+def history(manager, table):
+    return sqlite3.connect(manager.db_path).execute(f'SELECT * FROM {table} ORDER BY valid_from').fetchall()
+
+def test_swap_is_versioned_by_block(manager):
+    """ Test a coldkey swap closes the old mappings at its block, and replaying it changes nothing. """
+    for _ in range(2):
+        manager.update_validator_coldkey('5Cold', '5New', 150)
+        manager.update_owner_coldkey('3', '5New', 150)
+    assert manager.get_validator_name('5Cold', block_number=149) == ('Validator', '5Hot', 1)
+    assert manager.get_validator_name('5Cold', block_number=150)[2] == 0
+    assert manager.get_validator_name('5New', block_number=150) == ('Validator', '5Hot', 1)
+    assert manager.get_validator_name(None, '5Hot', 120) == ('Validator', '5Cold', 1)
+    assert manager.get_owner_netuid('5Cold', 149) == '3'
+    assert manager.get_owner_netuid('5New', 149) is None
+    assert manager.get_validator_name('5New') == ('Validator', '5Hot', 1)
+    assert len(history(manager, 'validator_history')) == 2
+
+def test_backfilled_swap_splits_the_history(manager):
+    """ Test a swap found by a backfill, behind a later refresh, is inserted in the middle of the history. """
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute("UPDATE validators SET cold_key = '5New'")
+    conn.commit()
+    manager.sync_mapping_history(200)
+    manager.update_validator_coldkey('5Cold', '5Mid', 150)
+    assert [(row[1], row[4], row[5]) for row in history(manager, 'validator_history')] == \
+        [('5Cold', 100, 150), ('5Mid', 150, 200), ('5New', 200, OPEN_ENDED)]
+    assert manager.get_validator_name('5Mid', block_number=199) == ('Validator', '5Hot', 1)
+
+def test_blocks_before_the_history_use_the_current_tables(manager):
+    """ Test lookups before the history starts fall back to the current tables, and a refresh closes removed mappings. """
+    assert manager.get_owner_netuid('5Cold', 50) == '3'
+    conn = sqlite3.connect(manager.db_path)
+    conn.execute('DELETE FROM owners')
+    conn.commit()
+    manager.sync_mapping_history(300)
+    assert manager.get_owner_netuid('5Cold', 299) == '3'
+    assert manager.get_owner_netuid('5Cold', 300) is None
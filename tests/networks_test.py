@@ -0,0 +1,37 @@
+from chain_observer.bot.networks import load_networks, DEFAULT_NETWORK
+from chain_observer.bot.bt_chain_observer import BtChainObserver
+
+def test_default_network_without_networks(monkeypatch):
+    """ Test the single-network variables are used when NETWORKS is not set. """
+    monkeypatch.delenv('NETWORKS', raising=False)
+    monkeypatch.setenv('SUBTENSOR_ENDPOINT', 'wss://finney.example')
+    networks = load_networks()
+    assert [network.name for network in networks] == [DEFAULT_NETWORK]
+    assert networks[0].endpoints == ['wss://finney.example']
+
+def test_networks_are_isolated(monkeypatch, tmp_path):
+    """ Test every network gets its own endpoints, database and webhooks, and networks without endpoints are skipped. """
+    monkeypatch.setenv('NETWORKS', 'finney,test,local')
+    monkeypatch.setenv('FINNEY_SUBTENSOR_ENDPOINTS', 'wss://a.example,wss://b.example')
+    monkeypatch.setenv('FINNEY_DB_PATH', str(tmp_path / 'finney.sqlite3'))
+    monkeypatch.setenv('FINNEY_COLDKEY_SWAP_DISCORD_WEBHOOK_URL', 'https://discord.example/finney')
+    monkeypatch.setenv('TEST_SUBTENSOR_ENDPOINTS', 'wss://test.example')
+    monkeypatch.delenv('LOCAL_SUBTENSOR_ENDPOINTS', raising=False)
+    finney, test = load_networks()
+    assert finney.endpoints == ['wss://a.example', 'wss://b.example']
+    assert test.db_path == 'database/test.sqlite3'
+    assert finney.db_manager.db_path == finney.event_archive.db_path == str(tmp_path / 'finney.sqlite3')
+    assert finney.pending_schedules is not test.pending_schedules
+    # Reports without a dedicated dissolve webhook go to the coldkey swap channel
+    assert finney.webhook('dissolve_network') == 'https://discord.example/finney'
+    assert test.webhook('coldkey_swap') is None
+
+def test_observer_uses_network_managers(monkeypatch, tmp_path):
+    """ Test an observer built for a network reads and writes that network's database. """
+    monkeypatch.setenv('NETWORKS', 'test')
+    monkeypatch.setenv('TEST_SUBTENSOR_ENDPOINTS', 'wss://test.example')
+    monkeypatch.setenv('TEST_DB_PATH', str(tmp_path / 'test.sqlite3'))
+    network, = load_networks()
+    observer = BtChainObserver(substrate=object(), network=network)
+    assert observer.db_manager is network.db_manager
+    assert observer.finality_tracker.db_path == str(tmp_path / 'test.sqlite3')
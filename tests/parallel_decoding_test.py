@@ -0,0 +1,53 @@
+import os
+import time
+from chain_observer.bot.parallel_decoding import ParallelBlockDecoder
+
+def fake_fetch(substrate, metadata_files, block_number):
+    if block_number in substrate['missing']:
+        raise ConnectionError("block not found")
+    return {'block_number': block_number, 'block_hash': f'0x{block_number:02x}', 'parent_hash': f'0x{block_number - 1:02x}'}
+
+def fake_decode(raw_block):
+    """ Early blocks take longest, so the workers finish them out of order. """
+    block_number = raw_block['block_number']
+    time.sleep(0.05 if block_number < 2 else 0)
+    if block_number == 13:
+        raise ValueError("cannot decode")
+    return block_number, [{'extrinsic_hash': block_number}], [{'event_id': 'ExtrinsicSuccess', 'block': block_number}]
+
+def decoder(missing=()):
+    return ParallelBlockDecoder({'missing': set(missing)}, workers=3, prefetch_blocks=4, decode=fake_decode, fetch=fake_fetch)
+
+def test_blocks_are_yielded_in_order():
+    """ Test decoded blocks come back in block order, shaped like get_block and get_events return them. """
+    results = list(decoder().blocks(range(10)))
+    assert [block_number for block_number, _, _ in results] == list(range(10))
+    block_number, block, events = results[3]
+    assert block['header'] == {'number': 3, 'hash': '0x03', 'parentHash': '0x02'}
+    assert block['extrinsics'][0].value == {'extrinsic_hash': 3}
+    assert events[0]['block'] == 3
+
+def test_failed_blocks_are_yielded_empty():
+    """ Test a block that could not be fetched or decoded is yielded as None without stopping the others. """
+    results = list(decoder(missing={11}).blocks(range(10, 15)))
+    assert [block_number for block_number, _, _ in results] == [10, 11, 12, 13, 14]
+    assert [block is None for _, block, _ in results] == [False, True, False, True, False]
+
+def test_stopping_early():
+    """ Test the consumer can stop before the end of the range. """
+    blocks = decoder().blocks(range(1000))
+    assert [next(blocks)[0] for _ in range(3)] == [0, 1, 2]
+    blocks.close()
+
+def test_pool_is_reused_and_closed(tmp_path):
+    """ Test the worker processes are shared by successive ranges, and closing stops them and removes the metadata files. """
+    parallel = decoder()
+    parallel.metadata_files.directory = str(tmp_path / 'metadata')
+    os.mkdir(parallel.metadata_files.directory)
+    assert len(list(parallel.blocks(range(5)))) == 5
+    executor = parallel.executor
+    assert len(list(parallel.blocks(range(5, 10)))) == 5
+    assert parallel.executor is executor
+    parallel.close()
+    assert parallel.executor is None
+    assert not os.path.exists(str(tmp_path / 'metadata'))
@@ -0,0 +1,65 @@
+import pytest
+from chain_observer.bot.pending_schedules import PendingScheduleRegistry, COLDKEY_SWAP, DISSOLVE_NETWORK
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'db.sqlite3')
+
+@pytest.fixture
+def registry(db_path):
+    """ Fixture to create a registry reminding 100 and 10 blocks before execution. """
+    return PendingScheduleRegistry(db_path, reminder_blocks=[10, 100], grace_blocks=2)
+
+def test_reminders_then_execution(registry):
+    """ Test reminders are emitted once per threshold and the executed swap is linked back. """
+    registry.add(COLDKEY_SWAP, 'old', 'new', 1000, 1500)
+    assert registry.advance(1399) == []
+    notices = registry.advance(1400)
+    assert [(notice, blocks_left) for notice, _, blocks_left in notices] == [('reminder', 100)]
+    assert registry.advance(1401) == []
+    notices = registry.advance(1495)
+    assert [(notice, blocks_left) for notice, _, blocks_left in notices] == [('reminder', 5)]
+    schedule = registry.resolve(COLDKEY_SWAP, 'old', 1500)
+    assert schedule.scheduled_block == 1000
+    assert registry.advance(1600) == []
+
+def test_overdue_without_execution(registry):
+    """ Test a schedule past its execution block plus grace is flagged once. """
+    registry.add(DISSOLVE_NETWORK, 7, 'owner', 1000, 1005)
+    notices = registry.advance(1007)
+    assert [(notice, schedule.key) for notice, schedule, _ in notices] == [('overdue', '7')]
+    assert registry.advance(1008) == []
+    assert registry.resolve(DISSOLVE_NETWORK, 7, 1009) is None
+
+def test_state_persists_across_instances(db_path, registry):
+    """ Test pending schedules and sent reminders survive a restart. """
+    registry.add(COLDKEY_SWAP, 'old', 'new', 1000, 1500)
+    registry.advance(1400)
+    restarted = PendingScheduleRegistry(db_path, reminder_blocks=[10, 100], grace_blocks=2)
+    assert restarted.advance(1401) == []
+    assert [notice for notice, _, _ in restarted.advance(1490)] == ['reminder']
+    assert [schedule.key for schedule in restarted.upcoming(1490, 20)] == ['old']
+
+def test_rescheduling_replaces_previous_schedule(registry):
+    """ Test scheduling the same coldkey again keeps only the newest schedule. """
+    registry.add(COLDKEY_SWAP, 'old', 'first', 1000, 1500)
+    registry.add(COLDKEY_SWAP, 'old', 'second', 1100, 1600)
+    assert registry.resolve(COLDKEY_SWAP, 'old', 1600).new_coldkey == 'second'
+    assert registry.advance(2000) == []
+
+def test_revert_block_keeps_overdue_notice(registry):
+    """ Test reverting a block reopens the swap it executed but not the schedule it flagged as overdue. """
+    registry.add(COLDKEY_SWAP, 'old', 'new', 1000, 1005)
+    registry.add(DISSOLVE_NETWORK, 7, 'owner', 1000, 1005)
+    assert [notice for notice, _, _ in registry.advance(1007)] == ['overdue', 'overdue']
+    registry.add(COLDKEY_SWAP, 'late', 'new', 1000, 1500)
+    registry.resolve(COLDKEY_SWAP, 'late', 1007)
+    registry.revert_block(1007)
+    assert registry.advance(1007) == []
+    assert [schedule.key for schedule in registry.upcoming(1007, 1000)] == ['late']
+
+def test_older_schedule_does_not_replace_newer(registry):
+    """ Test a schedule older than the pending one of its key, e.g. seen by a backfill, is ignored. """
+    registry.add(COLDKEY_SWAP, 'old', 'second', 1100, 1600)
+    assert registry.add(COLDKEY_SWAP, 'old', 'first', 1000, 1500) is None
+    assert [schedule.new_coldkey for schedule in registry.upcoming(1100, 1000)] == ['second']
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+import pytest
+from unittest.mock import patch
+import chain_observer.utils.profiling as profiling
+
+@pytest.fixture
+def profile_dir(tmp_path):
+    """ Fixture enabling profiling into a temporary directory. """
+    with patch.object(profiling, 'PROFILING_ENABLED', True), \
+         patch.object(profiling, 'PROFILING_SAMPLE_RATE', 1.0), \
+         patch.object(profiling, 'PROFILING_DIR', str(tmp_path)):
+        yield tmp_path
+    profiling.tracemalloc.stop()
+
+def test_profile_saved_when_over_budget(profile_dir):
+    """ Test a run slower than its budget is written with the block number in the filename. """
+    with profiling.profile_if_slow('block', -1) as scope:
+        scope.label = 4000123
+        sum(range(1000))
+    assert scope.saved_path is not None
+    names = os.listdir(profile_dir)
+    assert any(name.startswith('block_4000123_') and name.endswith('.prof') for name in names)
+    assert any(name.startswith('block_4000123_') and name.endswith('.txt') for name in names)
+
+def test_profile_discarded_when_under_budget(profile_dir):
+    """ Test a run within its budget leaves nothing behind. """
+    with profiling.profile_if_slow('block', 60000, label=1) as scope:
+        pass
+    assert scope.saved_path is None
+    assert os.listdir(profile_dir) == []
+
+def test_profiling_disabled(tmp_path):
+    """ Test nothing is profiled when PROFILING_ENABLED is not set. """
+    with patch.object(profiling, 'PROFILING_ENABLED', False), patch.object(profiling, 'PROFILING_DIR', str(tmp_path)):
+        with profiling.profile_if_slow('block', -1, label=1) as scope:
+            pass
+    assert scope.elapsed_ms is None
+    assert os.listdir(tmp_path) == []
+
+def test_rotate_profiles_keeps_newest(profile_dir):
+    """ Test rotation removes the oldest captures beyond the limit. """
+    for i in range(5):
+        path = profile_dir / f'block_{i}_x.prof'
+        path.write_text('')
+        (profile_dir / f'block_{i}_x.txt').write_text('')
+        os.utime(path, (i, i))
+    profiling.rotate_profiles(str(profile_dir), max_files=2)
+    assert sorted(os.listdir(profile_dir)) == ['block_3_x.prof', 'block_3_x.txt', 'block_4_x.prof', 'block_4_x.txt']
+
+def test_nested_capture_is_covered_by_the_outer_one(profile_dir):
+    """ Test a run nested in a profiled run of the same thread is not profiled again, and tracemalloc keeps running. """
+    with profiling.profile_if_slow('refresh', -1, label='validators') as outer:
+        with profiling.profile_if_slow('block', -1, label=1) as inner:
+            pass
+    assert inner.saved_path is None
+    assert outer.saved_path is not None
+    assert profiling.tracemalloc.is_tracing()
+
+@pytest.mark.skipif(sys.version_info >= (3, 12), reason="cProfile allows one active profiler per process from Python 3.12")
+def test_long_refresh_does_not_disable_block_profiling(profile_dir):
+    """ Test a block on another thread is profiled while a refresh capture is running. """
+    scopes = []
+    def block():
+        with profiling.profile_if_slow('block', -1, label=2) as scope:
+            sum(range(1000))
+        scopes.append(scope)
+    with profiling.profile_if_slow('refresh', 60000, label='owners'):
+        thread = threading.Thread(target=block)
+        thread.start()
+        thread.join()
+    assert scopes[0].saved_path is not None
@@ -0,0 +1,97 @@
+import shutil
+import sqlite3
+import pytest
+from chain_observer.api.query_service import QueryService, DatabaseUnavailable
+from chain_observer.bot.pending_schedules import PendingScheduleRegistry, COLDKEY_SWAP
+from db_manage.event_archive import EventArchive
+from db_manage.unit_of_work import BlockUnitOfWork
+
+@pytest.fixture
+def db_path(tmp_path):
+    """ Fixture with a copy of the dataset and a few archived events. """
+    path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', path)
+    archive = EventArchive(path)
+    archive.record_block_events(100, [{'event_type': 'schedule_swap_coldkey', 'coldkey': 'a', 'new_coldkey': 'b', 'execution_block': 500, 'success': True}])
+    archive.record_block_events(101, [{'event_type': 'schedule_swap_coldkey', 'coldkey': 'c', 'new_coldkey': 'd', 'execution_block': 501, 'success': True}])
+    archive.record_block_events(102, [{'event_type': 'ColdkeySwapped', 'coldkey': 'c', 'new_coldkey': 'd', 'success': True}])
+    registry = PendingScheduleRegistry(path)
+    registry.add(COLDKEY_SWAP, 'a', 'b', 100, 500)
+    registry.add(COLDKEY_SWAP, 'c', 'd', 101, 501)
+    registry.resolve(COLDKEY_SWAP, 'c', 102)
+    return path
+
+def test_validators_keyset_pagination(db_path):
+    """ Test validator pages follow each other by id. """
+    service = QueryService(db_path)
+    _, build_body = service.table('validators', limit=50)
+    first = build_body()
+    _, build_body = service.table('validators', after_id=first['next_cursor'], limit=50)
+    second = build_body()
+    assert len(first['validators']) == 50
+    assert second['validators'][0]['id'] == first['validators'][-1]['id'] + 1
+
+def test_etag_changes_only_when_data_changes(db_path):
+    """ Test the ETag is stable for unchanged data and changes after a write. """
+    service = QueryService(db_path)
+    etag, _ = service.events()
+    assert service.events()[0] == etag
+    EventArchive(db_path).record_block_events(103, [{'event_type': 'vote', 'hotkey': 'h'}])
+    assert service.events()[0] != etag
+
+def test_snapshot_reloads_after_dataset_change(db_path):
+    """ Test the owners snapshot follows writes to the database. """
+    service = QueryService(db_path)
+    etag, build_body = service.table('owners')
+    owners = build_body()['owners']
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE owners SET owner_coldkey = 'new' WHERE id = ?", (owners[0]['id'],))
+    conn.commit()
+    new_etag, build_body = service.table('owners')
+    assert new_etag != etag
+    assert build_body()['owners'][0]['owner_coldkey'] == 'new'
+
+def test_pending_swaps_skip_executed_swaps(db_path):
+    """ Test the pending swaps come from the registry, without the executed ones. """
+    service = QueryService(db_path)
+    _, build_body = service.pending_swaps()
+    assert [(swap['coldkey'], swap['execution_block']) for swap in build_body()['pending_swaps']] == [('a', 500)]
+
+def test_wal_readers_follow_commits_without_blocking(db_path):
+    """ Test an open reader does not block a block commit in WAL mode, and the snapshot sees the commit. """
+    service = QueryService(db_path)
+    etag, build_body = service.table('owners')
+    owner_id = build_body()['owners'][0]['id']
+    unit = BlockUnitOfWork(db_path, 103)
+    unit.add(lambda conn: None)
+    unit.commit()
+    with service.pool.connection() as reader:
+        reader.execute('BEGIN')
+        reader.execute('SELECT COUNT(*) FROM owners').fetchone()
+        unit.add(lambda conn: conn.execute("UPDATE owners SET owner_coldkey = 'new' WHERE id = ?", (owner_id,)))
+        unit.commit()
+        reader.execute('COMMIT')
+    assert sqlite3.connect(db_path).execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    new_etag, build_body = service.table('owners')
+    assert new_etag != etag
+    assert build_body()['owners'][0]['owner_coldkey'] == 'new'
+
+def test_connections_are_read_only(db_path):
+    """ Test the pool cannot write to the database. """
+    service = QueryService(db_path)
+    with service.pool.connection() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM owners")
+
+def test_missing_database_is_unavailable_until_created(tmp_path):
+    """ Test queries raise DatabaseUnavailable before the observer created the database, and work once it exists. """
+    path = str(tmp_path / 'db.sqlite3')
+    service = QueryService(path)
+    for query in (service.events, service.pending_swaps, lambda: service.table('owners')):
+        with pytest.raises(DatabaseUnavailable):
+            query()
+    assert not (tmp_path / 'db.sqlite3').exists()
+    shutil.copyfile('database/db.sqlite3', path)
+    _, build_body = service.events()
+    assert build_body() == {"events": [], "next_cursor": None}
+    assert service.table('owners')[1]()['owners']
@@ -0,0 +1,55 @@
+import threading
+import time
+import pytest
+from chain_observer.utils.refresh_coordinator import RefreshCoordinator
+
+@pytest.fixture
+def coordinator():
+    """ Fixture to create a coordinator debouncing for 100 ms, never delaying a run more than 300 ms. """
+    return RefreshCoordinator(debounce_seconds=0.1, max_delay_seconds=0.3)
+
+def test_burst_is_merged_into_one_run(coordinator):
+    """ Test a burst of requests for the same dataset runs the refresh once. """
+    runs = []
+    tickets = [coordinator.request(('owners', 'db'), lambda: runs.append(1)) for _ in range(5)]
+    assert all(ticket is tickets[0] for ticket in tickets)
+    assert tickets[0].wait(2)
+    assert runs == [1]
+    assert tickets[0].requests == 5
+
+def test_request_during_run_schedules_one_follow_up(coordinator):
+    """ Test requests arriving while a refresh runs are merged into a single follow-up run. """
+    started, release, runs = threading.Event(), threading.Event(), []
+    def refresh():
+        runs.append(1)
+        started.set()
+        release.wait(2)
+    first = coordinator.request(('owners', 'db'), refresh, debounce=False)
+    started.wait(2)
+    second = coordinator.request(('owners', 'db'), refresh, debounce=False)
+    third = coordinator.request(('owners', 'db'), refresh, debounce=False)
+    release.set()
+    assert first.wait(2) and second.wait(2)
+    assert second is third
+    assert len(runs) == 2
+
+def test_refreshes_never_overlap(coordinator):
+    """ Test owner and validator refreshes run one after the other. """
+    active, overlaps = [], []
+    def refresh():
+        active.append(1)
+        if len(active) > 1:
+            overlaps.append(1)
+        time.sleep(0.05)
+        active.pop()
+    tickets = [coordinator.request((name, 'db'), refresh, debounce=False) for name in ('owners', 'validators')]
+    assert all(ticket.wait(2) for ticket in tickets)
+    assert overlaps == []
+
+def test_wait_raises_refresh_error(coordinator):
+    """ Test waiting callers see the error of a failed refresh. """
+    def refresh():
+        raise RuntimeError("taostats is down")
+    ticket = coordinator.request(('validators', 'db'), refresh, debounce=False)
+    with pytest.raises(RuntimeError):
+        ticket.wait(2)
@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+import pytest
+import run
+from chain_observer.bot.report_outbox import ReportOutbox
+
+@pytest.fixture
+def outbox(tmp_path):
+    """ Fixture to create an outbox dropping a report after two failed deliveries. """
+    return ReportOutbox(str(tmp_path / 'db.sqlite3'), max_attempts=2)
+
+def test_reports_wait_in_the_outbox_until_delivered(outbox, monkeypatch):
+    """ Test delivered reports are removed, and a failed one holds back the later reports of its webhook until it is dropped. """
+    outbox.add(100, [('watchlist', {'title': 'first'}, 'https://discord.example/a', None),
+                     ('watchlist', {'title': 'second'}, 'https://discord.example/a', None),
+                     ('stake_flow', {'title': 'other'}, 'https://discord.example/b', None)])
+    network = SimpleNamespace(leader_token=None, report_outbox=outbox, governance=None)
+    posted = []
+    def post(report, webhook_url):
+        posted.append(report['title'])
+        return (500, 'unavailable') if report['title'] == 'first' else (204, '')
+    monkeypatch.setattr(run, 'post_to_discord', post)
+    run.deliver_reports(network)
+    assert posted == ['first', 'other']
+    assert [(entry.report['title'], entry.attempts) for entry in outbox.pending()] == [('first', 1), ('second', 0)]
+    run.deliver_reports(network)
+    assert posted == ['first', 'other', 'first']
+    assert [entry.report['title'] for entry in outbox.pending()] == ['second']
+    run.deliver_reports(network)
+    assert posted[-1] == 'second' and outbox.pending() == []
@@ -0,0 +1,115 @@
+import os
+from types import SimpleNamespace
+import pytest
+from chain_observer.bot.rules import RuleSet, RuleMatcher, Rule, load_rules
+
+RULES_TOML = '''
+[[rule]]
+name = "large_transfer"
+event = "Balances.Transfer"
+where = { amount = { gte = 1000 } }
+enrich = { from = "validator_coldkey" }
+sink = "transfers"
+
+[[rule]]
+name = "subnet_unstake"
+event = "SubtensorModule.StakeRemoved"
+where = { "2" = { gt = 10, lt = 100 } }
+
+[[rule]]
+name = "failed_root_vote"
+call = "SubtensorModule.vote"
+where = { success = false, approve = true }
+'''
+
+RULES_YAML = '''
+rule:
+  - name: netuid_watch
+    event: SubtensorModule.NetworkAdded
+    where:
+      "0": {in: [3, 5]}
+'''
+
+def event(module_id, event_id, attributes, extrinsic_idx=0):
+    return SimpleNamespace(value={'module_id': module_id, 'event_id': event_id, 'attributes': attributes, 'extrinsic_idx': extrinsic_idx})
+
+def extrinsic(module, function, args, address='5Signer'):
+    return SimpleNamespace(value={'address': address, 'call': {'call_module': module, 'call_function': function,
+                                  'call_args': [{'name': name, 'value': value} for name, value in args.items()]}})
+
+@pytest.fixture
+def rules_path(tmp_path):
+    path = tmp_path / 'rules.toml'
+    path.write_text(RULES_TOML)
+    return str(path)
+
+def test_event_predicates(rules_path):
+    """ Test named and positional attribute predicates, including several operators on one attribute. """
+    matcher = load_rules(rules_path)
+    events = [
+        event('Balances', 'Transfer', {'from': '5A', 'to': '5B', 'amount': 5000}),
+        event('Balances', 'Transfer', {'from': '5A', 'to': '5B', 'amount': 10}),
+        event('SubtensorModule', 'StakeRemoved', ['5C', '5H', 50]),
+        event('SubtensorModule', 'StakeRemoved', ['5C', '5H', 500]),
+        event('System', 'ExtrinsicSuccess', {}),
+    ]
+    found = matcher.match_block([], events)
+    assert [(rule.name, match['attributes']) for rule, match in found] == [
+        ('large_transfer', {'from': '5A', 'to': '5B', 'amount': 5000}),
+        ('subnet_unstake', ['5C', '5H', 50]),
+    ]
+
+def test_call_rules_see_arguments_signer_and_outcome(rules_path):
+    """ Test call rules match on call arguments and on the outcome of the extrinsic. """
+    matcher = load_rules(rules_path)
+    extrinsics = [extrinsic('Timestamp', 'set', {'now': 1}), extrinsic('SubtensorModule', 'vote', {'approve': True}),
+                  extrinsic('SubtensorModule', 'vote', {'approve': True})]
+    events = [event('System', 'ExtrinsicFailed', {}, 1), event('System', 'ExtrinsicSuccess', {}, 2)]
+    found = matcher.match_block(extrinsics, events)
+    assert [(rule.name, match['extrinsic_idx'], match['attributes']['signer']) for rule, match in found] == [('failed_root_vote', 1, '5Signer')]
+    assert matcher.calls == {'SubtensorModule': {'vote'}}
+
+def test_yaml_rules_and_enrichment(tmp_path, rules_path):
+    """ Test YAML rule files and database enrichment of matched attributes. """
+    path = tmp_path / 'rules.yaml'
+    path.write_text(RULES_YAML)
+    matcher = load_rules(str(path))
+    assert [rule.name for rule, _ in matcher.match_block([], [event('SubtensorModule', 'NetworkAdded', [5, 0])])] == ['netuid_watch']
+    db_manager = SimpleNamespace(get_validator_name=lambda coldkey, hotkey=None, block_number=None: ('Validator A', '5H', 1) if coldkey == '5A' else (None, None, 0))
+    rule = load_rules(rules_path).rules[0]
+    assert rule.enrich({'from': '5A', 'amount': 5000}, db_manager) == {'from validator': 'Validator A'}
+    assert rule.enrich({'from': '5Z', 'amount': 5000}, db_manager) == {}
+
+def test_indexed_matcher_cost_does_not_grow_with_rules():
+    """ Test only the rules declared for an event are evaluated, whatever the number of rules. """
+    evaluated = []
+    class CountingRule(Rule):
+        def matches(self, attributes):
+            evaluated.append(self.name)
+            return False
+    rules = [CountingRule({'name': f'rule_{i}', 'event': f'Module{i}.Event'}) for i in range(500)]
+    matcher = RuleMatcher(rules)
+    matcher.match_block([], [event('Module7', 'Event', {}), event('Balances', 'Transfer', {})])
+    assert evaluated == ['rule_7']
+
+def test_invalid_rules_are_rejected():
+    """ Test a rule needs exactly one of event or call, known operators and known enrichments. """
+    for definition in [{'name': 'both', 'event': 'A.b', 'call': 'A.c'}, {'name': 'none'},
+                       {'name': 'op', 'event': 'A.b', 'where': {'x': {'about': 1}}},
+                       {'name': 'lookup', 'event': 'A.b', 'enrich': {'x': 'unknown'}}]:
+        with pytest.raises(ValueError):
+            Rule(definition)
+
+def test_hot_reload(rules_path):
+    """ Test an edited rule file is compiled again, and a broken edit keeps the previous rules. """
+    rule_set = RuleSet(rules_path)
+    assert len(rule_set.refresh().rules) == 3
+    with open(rules_path, 'w') as f:
+        f.write('[[rule]]\nname = "only"\nevent = "Balances.Transfer"\n')
+    os.utime(rules_path, ns=(1, 1))
+    assert [rule.name for rule in rule_set.refresh().rules] == ['only']
+    with open(rules_path, 'w') as f:
+        f.write('[[rule]\nbroken')
+    os.utime(rules_path, ns=(2, 2))
+    assert [rule.name for rule in rule_set.refresh().rules] == ['only']
+    assert RuleSet('').refresh().rules == []
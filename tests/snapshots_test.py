@@ -0,0 +1,84 @@
+import gzip
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from db_manage.db_manager import DBManager
+from db_manage.snapshots import SnapshotStore, SnapshotError, dataset_version, dataset_rows, TABLE_SCHEMAS
+from chain_observer.utils.dataset_bootstrap import start_dataset, catch_up_dataset
+
+def make_dataset(db_path, validators, owners):
+    conn = sqlite3.connect(db_path)
+    for table in TABLE_SCHEMAS:
+        conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.execute(TABLE_SCHEMAS[table])
+    conn.executemany('INSERT INTO validators (cold_key, hot_key, amount, name) VALUES (?, ?, ?, ?)', validators)
+    conn.executemany('INSERT INTO owners (net_uid, owner_coldkey) VALUES (?, ?)', owners)
+    conn.commit()
+
+def network(db_path, name='finney'):
+    return SimpleNamespace(name=name, db_path=db_path, db_manager=DBManager(db_path))
+
+@pytest.fixture
+def store(tmp_path):
+    """ Fixture to create a snapshot store keeping two snapshots per network. """
+    return SnapshotStore(str(tmp_path / 'snapshots'), keep=2)
+
+def test_export_and_import_round_trip(store, tmp_path):
+    """ Test a snapshot carries the dataset tables and its block, and older snapshots are pruned. """
+    source = str(tmp_path / 'source.sqlite3')
+    make_dataset(source, [('5Cold', '5Hot', '2000', 'Validator')], [('3', '5Owner')])
+    for block_number in (100, 200, 300):
+        path = store.export(source, 'finney', block_number)
+    assert store.list('finney') == [store.path('finney', 200), path]
+    assert dataset_version(source) == 300
+    target = str(tmp_path / 'target.sqlite3')
+    header = store.import_snapshot(target, path)
+    assert (header['network'], header['block_number']) == ('finney', 300)
+    assert dataset_version(target) == 300
+    manager = DBManager(target)
+    assert manager.get_validator_name('5Cold') == ('Validator', '5Hot', 1)
+    assert manager.get_owner_netuid('5Owner') == '3'
+
+def test_incompatible_snapshot_is_rejected(store, tmp_path):
+    """ Test a file with another snapshot format is refused and leaves the dataset as it was. """
+    target = str(tmp_path / 'target.sqlite3')
+    make_dataset(target, [('5Cold', '5Hot', '2000', 'Validator')], [])
+    path = str(tmp_path / 'bad.snapshot.gz')
+    with gzip.open(path, 'wt') as f:
+        f.write('{"format": 99}\n')
+    with pytest.raises(SnapshotError):
+        store.import_snapshot(target, path)
+    assert dataset_rows(target) == {'validators': 1, 'owners': 0}
+
+def test_startup_loads_newer_snapshot_only(store, tmp_path):
+    """ Test startup loads a snapshot newer than the dataset, and otherwise resumes from the last observed block. """
+    source = str(tmp_path / 'source.sqlite3')
+    make_dataset(source, [('5Cold', '5Hot', '2000', 'Validator')], [])
+    store.export(source, 'finney', 500)
+    fresh = network(str(tmp_path / 'fresh.sqlite3'))
+    assert start_dataset(fresh, store) == 500
+    assert dataset_rows(fresh.db_path)['validators'] == 1
+    fresh.db_manager.verify_update_block_number(650)
+    assert start_dataset(fresh, store) == 650
+
+class EventsOnlySubstrate:
+    def __init__(self, events):
+        self.events = events
+
+    def get_block_hash(self, block_id):
+        return block_id
+
+    def get_events(self, block_hash):
+        return self.events.get(block_hash, [])
+
+def test_catch_up_replays_key_swaps(tmp_path):
+    """ Test the blocks between the snapshot and the head are replayed for coldkey swaps, then the dataset is at the head. """
+    target = network(str(tmp_path / 'target.sqlite3'))
+    make_dataset(target.db_path, [('5Cold', '5Hot', '2000', 'Validator')], [('3', '5Cold')])
+    swapped = SimpleNamespace(value={'module_id': 'SubtensorModule', 'event_id': 'ColdkeySwapped',
+                                     'attributes': {'old_coldkey': '5Cold', 'new_coldkey': '5New'}})
+    substrate = EventsOnlySubstrate({502: [swapped]})
+    assert catch_up_dataset(target, 500, substrate, to_block=510) == 510
+    assert target.db_manager.get_validator_name('5New') == ('Validator', '5Hot', 1)
+    assert target.db_manager.get_owner_netuid('5New') == '3'
+    assert dataset_version(target.db_path) == 510
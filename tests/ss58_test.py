@@ -0,0 +1,47 @@
+import os
+import pytest
+from substrateinterface import Keypair
+from chain_observer.utils import ss58
+from chain_observer.utils.convert_hex_to_ss58 import convert_hex_to_ss58
+
+@pytest.fixture
+def public_keys():
+    """ Fixture with deterministic pseudo-random public keys. """
+    return [bytes((i * 7 + j * 13) % 256 for j in range(32)) for i in range(64)] + [os.urandom(32) for _ in range(64)]
+
+@pytest.mark.parametrize('ss58_format', [0, 2, 42, 63, 64, 1284, 16383])
+def test_encode_matches_keypair(public_keys, ss58_format):
+    """ Test the codec produces the same addresses as substrate-interface Keypair. """
+    for public_key in public_keys:
+        expected = Keypair(public_key=public_key, ss58_format=ss58_format).ss58_address
+        assert ss58.ss58_encode(public_key, ss58_format) == expected
+        assert ss58.ss58_decode(expected, ss58_format) == public_key
+
+def test_convert_hex_to_ss58_matches_keypair(public_keys):
+    """ Test convert_hex_to_ss58 keeps its output for prefixed storage values. """
+    for public_key in public_keys:
+        expected = Keypair(public_key=public_key, ss58_format=42).ss58_address
+        assert convert_hex_to_ss58('0x' + public_key.hex()) == expected
+        assert convert_hex_to_ss58('0x0000' + public_key.hex()) == expected
+
+def test_batch_round_trip(public_keys):
+    """ Test batch encode/decode keep the order of the keys. """
+    addresses = ss58.batch_encode(public_keys)
+    assert ss58.batch_decode(addresses, 42) == public_keys
+
+def test_decode_rejects_bad_checksum():
+    """ Test decoding an address with a corrupted checksum fails. """
+    address = ss58.ss58_encode(bytes(32))
+    corrupted = address[:-1] + ('1' if address[-1] != '1' else '2')
+    with pytest.raises(ValueError):
+        ss58.ss58_decode(corrupted)
+
+def test_decode_rejects_other_format():
+    """ Test decoding with an expected format rejects addresses of another network. """
+    with pytest.raises(ValueError):
+        ss58.ss58_decode(ss58.ss58_encode(bytes(32), 0), 42)
+
+def test_encode_rejects_short_key():
+    """ Test encoding a public key that is not 32 bytes fails. """
+    with pytest.raises(ValueError):
+        ss58.ss58_encode(bytes(31))
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+import pytest
+from chain_observer.bot.stake_flow import StakeFlowMonitor, RollingSum, RAO_PER_TAO, BLOCKS_PER_HOUR
+
+def stake_event(event_id, hotkey, tao, netuid=None):
+    attributes = ['5Cold', hotkey, int(tao * RAO_PER_TAO)]
+    if netuid is not None:
+        attributes += [0, netuid]
+    return SimpleNamespace(value={'module_id': 'SubtensorModule', 'event_id': event_id, 'attributes': attributes})
+
+@pytest.fixture
+def monitor(tmp_path):
+    """ Fixture to create a monitor alerting on 100 TAO per hour, 500 TAO per day, or an hour 5 times the day's hourly average. """
+    return StakeFlowMonitor(str(tmp_path / 'db.sqlite3'), hourly_threshold_tao=100, daily_threshold_tao=500, rate_factor=5, rate_min_tao=20)
+
+def test_rolling_sum_expires_old_buckets():
+    """ Test amounts leave the window once their bucket is older than the window. """
+    window = RollingSum(300, 25)
+    window.add(1000, 5)
+    window.add(1100, 7)
+    assert window.sum(1200) == 12
+    assert window.sum(1300) == 7
+    assert window.sum(1400) == 0
+    assert window.expired(1400)
+
+def test_slow_drain_raises_daily_alert_once(monitor):
+    """ Test many small removals under the hourly threshold add up to one daily alert, re-armed only after the flow recedes. """
+    alerts = []
+    for hour in range(12):
+        alerts += monitor.process_block(1000 + hour * BLOCKS_PER_HOUR, [stake_event('StakeRemoved', '5Hot', 50)])
+    threshold_alerts = [alert for alert in alerts if alert['kind'] == 'threshold']
+    assert [(alert['scope'], alert['key'], alert['window'], alert['flow']) for alert in threshold_alerts] == [
+        ('hotkey', '5Hot', '24h', -500 * RAO_PER_TAO)]
+
+def test_hourly_threshold_and_netuid_scope(monitor):
+    """ Test a large stake raises the hourly threshold alert for its hotkey and, when the event has one, its subnet. """
+    alerts = monitor.process_block(1000, [stake_event('StakeAdded', '5Hot', 60, netuid=3), stake_event('StakeAdded', '5Hot', 60, netuid=3)])
+    assert sorted((alert['scope'], alert['key'], alert['window']) for alert in alerts) == [('hotkey', '5Hot', '1h'), ('netuid', '3', '1h')]
+
+def test_rate_of_change(monitor):
+    """ Test an hour far above the day's hourly average raises a rate alert, but not before an hour of history. """
+    assert monitor.process_block(1000, [stake_event('StakeAdded', '5Hot', 30)]) == []
+    for hour in range(1, 4):
+        assert monitor.process_block(1000 + hour * BLOCKS_PER_HOUR, [stake_event('StakeAdded', '5Hot', 5)]) == []
+    alerts = monitor.process_block(1000 + 4 * BLOCKS_PER_HOUR, [stake_event('StakeAdded', '5Hot', 90)])
+    assert [(alert['kind'], alert['window']) for alert in alerts] == [('rate', '1h')]
+
+def test_checkpoint_survives_restart(monitor, tmp_path):
+    """ Test a restarted monitor continues the windows from the checkpoint and ignores blocks it already counted. """
+    monitor.process_block(1000, [stake_event('StakeRemoved', '5Hot', 80)])
+    restarted = StakeFlowMonitor(monitor.db_path, hourly_threshold_tao=100, daily_threshold_tao=500, rate_factor=5, rate_min_tao=1000)
+    assert restarted.process_block(1000, [stake_event('StakeRemoved', '5Hot', 80)]) == []
+    alerts = restarted.process_block(1010, [stake_event('StakeRemoved', '5Hot', 30)])
+    assert [(alert['window'], alert['flow']) for alert in alerts] == [('1h', -110 * RAO_PER_TAO)]
@@ -0,0 +1,123 @@
+import shutil
+import sqlite3
+import pytest
+import run
+from benchmarks.corpus import ReplaySubstrate, load_scenario
+from db_manage.db_manager import DBManager
+from db_manage.event_archive import EventArchive
+from db_manage.leases import LeaseLostError
+from db_manage.unit_of_work import BlockUnitOfWork
+from chain_observer.bot.bt_chain_observer import BtChainObserver
+from chain_observer.bot.networks import Network
+from chain_observer.bot.stake_flow import StakeFlowMonitor
+
+@pytest.fixture
+def db_path(tmp_path):
+    """ Fixture to create a copy of the database. """
+    path = str(tmp_path / 'db.sqlite3')
+    shutil.copyfile('database/db.sqlite3', path)
+    return path
+
+def archived_blocks(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT DISTINCT block_number FROM event_archive ORDER BY block_number')]
+    except sqlite3.OperationalError:
+        return []
+
+def test_block_writes_commit_together(db_path):
+    """ Test the checkpoint, key swap and archived events of a block are written together, or not at all on an error. """
+    manager, archive = DBManager(db_path), EventArchive(db_path)
+    conn = sqlite3.connect(db_path)
+    coldkey = conn.execute('SELECT cold_key FROM validators LIMIT 1').fetchone()[0]
+    conn.close()
+    start = 100
+    manager.verify_update_block_number(start)
+
+    def failing_write(conn):
+        raise sqlite3.OperationalError('disk I/O error')
+    unit = BlockUnitOfWork(db_path, start + 1)
+    unit.add(manager.verify_update_block_number, start + 1)
+    unit.add(manager.update_validator_coldkey, coldkey, '5NewColdkey', start + 1)
+    unit.add(archive.record_block_events, start + 1, [{'event_type': 'ColdkeySwapped', 'coldkey': coldkey, 'new_coldkey': '5NewColdkey'}])
+    unit.add(failing_write)
+    with pytest.raises(sqlite3.OperationalError):
+        unit.commit()
+    assert manager.get_last_block_number() == start
+    assert manager.get_validator_name(coldkey)[2] == 1
+    assert archived_blocks(db_path) == []
+
+    unit.writes = []
+    unit.add(manager.verify_update_block_number, start + 1)
+    unit.add(manager.update_validator_coldkey, coldkey, '5NewColdkey', start + 1)
+    unit.add(archive.record_block_events, start + 1, [{'event_type': 'ColdkeySwapped', 'coldkey': coldkey, 'new_coldkey': '5NewColdkey'}])
+    unit.commit()
+    assert manager.get_last_block_number() == start + 1
+    assert manager.get_validator_name('5NewColdkey')[2] == 1
+    assert archived_blocks(db_path) == [start + 1]
+
+def test_failed_block_leaves_no_writes(db_path, monkeypatch):
+    """ Test a block whose processing fails advances neither the checkpoint nor the archive, and the next one commits. """
+    blocks = load_scenario('swaps')
+    observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=Network('test', [], db_path, {}))
+    observer.db_manager.verify_update_block_number(blocks[0].block_number - 1)
+    def broken_rules(self, *args):
+        raise RuntimeError('detector bug')
+    with monkeypatch.context() as patch:
+        patch.setattr(BtChainObserver, 'process_rules', broken_rules)
+        with pytest.raises(RuntimeError):
+            observer.bt_block_observer(blocks[0].block_number)
+    assert observer.db_manager.get_last_block_number() == blocks[0].block_number - 1
+    assert archived_blocks(db_path) == []
+    for block in blocks:
+        observer.bt_block_observer(block.block_number)
+    assert observer.db_manager.get_last_block_number() == blocks[-1].block_number
+    assert archived_blocks(db_path)
+
+def test_fenced_out_block_leaves_no_component_state(db_path):
+    """ Test a block whose commit is fenced out writes no schedule, stake flow or report, and the components reload their state. """
+    blocks = load_scenario('swaps')
+    network = Network('test', [], db_path, {'coldkey_swap': 'https://discord.example/swap'})
+    observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=network)
+    number = blocks[0].block_number
+    def lease_lost(conn=None):
+        raise LeaseLostError('lease taken over')
+    network.leader_token, network.check_leader = 1, lease_lost
+    with pytest.raises(LeaseLostError):
+        observer.bt_block_observer(number, on_processed=lambda results: run.queue_reports(network, observer, results))
+    assert not network.pending_schedules.loaded and not network.stake_flow.loaded
+    assert network.pending_schedules.upcoming(number, 10 ** 6) == []
+    committed = StakeFlowMonitor(db_path)
+    committed.load()
+    assert committed.last_block is None and committed.aggregates == {}
+    assert network.report_outbox.pending() == []
+
+    network.leader_token = None
+    observer.bt_block_observer(number, on_processed=lambda results: run.queue_reports(network, observer, results))
+    assert [schedule.scheduled_block for schedule in network.pending_schedules.upcoming(number, 10 ** 6)] == [number]
+    assert [entry.kind for entry in network.report_outbox.pending()] == ['schedule_swap_coldkey']
+
+def test_tick_catches_up_from_the_checkpoint(db_path, monkeypatch):
+    """ Test a tick observes the blocks after the checkpoint, and the next tick retries a block that failed. """
+    blocks = load_scenario('quiet')
+    network = Network('test', [], db_path, {})
+    network.observer = BtChainObserver(substrate=ReplaySubstrate(blocks), network=network)
+    head = blocks[-1].block_number
+    network.db_manager.verify_update_block_number(head - 5)
+    monkeypatch.setattr(run, 'CATCHUP_BLOCKS_PER_TICK', 3)
+    process_rules = BtChainObserver.process_rules
+    def flaky_rules(self, extrinsics, events, current_block_number):
+        if current_block_number == head - 3:
+            raise RuntimeError('node timeout')
+        return process_rules(self, extrinsics, events, current_block_number)
+    with monkeypatch.context() as patch:
+        patch.setattr(BtChainObserver, 'process_rules', flaky_rules)
+        run.run_bot(network)
+    assert network.db_manager.get_last_block_number() == head - 4
+    run.run_bot(network)
+    assert network.db_manager.get_last_block_number() == head - 1
+    run.run_bot(network)
+    assert network.db_manager.get_last_block_number() == head
+    monkeypatch.setattr(run, 'CATCHUP_MAX_GAP_BLOCKS', 3)
+    network.db_manager.verify_update_block_number(head - 10)
+    assert run.blocks_to_observe(network, network.observer) == [head]
@@ -0,0 +1,113 @@
+import sqlite3
+import pytest
+from db_manage.db_manager import DBManager
+from chain_observer.utils.ss58 import ss58_encode
+from chain_observer.utils.validator_dataset import ChainValidatorLoader, StakeStorageMissing, storage_prefix, map_key, double_map_key, RAO_PER_TAO
+
+def account(n):
+    return bytes([n]) * 32
+
+# Key hashers of the stake maps, as the runtime metadata gives them.
+STAKE_HASHERS = {'TotalHotkeyStake': ['Identity'], 'TotalHotkeyAlpha': ['Blake2_128Concat', 'Identity']}
+
+class StorageFunction:
+    def __init__(self, hashers):
+        self.hashers = hashers
+
+    def get_param_hashers(self):
+        return self.hashers
+
+class StorageNode:
+    """ Serves a key-value storage through the paged key and batched read RPCs, recording the calls. """
+    def __init__(self, storage, stake_map='TotalHotkeyStake'):
+        self.storage = dict(sorted(storage.items()))
+        self.stake_map = stake_map
+        self.calls = []
+
+    def get_metadata_storage_function(self, module_name, storage_name, block_hash=None):
+        return StorageFunction(STAKE_HASHERS[storage_name]) if storage_name == self.stake_map else None
+
+    def rpc_request(self, method, params):
+        self.calls.append(method)
+        if method == 'chain_getFinalizedHead':
+            return {'result': '0xhead'}
+        if method == 'state_getKeysPaged':
+            prefix, count, start_key, block_hash = params
+            keys = [key for key in self.storage if key.startswith(prefix) and key > start_key]
+            return {'result': keys[:count]}
+        if method == 'state_queryStorageAt':
+            keys, block_hash = params
+            return {'result': [{'block': block_hash, 'changes': [[key, self.storage.get(key)] for key in keys]}]}
+        raise ValueError(method)
+
+def chain_storage(delegates, stake_map='TotalHotkeyStake'):
+    """ Storage of delegates given as {hotkey byte: (coldkey byte, stake in TAO)}, with their stake in `stake_map`. """
+    storage = {}
+    for hotkey, (coldkey, stake) in delegates.items():
+        storage[map_key(storage_prefix('SubtensorModule', 'Delegates'), 'Blake2_128Concat', account(hotkey))] = '0x1203'
+        storage[map_key(storage_prefix('SubtensorModule', 'Owner'), 'Blake2_128Concat', account(hotkey))] = '0x' + account(coldkey).hex()
+        if stake_map == 'TotalHotkeyStake':
+            stake_key = map_key(storage_prefix('SubtensorModule', stake_map), 'Identity', account(hotkey))
+        else:
+            stake_key = double_map_key(storage_prefix('SubtensorModule', stake_map), STAKE_HASHERS[stake_map], account(hotkey), bytes(2))
+        storage[stake_key] = '0x' + (stake * RAO_PER_TAO).to_bytes(8, 'little').hex()
+    return storage
+
+def test_storage_prefix():
+    """ Test storage prefixes are twox128(module) ++ twox128(item), as used for the subnet owners. """
+    assert storage_prefix('SubtensorModule', 'SubnetOwner') == '0x658faa385070e074c85bf6b568cf055536e3e82152c8758267395fe524fbbd16'
+
+def test_delegates_are_read_page_by_page():
+    """ Test delegates are enumerated in pages, with one batched read of owners and stakes per page. """
+    node = StorageNode(chain_storage({n: (100 + n, 2000) for n in range(1, 6)}))
+    pages = list(ChainValidatorLoader(node, page_size=2).validators())
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert node.calls.count('state_queryStorageAt') == 3
+    rows = {hotkey: (coldkey, stake) for page in pages for coldkey, hotkey, stake in page}
+    assert rows[ss58_encode(account(3))] == (ss58_encode(account(103)), 2000 * RAO_PER_TAO)
+
+def test_validators_table_from_chain(tmp_path):
+    """ Test the validators table is rebuilt from the chain, keeping known names and skipping small delegates. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE validators (id INTEGER PRIMARY KEY AUTOINCREMENT, cold_key TEXT, hot_key TEXT, amount TEXT, name TEXT)')
+    conn.execute('INSERT INTO validators (cold_key, hot_key, amount, name) VALUES (?, ?, ?, ?)',
+                 ('5Old', ss58_encode(account(1)), '1', 'Known Validator'))
+    conn.commit()
+    manager = DBManager(db_path)
+    manager.TAOSTATS_API_KEY = None
+    manager.update_validator_coldkeys_from_chain(StorageNode(chain_storage({1: (11, 5000), 2: (12, 3000), 3: (13, 10)})), min_stake_tao=1000)
+    assert manager.get_validator_name(ss58_encode(account(11))) == ('Known Validator', ss58_encode(account(1)), 1)
+    assert manager.get_validator_name(ss58_encode(account(12)))[0] == 'Unknown'
+    assert manager.get_validator_name(ss58_encode(account(13)))[2] == 0
+
+def test_name_lookups_hold_no_write_lock(tmp_path):
+    """ Test the TaoStats name lookups run while no write transaction is open, and their names are applied. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    manager = DBManager(db_path)
+    manager.TAOSTATS_API_KEY = 'key'
+    def get_validator_names(hotkey):
+        writer = sqlite3.connect(db_path, timeout=0, isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        writer.execute('ROLLBACK')
+        writer.close()
+        return f'name of {hotkey[:6]}'
+    manager.get_validator_names = get_validator_names
+    manager.update_validator_coldkeys_from_chain(StorageNode(chain_storage({1: (11, 5000), 2: (12, 3000)})), min_stake_tao=1000)
+    assert manager.get_validator_name(ss58_encode(account(12)))[0] == f'name of {ss58_encode(account(2))[:6]}'
+
+def test_root_stake_on_dynamic_tao_runtimes():
+    """ Test runtimes without TotalHotkeyStake give the root subnet stake from TotalHotkeyAlpha. """
+    node = StorageNode(chain_storage({1: (11, 5000), 2: (12, 10)}, 'TotalHotkeyAlpha'), 'TotalHotkeyAlpha')
+    rows = [row for page in ChainValidatorLoader(node).validators() for row in page]
+    assert [stake for _, _, stake in rows] == [5000 * RAO_PER_TAO, 10 * RAO_PER_TAO]
+
+def test_missing_stake_map_fails_loudly(tmp_path):
+    """ Test a runtime with no known stake map fails the refresh and leaves the validators table as it was. """
+    db_path = str(tmp_path / 'db.sqlite3')
+    manager = DBManager(db_path)
+    manager.TAOSTATS_API_KEY = None
+    manager.update_validator_coldkeys_from_chain(StorageNode(chain_storage({1: (11, 5000)})), min_stake_tao=1000)
+    with pytest.raises(StakeStorageMissing):
+        manager.update_validator_coldkeys_from_chain(StorageNode(chain_storage({2: (12, 5000)}), stake_map=None), min_stake_tao=1000)
+    assert manager.get_validator_name(ss58_encode(account(11)))[2] == 1
@@ -0,0 +1,74 @@
+import os
+from types import SimpleNamespace
+import pytest
+from chain_observer.bot.watchlist import Watchlist, BloomFilter, address_key
+from chain_observer.utils.ss58 import ss58_encode
+
+OWN_KEY = bytes(range(32))
+PARTNER_KEY = bytes(range(32, 64))
+OTHER_KEY = bytes(range(64, 96))
+
+def event(module_id, event_id, attributes, extrinsic_idx=1):
+    return SimpleNamespace(value={'module_id': module_id, 'event_id': event_id, 'attributes': attributes, 'extrinsic_idx': extrinsic_idx})
+
+@pytest.fixture
+def watchlist(tmp_path):
+    """ Fixture to create a watchlist file with an SS58 coldkey, a hex hotkey, a comment and an invalid line. """
+    path = tmp_path / 'watchlist.csv'
+    path.write_text(f"# address,label\n{ss58_encode(OWN_KEY)},our coldkey\n0x{PARTNER_KEY.hex()},partner hotkey\nnot-an-address,broken\n")
+    watchlist = Watchlist(str(path))
+    assert watchlist.refresh()
+    return watchlist
+
+def test_address_forms():
+    """ Test SS58, hex and bytes attributes are turned into public keys, other values are not. """
+    assert address_key(ss58_encode(OWN_KEY)) == OWN_KEY
+    assert address_key(ss58_encode(OWN_KEY, 0)) == OWN_KEY
+    assert address_key('0x' + OWN_KEY.hex()) == OWN_KEY
+    assert address_key(OWN_KEY) == OWN_KEY
+    assert address_key(535163408772) is None
+    assert address_key('x' * 48) is None
+
+def test_matches_every_address_attribute(watchlist):
+    """ Test addresses are found in named, positional and nested attributes of any event. """
+    events = [
+        event('Balances', 'Transfer', {'from': ss58_encode(OTHER_KEY), 'to': ss58_encode(OWN_KEY), 'amount': 10}),
+        event('SubtensorModule', 'StakeAdded', [ss58_encode(OTHER_KEY), ss58_encode(PARTNER_KEY), 5], extrinsic_idx=2),
+        event('SubtensorModule', 'NeuronRegistered', [3, 12, {'hotkey': '0x' + PARTNER_KEY.hex()}]),
+        event('SubtensorModule', 'NetworkRemoved', 2),
+        event('SubtensorModule', 'BlockEmission', None),
+    ]
+    matches = watchlist.match_events(events)
+    assert [(match['event'], match['attribute'], match['label']) for match in matches] == [
+        ('Balances.Transfer', 'to', 'our coldkey'),
+        ('SubtensorModule.StakeAdded', '1', 'partner hotkey'),
+        ('SubtensorModule.NeuronRegistered', '2.hotkey', 'partner hotkey'),
+    ]
+    assert matches[1]['extrinsic_idx'] == 2
+    assert matches[1]['address'] == ss58_encode(PARTNER_KEY)
+
+def test_bloom_prefilter():
+    """ Test the Bloom filter never rejects a watched key and the filtered watchlist gives the same matches. """
+    keys = [os.urandom(32) for _ in range(1000)]
+    bloom = BloomFilter(16384)
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert sum(os.urandom(32) in bloom for _ in range(1000)) < 100
+    filtered = Watchlist('', bloom_bits=16384)
+    filtered.set_keys({OWN_KEY: 'our coldkey'})
+    assert filtered.label(OWN_KEY) == 'our coldkey'
+    assert filtered.label(OTHER_KEY) is None
+
+def test_reload_on_change(watchlist):
+    """ Test an edited watchlist file is read again, and a missing file keeps the last keys. """
+    path = watchlist.path
+    with open(path, 'w') as f:
+        f.write(f"{ss58_encode(OTHER_KEY)},new key\n")
+    os.utime(path, ns=(1, 1))
+    watchlist.refresh()
+    assert list(watchlist.labels.values()) == ['new key']
+    os.remove(path)
+    assert watchlist.refresh()
+    assert list(watchlist.labels.values()) == ['new key']
+    assert not Watchlist('').refresh()